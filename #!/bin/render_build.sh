@@ -1,3 +1,9 @@
 #!/bin/bash
 # Update and install Redis
-apt-get update && apt-get install -y redis-server
\ No newline at end of file
+apt-get update && apt-get install -y redis-server
+# The opening book (opening_book.bin) is committed, and rebuilding it gives
+# the same file (~1 min of CPU). Set REBUILD_BOOK=1 for a deploy that changes
+# the search or the book's --ply/--depth.
+if [ -n "$REBUILD_BOOK" ]; then
+    python build_book.py --ply 4 --depth 8 --out opening_book.bin
+fi
@@ -0,0 +1,44 @@
+import numpy as np
+from connect4 import ROWS, COLS, H1, WINDOW_MASKS
+
+# --- WINDOW INDEX TABLE ---
+# The same 69 windows as connect4.WINDOW_MASKS, but as positions in the flat
+# 42-cell board (row 0 = top row, like game.board and the bot protocol).
+# WINDOW_INDEX[w] holds the 4 flat indices of window w.
+def _flat_index(bit):
+    col, row_from_bottom = divmod(bit, H1)
+    return (ROWS - 1 - row_from_bottom) * COLS + col
+
+WINDOW_INDEX = np.array(
+    [[_flat_index(bit) for bit in range(COLS * H1) if mask >> bit & 1] for mask in WINDOW_MASKS],
+    dtype=np.intp,
+)
+CENTER_INDEX = np.arange(ROWS) * COLS + 3
+
+def score_boards(boards, piece):
+    """
+    Batched connect4.score_position.
+    'boards' is anything shaped (N, 6, 7) or (N, 42) holding 0/1/2
+    (a single board works too). Returns an int array of N scores for 'piece'.
+    Both players' pieces are counted for every window in one gather, with the
+    same weights as evaluate_window (100 / 5 / 2 / -4) and the center bonus.
+    """
+    boards = np.asarray(boards)
+    single = boards.ndim == 1 or boards.shape == (ROWS, COLS)
+    flat = boards.reshape(-1, ROWS * COLS)
+
+    windows = flat[:, WINDOW_INDEX] # (N, 69, 4)
+    mine = (windows == piece).sum(axis=2)
+    theirs = (windows == 3 - piece).sum(axis=2)
+    empty = 4 - mine - theirs
+
+    window_scores = (100 * (mine == 4)
+                     + 5 * ((mine == 3) & (empty == 1))
+                     + 2 * ((mine == 2) & (empty == 2))
+                     - 4 * ((theirs == 3) & (empty == 1)))
+    scores = window_scores.sum(axis=1) + 3 * (flat[:, CENTER_INDEX] == piece).sum(axis=1)
+    return scores[0] if single else scores
+
+def score_games(games, piece):
+    """score_boards for a list of Connect4 objects."""
+    return score_boards(np.array([game.board for game in games], dtype=np.int8), piece)
@@ -0,0 +1,58 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from bot_pool import BotPool, BotProcess
+from subprocess_referee import play_match
+
+# Matches per hour with a fresh pair of bot processes per match (what
+# run_match_task used to do) vs warm processes borrowed from a BotPool.
+# The bots are copied into a temporary bots folder with their model files.
+#
+#   python bench_bot_pool.py --matches 20
+
+BOTS = {
+    "torch-bot": ("uploaded_submission.py", "connect4_brain.pth"),
+    "numpy-bot": ("submission.py", "connect4_brain.npz"),
+    "random-bot": ("random_bot.py", None),
+}
+
+def make_bots_dir():
+    folder = tempfile.mkdtemp(prefix="bots-")
+    for bot_id, (script, model) in BOTS.items():
+        shutil.copy(script, os.path.join(folder, f"{bot_id}.py"))
+        if model:
+            shutil.copy(model, folder)
+    return folder
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold vs pooled bot processes")
+    parser.add_argument("--matches", type=int, default=20, help="Matches per pairing")
+    args = parser.parse_args()
+
+    folder = make_bots_dir()
+    pairings = [("torch-bot", "numpy-bot"), ("numpy-bot", "random-bot"), ("torch-bot", "random-bot")]
+    try:
+        print(f"{'pairing':<24} | {'cold':>12} | {'pooled':>12} | speedup")
+        for bot1, bot2 in pairings:
+            start = time.perf_counter()
+            for _ in range(args.matches):
+                p1 = BotProcess(bot1, os.path.join(folder, f"{bot1}.py"))
+                p2 = BotProcess(bot2, os.path.join(folder, f"{bot2}.py"))
+                play_match(p1, p2)
+                p1.close()
+                p2.close()
+            cold = time.perf_counter() - start
+
+            pool = BotPool(folder)
+            start = time.perf_counter()
+            for _ in range(args.matches):
+                with pool.borrow(bot1) as p1, pool.borrow(bot2) as p2:
+                    play_match(p1, p2)
+            pooled = time.perf_counter() - start
+            pool.close()
+            print(f"{bot1 + ' v ' + bot2:<24} | {3600 * args.matches / cold:7.0f}/hour | "
+                  f"{3600 * args.matches / pooled:7.0f}/hour | {cold / pooled:5.1f}x   ({pool.counts})")
+    finally:
+        shutil.rmtree(folder)
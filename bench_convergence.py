@@ -0,0 +1,66 @@
+import argparse
+import time
+from connect4 import random_agent, smart_agent
+from dqn_agent import TrainConfig, train_dqn, win_rate
+
+# How many training games does each DQN variant need before it beats
+# random_agent (and smart_agent) often enough?
+#
+#   python bench_convergence.py --max-episodes 3000 --eval-every 100
+
+VARIANTS = {
+    "baseline": {},
+    "target net": {"target_update": 200},
+    "double dqn": {"target_update": 200, "double_dqn": True},
+    "3-step": {"n_step": 3},
+    "prioritized": {"prioritized": True},
+    "all": {"target_update": 200, "double_dqn": True, "n_step": 3, "prioritized": True},
+    "conv": {"arch": "conv"},
+    "conv + all": {"arch": "conv", "target_update": 200, "double_dqn": True, "n_step": 3, "prioritized": True},
+}
+
+OPPONENTS = {
+    "random_agent": lambda game, player: random_agent(game),
+    "smart_agent": smart_agent,
+}
+
+def episodes_to_threshold(overrides, max_episodes, eval_every, thresholds, eval_games):
+    """
+    Trains one variant and returns {opponent: first evaluated episode count
+    where the win rate reached its threshold (None if never)} and the wall time.
+    """
+    reached = {name: None for name in thresholds}
+
+    def callback(finished, brain):
+        brain.eval()
+        for name, threshold in thresholds.items():
+            if reached[name] is None and win_rate(brain, OPPONENTS[name], eval_games) >= threshold:
+                reached[name] = finished
+        brain.train()
+        return all(v is not None for v in reached.values())
+
+    config = TrainConfig(episodes=max_episodes, eval_every=eval_every, **overrides)
+    start = time.perf_counter()
+    train_dqn(config, callback=callback)
+    return reached, time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DQN convergence benchmark")
+    parser.add_argument("--max-episodes", type=int, default=3000)
+    parser.add_argument("--eval-every", type=int, default=100)
+    parser.add_argument("--eval-games", type=int, default=100)
+    parser.add_argument("--random-threshold", type=float, default=0.9)
+    parser.add_argument("--smart-threshold", type=float, default=0.5)
+    args = parser.parse_args()
+
+    thresholds = {"random_agent": args.random_threshold, "smart_agent": args.smart_threshold}
+    results = []
+    for name, overrides in VARIANTS.items():
+        reached, elapsed = episodes_to_threshold(overrides, args.max_episodes, args.eval_every,
+                                                 thresholds, args.eval_games)
+        results.append((name, reached, elapsed))
+
+    print(f"\n{'variant':<12} | {'vs random':>10} | {'vs smart':>10} | {'time':>7}")
+    for name, reached, elapsed in results:
+        cells = [str(reached[o]) if reached[o] is not None else f">{args.max_episodes}" for o in thresholds]
+        print(f"{name:<12} | {cells[0]:>10} | {cells[1]:>10} | {elapsed:6.1f}s")
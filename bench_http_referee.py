@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+import httpx
+from connect4 import Connect4
+from http_referee import BotClients, play_match
+
+# Old blocking referee (requests.post per move, no session, one game at a
+# time) vs http_referee (async, pooled keep-alive clients, many games at once),
+# against stand-in bots served locally by bot_server.py. Then the forfeit
+# rules, with stand-ins that hang, crash or cheat.
+#
+#   python bench_http_referee.py --games 40 --concurrency 20 --delay 0.02
+
+def start_server(port, *flags):
+    proc = subprocess.Popen([sys.executable, "bot_server.py", "--port", str(port), *flags])
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs")
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError(f"stand-in bot on port {port} didn't start")
+
+def old_play_match(p1_url, p2_url):
+    """The referee as it was: one blocking request (and connection) per move."""
+    game = Connect4()
+    moves = []
+    for _ in range(42):
+        player = len(moves) % 2 + 1
+        url = p1_url if player == 1 else p2_url
+        try:
+            # (was requests.post: same thing, a new connection for every call)
+            response = httpx.post(f"{url}/move", json={"board": game.board, "you_are": player}, timeout=2.0)
+            col = response.json().get("column")
+        except Exception:
+            return 3 - player, moves
+        if not isinstance(col, int) or not game.is_valid_location(col):
+            return 3 - player, moves
+        moves.append(col)
+        game.drop_piece(col, player)
+        if game.last_move_wins():
+            return player, moves
+    return 0, moves
+
+async def run_games(pairs, concurrency):
+    clients = BotClients()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(p1, p2):
+        async with limit:
+            return await play_match(p1, p2, clients)
+
+    try:
+        return await asyncio.gather(*(one(p1, p2) for p1, p2 in pairs))
+    finally:
+        await clients.aclose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP referee benchmark with local stand-in bots")
+    parser.add_argument("--games", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.02, help="Stand-in bots' thinking time per move")
+    args = parser.parse_args()
+
+    delay = ["--delay", str(args.delay)]
+    servers = {
+        "smart": start_server(9101, "--agent", "smart", *delay),
+        "random": start_server(9102, "--agent", "random", *delay),
+        "hang": start_server(9103, "--misbehave", "hang"),
+        "illegal": start_server(9104, "--misbehave", "illegal"),
+        "error": start_server(9105, "--misbehave", "error"),
+    }
+    url = {name: f"http://127.0.0.1:{9101 + i}" for i, name in enumerate(servers)}
+    try:
+        pairs = [(url["smart"], url["random"])] * args.games
+
+        start = time.perf_counter()
+        old_moves = sum(len(old_play_match(p1, p2)[1]) for p1, p2 in pairs)
+        old_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = asyncio.run(run_games(pairs, args.concurrency))
+        new_time = time.perf_counter() - start
+        new_moves = sum(len(moves) for _, moves, _ in results)
+
+        print(f"{'referee':<28} | {'games/s':>8} | {'moves/s':>8}")
+        print(f"{'old (blocking, no session)':<28} | {args.games / old_time:8.1f} | {old_moves / old_time:8.0f}")
+        print(f"{f'async x{args.concurrency} (keep-alive)':<28} | {args.games / new_time:8.1f} | {new_moves / new_time:8.0f}")
+
+        print("\nforfeits:")
+        for bad in ("hang", "illegal", "error"):
+            start = time.perf_counter()
+            winner, moves, forfeit = asyncio.run(run_games([(url[bad], url["smart"])], 1))[0]
+            print(f"  {bad:<8} as player 1 -> winner {winner}, {forfeit}, {time.perf_counter() - start:.1f}s")
+    finally:
+        for proc in servers.values():
+            proc.terminate()
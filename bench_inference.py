@@ -0,0 +1,90 @@
+import argparse
+import random
+import subprocess
+import sys
+import time
+import numpy as np
+from connect4 import Connect4, get_valid_locations
+
+# Torch bot vs torch-free bot: how long until the first move, and how many
+# moves per second over the stdin/stdout protocol. uploaded_submission.py is
+# the old torch submission; submission.py runs the exported .npz in NumPy.
+# Then the same brain in-process, eager torch vs NumpyNet, one board and batched.
+#
+#   python numpy_net.py            (export connect4_brain.npz first)
+#   python bench_inference.py --moves 2000
+
+BOTS = {"torch (uploaded_submission.py)": "uploaded_submission.py",
+        "numpy (submission.py)": "submission.py"}
+
+def random_boards(count, seed=0):
+    """Board strings from random games (the same set for every bot)."""
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        game = Connect4()
+        player = 1
+        for _ in range(rng.randint(0, 30)):
+            game.drop_piece(rng.choice(get_valid_locations(game)), player)
+            if game.last_move_wins():
+                break
+            player = 3 - player
+        boards.append(game.to_string())
+    return boards
+
+def bench_bot(script, boards):
+    """(seconds until the first answer, moves/s after that) for one bot process."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-u", script], stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, text=True)
+    proc.stdin.write(boards[0] + "\n")
+    proc.stdin.flush()
+    proc.stdout.readline()
+    startup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for board in boards[1:]:
+        proc.stdin.write(board + "\n")
+        proc.stdin.flush()
+        proc.stdout.readline()
+    rate = (len(boards) - 1) / (time.perf_counter() - start)
+    proc.stdin.close()
+    proc.wait()
+    return startup, rate
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bot startup and inference benchmark")
+    parser.add_argument("--moves", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=256)
+    args = parser.parse_args()
+
+    boards = random_boards(args.moves)
+    print(f"{'bot':<32} | {'startup':>8} | {'moves/s':>9}")
+    for name, script in BOTS.items():
+        startup, rate = bench_bot(script, boards)
+        print(f"{name:<32} | {startup:7.2f}s | {rate:9.0f}")
+
+    import torch
+    from dqn_agent import load_brain
+    from numpy_net import NumpyNet
+    torch_net = load_brain("connect4_brain.pth")
+    numpy_net = NumpyNet("connect4_brain.npz")
+    flat = np.array([[int(c) for c in board] for board in boards], dtype=np.float32)
+    batch = flat[:args.batch]
+
+    def rate(forward, inputs, per_call):
+        start = time.perf_counter()
+        for x in inputs:
+            forward(x)
+        return len(inputs) * per_call / (time.perf_counter() - start)
+
+    with torch.no_grad():
+        results = {
+            "torch, one board": rate(torch_net, torch.from_numpy(flat), 1),
+            "numpy, one board": rate(numpy_net, flat, 1),
+            f"torch, batch of {len(batch)}": rate(torch_net, [torch.from_numpy(batch)] * 50, len(batch)),
+            f"numpy, batch of {len(batch)}": rate(numpy_net, [batch] * 50, len(batch)),
+        }
+    print(f"\n{'in-process (' + torch_net.arch + ')':<32} | {'boards/s':>9}")
+    for name, boards_per_sec in results.items():
+        print(f"{name:<32} | {boards_per_sec:9.0f}")
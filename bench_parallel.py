@@ -0,0 +1,54 @@
+import argparse
+import os
+import random
+import time
+from connect4 import Connect4, ParallelSearcher, get_valid_locations, negamax_search
+
+# Measures how the parallel root search scales with the number of worker
+# processes, at a fixed depth, over the same set of positions.
+#
+#   python bench_parallel.py --depth 9 --max-workers 8
+
+def test_positions(count, plies, seed=0):
+    """Random positions 'plies' moves into a game where nobody has won yet."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = Connect4()
+        player = 1
+        while len(game.history) < plies:
+            col = rng.choice(get_valid_locations(game))
+            game.drop_piece(col, player)
+            if game.last_move_wins():
+                game.undo_move()
+                continue
+            player = 3 - player
+        positions.append((game, player))
+    return positions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel root search scaling benchmark")
+    parser.add_argument("--depth", type=int, default=9)
+    parser.add_argument("--positions", type=int, default=5)
+    parser.add_argument("--plies", type=int, default=6, help="Moves already played in each test position")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    positions = test_positions(args.positions, args.plies)
+
+    start = time.perf_counter()
+    nodes = 0
+    for game, player in positions:
+        nodes += negamax_search(game, player, args.depth)[2]["nodes"]
+    serial_time = time.perf_counter() - start
+    print(f"serial   | {serial_time:7.2f}s | {nodes / serial_time:9.0f} nodes/s")
+
+    for workers in range(1, args.max_workers + 1):
+        with ParallelSearcher(workers) as searcher:
+            start = time.perf_counter()
+            nodes = 0
+            for game, player in positions:
+                nodes += searcher.search(game, player, args.depth)[2]["nodes"]
+            elapsed = time.perf_counter() - start
+        print(f"{workers:2d} worker | {elapsed:7.2f}s | {nodes / elapsed:9.0f} nodes/s"
+              f" | speedup {serial_time / elapsed:.2f}x")
@@ -0,0 +1,75 @@
+import argparse
+import time
+import numpy as np
+import ratings
+
+# Re-rating a whole match history: ratings.replay (waves of games updated
+# together with numpy) vs applying ratings.update one game at a time, and the
+# old main.calculate_elo loop for reference. The history is synthetic: bots
+# with hidden strengths, logistic win chances, a few draws. A replay of the
+# first games is checked against the one-by-one result (should be identical).
+#
+#   python bench_ratings.py --games 1000000 --bots 200
+
+def old_elo_loop(a_idx, b_idx, scores, n_bots):
+    """What main.py did, game after game (integer Elo, K=32, draws ignored)."""
+    elo = [1200] * n_bots
+    for a, b, s in zip(a_idx.tolist(), b_idx.tolist(), scores.tolist()):
+        if s == 0.5:
+            continue
+        winner, loser = (a, b) if s == 1 else (b, a)
+        expected = 1 / (1 + 10 ** ((elo[loser] - elo[winner]) / 400))
+        change = round(32 * (1 - expected))
+        elo[winner] += change
+        elo[loser] -= change
+    return elo
+
+def one_by_one(system, a_idx, b_idx, scores, n_bots):
+    state = [ratings.new_rating(system)] * n_bots
+    for a, b, s in zip(a_idx.tolist(), b_idx.tolist(), scores.tolist()):
+        state[a], state[b] = ratings.update(system, state[a], state[b], s)
+    return np.array(state).T
+
+def make_history(games, bots, seed=0):
+    rng = np.random.default_rng(seed)
+    strength = rng.normal(1200, 200, bots)
+    a_idx = rng.integers(0, bots, games)
+    b_idx = (a_idx + rng.integers(1, bots, games)) % bots
+    p_a = 1 / (1 + 10 ** ((strength[b_idx] - strength[a_idx]) / 400))
+    draw = rng.random(games) < 0.03
+    scores = np.where(draw, 0.5, (rng.random(games) < p_a).astype(float))
+    return strength, a_idx, b_idx, scores
+
+def rank_correlation(x, y):
+    rx, ry = np.argsort(np.argsort(x)), np.argsort(np.argsort(y))
+    return np.corrcoef(rx, ry)[0, 1]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch replay vs one-game-at-a-time rating updates")
+    parser.add_argument("--games", type=int, default=1_000_000)
+    parser.add_argument("--bots", type=int, default=200)
+    parser.add_argument("--check", type=int, default=20_000, help="Games replayed one by one (timed and compared)")
+    args = parser.parse_args()
+
+    strength, a_idx, b_idx, scores = make_history(args.games, args.bots)
+    waves = ratings.schedule_waves(a_idx, b_idx, args.bots)
+    print(f"{args.games} games, {args.bots} bots, {waves.max() + 1} waves")
+
+    start = time.perf_counter()
+    old_elo_loop(a_idx, b_idx, scores, args.bots)
+    print(f"{'old calculate_elo loop':<24} | {time.perf_counter() - start:6.2f}s")
+
+    n = args.check
+    print(f"{'system':<24} | {'replay':>7} | {f'one by one (x{args.games // n} from {n})':>26} | {'max diff':>8} | rank corr.")
+    for system in ratings.SYSTEMS:
+        start = time.perf_counter()
+        rating, deviation, _ = ratings.replay(system, a_idx, b_idx, scores, args.bots)
+        batch = time.perf_counter() - start
+
+        start = time.perf_counter()
+        slow = one_by_one(system, a_idx[:n], b_idx[:n], scores[:n], args.bots)
+        slow_time = (time.perf_counter() - start) * args.games / n
+        fast = np.array(ratings.replay(system, a_idx[:n], b_idx[:n], scores[:n], args.bots))
+        diff = np.abs(fast - slow).max()
+
+        print(f"{system:<24} | {batch:6.2f}s | {slow_time:25.1f}s | {diff:8.1e} | {rank_correlation(rating, strength):.3f}")
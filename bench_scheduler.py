@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import time
+from bench_http_referee import start_server
+from http_referee import BotClients, play_match
+import ratings
+from scheduler import POLICIES, Scheduler
+
+# The scheduler against a league of local stand-in bots (bot_server.py), one
+# of which hangs on every move. For each policy, with and without
+# backpressure: games per second over a fixed time, and the leaderboard at the end.
+# Ratings are kept in memory here (plain Elo from ratings.py), not in league.db.
+#
+#   python bench_scheduler.py --seconds 20 --concurrency 16
+
+LEAGUE = [
+    ("random-a", "--agent", "random"),
+    ("random-b", "--agent", "random"),
+    ("smart-a", "--agent", "smart"),
+    ("smart-b", "--agent", "smart"),
+    ("neural", "--agent", "neural"),
+    ("hang", "--misbehave", "hang"),
+]
+
+class MemoryLeague:
+    def __init__(self, urls):
+        self.bots = {name: [name, url, name, 1200, 0, 0] for name, url in urls.items()}
+
+    def load_bots(self):
+        return [tuple(b) for b in self.bots.values()]
+
+    def record(self, p1, p2, winner, moves):
+        if winner == 0:
+            return
+        won, lost = (p1, p2) if winner == 1 else (p2, p1)
+        (new_won, _, _), (new_lost, _, _) = ratings.update("elo", (self.bots[won[0]][3], 0, 0),
+                                                           (self.bots[lost[0]][3], 0, 0), 1)
+        self.bots[won[0]][3] = round(new_won)
+        self.bots[won[0]][4] += 1
+        self.bots[lost[0]][3] = round(new_lost)
+        self.bots[lost[0]][5] += 1
+
+async def run(urls, policy, concurrency, backpressure, seconds):
+    league = MemoryLeague(urls)
+    clients = BotClients()
+    scheduler = Scheduler(league.load_bots, lambda a, b: play_match(a, b, clients), league.record)
+    scheduler.start(policy, concurrency, backpressure=backpressure)
+    await asyncio.sleep(seconds)
+    status = scheduler.status()
+    await scheduler.stop(wait=False)
+    await clients.aclose()
+    return status, league.load_bots()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Background scheduler throughput with a hanging bot")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--delay", type=float, default=0.02, help="Stand-in bots' thinking time per move")
+    args = parser.parse_args()
+
+    servers, urls = [], {}
+    try:
+        for i, (name, *flags) in enumerate(LEAGUE):
+            port = 9111 + i
+            servers.append(start_server(port, *flags, "--delay", str(args.delay)))
+            urls[name] = f"http://127.0.0.1:{port}"
+
+        print(f"{'policy':<12} | {'backpressure':>12} | {'games/s':>7} | {'hang games':>10} | leaderboard")
+        for policy in POLICIES:
+            for backpressure in (False, True):
+                status, bots = asyncio.run(run(urls, policy, args.concurrency, backpressure, args.seconds))
+                hang = next(b for b in bots if b[0] == "hang")
+                table = ", ".join(f"{b[0]} {b[3]}" for b in sorted(bots, key=lambda b: -b[3]))
+                print(f"{policy:<12} | {'on' if backpressure else 'off':>12} | {status['played'] / args.seconds:7.1f} | "
+                      f"{hang[4] + hang[5]:>10} | {table}")
+    finally:
+        for proc in servers:
+            proc.terminate()
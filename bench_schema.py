@@ -0,0 +1,103 @@
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+import schema
+import storage
+
+# The old league.db layout (no indexes, moves as "[3, 3, 4, ...]") vs the
+# same history after schema.migrate(): file size, how long the migration
+# takes, and the queries the site runs all the time.
+#
+#   python bench_schema.py --matches 1000000 --bots 200
+
+OLD_LEAGUE = """
+    CREATE TABLE bots (id TEXT PRIMARY KEY, name TEXT, url TEXT, elo INTEGER DEFAULT 1200,
+                       wins INTEGER DEFAULT 0, losses INTEGER DEFAULT 0);
+    CREATE TABLE matches (id TEXT PRIMARY KEY, p1_id TEXT, p2_id TEXT, winner_id TEXT, moves TEXT,
+                          timestamp DATETIME DEFAULT CURRENT_TIMESTAMP);
+"""
+
+QUERIES = {
+    "leaderboard": ("SELECT id, name, url, elo FROM bots ORDER BY elo DESC LIMIT 50", ()),
+    "recent matches": ("SELECT id, winner_id, moves FROM matches ORDER BY timestamp DESC LIMIT 5", ()),
+}
+
+def make_old_db(path, n_bots, n_matches):
+    conn = sqlite3.connect(path)
+    conn.executescript(OLD_LEAGUE)
+    bots = [str(uuid.uuid4()) for _ in range(n_bots)]
+    conn.executemany("INSERT INTO bots (id, name, elo) VALUES (?, ?, ?)",
+                     [(b, f"bot {i}", random.randint(800, 1800)) for i, b in enumerate(bots)])
+    start = datetime(2026, 1, 1)
+    def rows():
+        for i in range(n_matches):
+            p1, p2 = random.sample(bots, 2)
+            moves = [random.randrange(7) for _ in range(random.randint(7, 42))]
+            yield (str(uuid.uuid4()), p1, p2, random.choice([p1, p2, None]), str(moves),
+                   (start + timedelta(seconds=i)).strftime("%Y-%m-%d %H:%M:%S"))
+    conn.executemany("INSERT INTO matches (id, p1_id, p2_id, winner_id, moves, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+                     rows())
+    conn.commit()
+    conn.close()
+    return bots
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+def time_queries(conn, history, repeat):
+    times = {name: timed(lambda: conn.execute(sql, params).fetchall(), repeat)
+             for name, (sql, params) in QUERIES.items()}
+    times["one bot's history"] = timed(history, repeat)
+    return times
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Old league.db layout vs the migrated schema")
+    parser.add_argument("--matches", type=int, default=1_000_000)
+    parser.add_argument("--bots", type=int, default=200)
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="bench-schema-", dir=".")
+    path = os.path.join(folder, "league.db")
+    try:
+        start = time.perf_counter()
+        bots = make_old_db(path, args.bots, args.matches)
+        print(f"{args.matches} matches, {args.bots} bots (made in {time.perf_counter() - start:.0f}s)")
+        bot = bots[0]
+
+        conn = sqlite3.connect(path)
+        old_size = os.path.getsize(path)
+        old_moves = conn.execute("SELECT SUM(LENGTH(moves)) FROM matches").fetchone()[0]
+        old = time_queries(conn, lambda: conn.execute("SELECT * FROM matches WHERE p1_id = ? OR p2_id = ? "
+                                                      "ORDER BY timestamp DESC LIMIT 20", (bot, bot)).fetchall(),
+                           repeat=3)
+        conn.close()
+
+        conn = storage.connect(path)
+        start = time.perf_counter()
+        schema.migrate(conn)
+        migrate_time = time.perf_counter() - start
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        new_size = os.path.getsize(path)
+        new_moves = conn.execute("SELECT SUM(LENGTH(moves)) FROM matches").fetchone()[0]
+        new = time_queries(conn, lambda: schema.bot_history(conn, bot), repeat=200)
+        conn.close()
+
+        print(f"migration: {migrate_time:.1f}s")
+        print(f"moves: {old_moves / 2**20:.0f} MB -> {new_moves / 2**20:.0f} MB, "
+              f"file: {old_size / 2**20:.0f} MB -> {new_size / 2**20:.0f} MB (now with four indexes)")
+        print(f"{'query':<18} | {'old':>10} | {'new':>10}")
+        for name in old:
+            print(f"{name:<18} | {old[name] * 1000:8.2f}ms | {new[name] * 1000:8.3f}ms")
+    finally:
+        for name in os.listdir(folder):
+            os.remove(os.path.join(folder, name))
+        os.rmdir(folder)
@@ -0,0 +1,113 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import ratings
+import schema
+import storage
+
+# Match results per second with several processes (think Celery workers and
+# the web app) each with several threads writing at once. Every result is
+# what main.record_match writes: an INSERT into matches plus the two bots'
+# rating updates.
+#
+#   * old    - sqlite3.connect per result, default journal, commit each (as before)
+#   * wal    - storage.pool connections, WAL + pragmas, commit each
+#   * batch  - storage.writer: WAL, one commit for all the results queued
+#              within flush_interval; each thread waits for its commit
+#   * queued - the same, threads don't wait (how the scheduler records games)
+#
+#   python bench_storage.py --processes 4 --threads 8 --results 200
+
+BOTS = [f"bot-{i}" for i in range(50)]
+
+def make_db(path, wal):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+    schema.migrate(conn)
+    conn.executemany("INSERT INTO bots (id, name) VALUES (?, ?)", [(b, b) for b in BOTS])
+    conn.close()
+
+def save_match(conn, system, p1_id, p2_id, winner_id, moves):
+    conn.execute("INSERT INTO matches (id, p1_id, p2_id, winner_id, moves) VALUES (?, ?, ?, ?, ?)",
+                 (str(uuid.uuid4()), p1_id, p2_id, winner_id, schema.encode_moves(moves)))
+    return ratings.record_game(conn, system, p1_id, p2_id, winner_id)
+
+def random_result():
+    p1, p2 = random.sample(BOTS, 2)
+    return p1, p2, random.choice([p1, p2, None]), [random.randrange(7) for _ in range(20)]
+
+def writer_thread(mode, path, system, results, errors):
+    futures = []
+    for _ in range(results):
+        result = random_result()
+        try:
+            if mode == "old":
+                with sqlite3.connect(path) as conn:
+                    save_match(conn, system, *result)
+            elif mode == "wal":
+                with storage.pool(path).connection() as conn:
+                    save_match(conn, system, *result)
+            elif mode == "batch":
+                storage.writer(path).submit(save_match, system, *result).result()
+            else: # "queued": don't wait for each commit (like the scheduler / async app)
+                futures.append(storage.writer(path).submit(save_match, system, *result))
+        except sqlite3.OperationalError as e: # "database is locked"
+            errors.append(str(e))
+    for future in futures:
+        if future.exception():
+            errors.append(str(future.exception()))
+
+def writer_process(mode, path, system, threads, results, queue):
+    errors = []
+    workers = [threading.Thread(target=writer_thread, args=(mode, path, system, results, errors))
+               for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    storage.close_all()
+    queue.put(errors)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent match-result writes: old vs WAL vs batched")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--results", type=int, default=200, help="Results per thread")
+    parser.add_argument("--system", default="elo", choices=ratings.SYSTEMS)
+    parser.add_argument("--flush-interval", type=float, default=storage.FLUSH_INTERVAL)
+    args = parser.parse_args()
+    storage.FLUSH_INTERVAL = args.flush_interval # (inherited by the forked writer processes)
+
+    folder = tempfile.mkdtemp(prefix="bench-storage-", dir=".")
+    total = args.processes * args.threads * args.results
+    print(f"{args.processes} processes x {args.threads} threads x {args.results} results, {args.system} ratings, "
+          f"flush interval {args.flush_interval}s")
+    print(f"{'mode':<6} | {'results/s':>9} | {'saved':>7} | locked errors")
+    try:
+        for mode in ("old", "wal", "batch", "queued"):
+            path = os.path.join(folder, f"{mode}.db")
+            make_db(path, wal=mode != "old")
+            queue = multiprocessing.Queue()
+            procs = [multiprocessing.Process(target=writer_process,
+                                             args=(mode, path, args.system, args.threads, args.results, queue))
+                     for _ in range(args.processes)]
+            start = time.perf_counter()
+            for p in procs:
+                p.start()
+            errors = [e for _ in procs for e in queue.get()]
+            for p in procs:
+                p.join()
+            elapsed = time.perf_counter() - start
+            with sqlite3.connect(path) as conn:
+                saved = conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+            print(f"{mode:<6} | {saved / elapsed:9.0f} | {saved:>7} | {len(errors)} of {total}")
+    finally:
+        for name in os.listdir(folder):
+            os.remove(os.path.join(folder, name))
+        os.rmdir(folder)
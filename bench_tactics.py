@@ -0,0 +1,90 @@
+import argparse
+import contextlib
+import io
+import random
+import time
+import numpy as np
+from bench_inference import random_boards
+from connect4 import Connect4, random_agent, smart_agent
+from neural_agent import NeuralAgent, legal_mask, perspective
+from numpy_net import NumpyNet
+
+# What does the one-move win/block check buy a neural bot, and what does it cost?
+# The same brain plays with and without it (both with full columns masked),
+# against a few opponents and from both sides. "raw argmax" counts how many
+# of the net's moves would have been illegal without the mask (a forfeit
+# under the referee rules).
+#
+#   python bench_tactics.py --games 200
+
+def play(agent_1, agent_2):
+    """One game; returns 1 or 2 for the winner, 0 for a draw."""
+    game = Connect4()
+    agents = {1: agent_1, 2: agent_2}
+    player = 1
+    while not game.is_full():
+        game.drop_piece(agents[player](game, player), player)
+        if game.last_move_wins():
+            return player
+        player = 3 - player
+    return 0
+
+def score(agent, opponent, games):
+    """(wins, draws, losses) for 'agent', half the games as player 1 and half as player 2."""
+    results = [0, 0, 0]
+    for i in range(games):
+        if i % 2 == 0:
+            winner = play(agent, opponent)
+            results[0 if winner == 1 else 1 if winner == 0 else 2] += 1
+        else:
+            winner = play(opponent, agent)
+            results[0 if winner == 2 else 1 if winner == 0 else 2] += 1
+    return results
+
+class IllegalCounter:
+    """Wraps an agent and counts how often the net's raw argmax picked a full column."""
+    def __init__(self, agent):
+        self.agent = agent
+        self.moves = self.illegal = 0
+
+    def __call__(self, game, player):
+        board = np.array(game.board, dtype=np.int8).reshape(-1)
+        raw = int(np.argmax(self.agent.q_values(perspective(board, player))))
+        self.moves += 1
+        self.illegal += not legal_mask(board)[raw]
+        return self.agent(game, player)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Value and cost of the neural agent's tactical check")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--brain", default="connect4_brain.npz")
+    args = parser.parse_args()
+    random.seed(0)
+
+    net = NumpyNet(args.brain)
+    plain = IllegalCounter(NeuralAgent(net, tactics=False))
+    tactical = NeuralAgent(net, tactics=True)
+    opponents = {
+        "random_agent": lambda game, player: random_agent(game),
+        "smart_agent": smart_agent,
+        "net, no tactics": NeuralAgent(net, tactics=False),
+    }
+
+    print(f"{'opponent':<16} | {'no tactics W/D/L':>17} | {'tactics W/D/L':>15}")
+    with contextlib.redirect_stdout(io.StringIO()): # smart_agent likes to print
+        rows = [(name, score(plain, opponent, args.games), score(tactical, opponent, args.games))
+                for name, opponent in opponents.items()]
+    for name, without, with_tactics in rows:
+        print(f"{name:<16} | {'/'.join(map(str, without)):>17} | {'/'.join(map(str, with_tactics)):>15}")
+    print(f"\nraw argmax picked a full column in {plain.illegal} of {plain.moves} moves"
+          f" ({100 * plain.illegal / max(plain.moves, 1):.1f}%)")
+    print(f"tactical check decided {tactical.counts['win/block']} of"
+          f" {sum(tactical.counts.values())} moves")
+
+    # Per-move cost, on the stdin protocol path (string in, column out)
+    boards = random_boards(2000)
+    for name, agent in (("no tactics", NeuralAgent(net, False)), ("tactics", NeuralAgent(net, True))):
+        start = time.perf_counter()
+        for board in boards:
+            agent.move_from_string(board)
+        print(f"{name:<10}: {1e6 * (time.perf_counter() - start) / len(boards):6.1f} us/move")
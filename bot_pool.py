@@ -0,0 +1,249 @@
+import contextlib
+import os
+import selectors
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+
+# --- WARM BOT PROCESSES ---
+# Starting a bot is the slow part of a match: a fresh interpreter, imports
+# (torch for some bots!) and loading a model, for a game that then takes
+# milliseconds. The pool keeps bot processes alive between matches:
+#   * borrow() hands out an idle process for that bot, or starts one;
+#   * between games the bot gets a "RESET" line (bots that keep state, like
+#     mcts.py, forget their tree; others ignore it, or answer it and the
+#     answer is read and thrown away - see BotProcess.reset);
+#   * a process is checked before reuse and thrown away if it died, misbehaved
+#     or has played max_games games (so leaks can't build up);
+#   * when the pool is full, the least recently used idle process is closed.
+
+BOTS_DIR = "bots"
+RESET_LINE = "RESET"
+RESET_TIMEOUT = 1.0 # Seconds to wait for a reply to RESET (only the first time, for bots that don't send one)
+STDERR_LIMIT = 8192 # Bytes of each bot's stderr we keep
+PING_BOARD = "0" * 42 # Any bot must answer the empty board with a column
+
+class BotProcess:
+    """
+    One running bot ('python -u <path>', run from the bot's folder).
+    stdout is read straight from the pipe with select(), so readline() can
+    give up after 'timeout' seconds instead of hanging on a stuck bot.
+    """
+    def __init__(self, bot_id, path, stderr_limit=STDERR_LIMIT):
+        self.bot_id = bot_id
+        self.path = os.path.abspath(path)
+        self.games = 0
+        self.answers = 0 # Lines read so far (0 = still starting up)
+        self.answers_reset = None # Does it reply to RESET? Unknown until the first one
+        self.last_used = time.monotonic()
+        self.proc = subprocess.Popen(
+            ["python", "-u", self.path],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            bufsize=0, cwd=os.path.dirname(self.path)
+        )
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.proc.stdout, selectors.EVENT_READ)
+        self.buffer = b""
+
+        # stderr is read all the time by a background thread, so a chatty bot
+        # never blocks on a full pipe; only the last 'stderr_limit' bytes are kept
+        self.stderr_limit = stderr_limit
+        self.stderr_tail = bytearray()
+        self.stderr_lock = threading.Lock()
+        threading.Thread(target=self._read_stderr, daemon=True).start()
+
+    def _read_stderr(self):
+        for chunk in iter(lambda: os.read(self.proc.stderr.fileno(), 4096), b""):
+            with self.stderr_lock:
+                self.stderr_tail += chunk
+                del self.stderr_tail[:-self.stderr_limit]
+        self.proc.stderr.close()
+
+    def stderr_text(self):
+        """The last few KB the bot wrote to stderr (tracebacks, debug prints)."""
+        with self.stderr_lock:
+            return self.stderr_tail.decode(errors="replace")
+
+    def alive(self):
+        return self.proc.poll() is None
+
+    def send(self, line):
+        self.proc.stdin.write(line.encode() + b"\n")
+
+    def readline(self, timeout=None):
+        """Next line of output ("" once the bot has exited). Raises TimeoutError."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b"\n" not in self.buffer:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and (remaining <= 0 or not self.selector.select(remaining)):
+                raise TimeoutError(f"bot {self.bot_id} did not answer in {timeout}s")
+            chunk = os.read(self.proc.stdout.fileno(), 4096)
+            if not chunk: # End of file: the bot is gone
+                line, self.buffer = self.buffer, b""
+                return line.decode(errors="replace")
+            self.buffer += chunk
+        line, _, self.buffer = self.buffer.partition(b"\n")
+        self.answers += 1
+        return line.decode(errors="replace") + "\n"
+
+    def drain(self, grace=0.0):
+        """Throws away any output that arrives within 'grace' seconds (leftovers from the last game)."""
+        self.buffer = b""
+        while self.selector.select(grace):
+            if not os.read(self.proc.stdout.fileno(), 4096):
+                break
+
+    def ask(self, board_str, timeout=None):
+        """Sends a board and returns the raw answer line ("" if the bot is gone)."""
+        self.send(board_str)
+        return self.readline(timeout)
+
+    def reset(self, timeout=RESET_TIMEOUT):
+        """
+        Bots that answer every line (random_bot.py) reply to RESET too, maybe
+        late. The first RESET waits up to 'timeout' to learn whether this bot
+        replies; after that we read exactly its reply, so a slow one can't
+        turn up as the next game's first move. Raises TimeoutError if a bot
+        that always replied stops.
+        """
+        self.drain()
+        self.send(RESET_LINE)
+        if self.answers_reset is False:
+            return
+        try:
+            self.readline(timeout)
+            self.answers_reset = True
+        except TimeoutError:
+            if self.answers_reset:
+                raise
+            self.answers_reset = False
+
+    def ping(self, timeout=2.0):
+        """Health check: does it still answer the empty board with a real column, quickly?"""
+        try:
+            self.drain()
+            return self.ask(PING_BOARD, timeout).strip() in {str(col) for col in range(7)}
+        except (OSError, TimeoutError):
+            return False
+
+    def close(self):
+        self.selector.close()
+        if self.alive():
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        self.proc.stdin.close()
+        self.proc.stdout.close() # stderr is closed by the thread reading it, at end of file
+
+class BotPool:
+    """
+    Warm processes per bot id.
+    max_processes: idle + busy processes before idle ones get evicted (LRU)
+    max_games: games a process plays before it's replaced with a fresh one
+    ping_after: seconds idle after which a process is pinged before reuse
+    """
+    def __init__(self, bots_dir=BOTS_DIR, max_processes=16, max_games=200, ping_after=60.0):
+        self.bots_dir = bots_dir
+        self.max_processes = max_processes
+        self.max_games = max_games
+        self.ping_after = ping_after
+        self.idle = OrderedDict() # (bot_id, serial) -> BotProcess, least recently used first
+        self.busy = 0
+        self.serial = 0
+        self.lock = threading.Lock()
+        self.counts = {"started": 0, "reused": 0, "recycled": 0, "evicted": 0, "unhealthy": 0}
+
+    def bot_path(self, bot_id):
+        return os.path.abspath(os.path.join(self.bots_dir, f"{bot_id}.py"))
+
+    def acquire(self, bot_id):
+        """A ready-to-play process for 'bot_id' (call release() when the game is over)."""
+        while True:
+            with self.lock:
+                key = next((k for k in self.idle if k[0] == bot_id), None)
+                worker = self.idle.pop(key) if key is not None else None
+                self.busy += 1
+            if worker is None:
+                break
+            stale = time.monotonic() - worker.last_used > self.ping_after
+            if worker.alive() and (not stale or worker.ping()):
+                worker.drain() # Anything it said since the reset isn't a move
+                with self.lock:
+                    self.counts["reused"] += 1
+                return worker
+            # Died or stopped answering while it sat idle: try the next one
+            worker.close()
+            with self.lock:
+                self.counts["unhealthy"] += 1
+                self.busy -= 1
+
+        with self.lock:
+            self._evict(room_for=0) # 'busy' already counts the one we're about to start
+        try:
+            worker = BotProcess(bot_id, self.bot_path(bot_id))
+        except BaseException:
+            with self.lock:
+                self.busy -= 1
+            raise
+        with self.lock:
+            self.counts["started"] += 1
+        return worker
+
+    def release(self, worker, healthy=True):
+        """
+        Gives a process back after a game. healthy=False (it crashed, timed
+        out or sent garbage) throws it away instead of keeping it.
+        """
+        worker.games += 1
+        worker.last_used = time.monotonic()
+        keep = healthy and worker.alive() and worker.games < self.max_games
+        if keep:
+            try:
+                worker.reset()
+            except OSError:
+                keep = False
+        if not keep:
+            worker.close()
+        with self.lock:
+            if not keep:
+                self.counts["recycled" if healthy else "unhealthy"] += 1
+            self.busy -= 1
+            if keep:
+                self.serial += 1
+                self.idle[(worker.bot_id, self.serial)] = worker
+                self._evict(room_for=0)
+
+    def _evict(self, room_for):
+        # Close least recently used idle processes until there's room (lock held)
+        while self.idle and len(self.idle) + self.busy + room_for > self.max_processes:
+            _, worker = self.idle.popitem(last=False)
+            self.counts["evicted"] += 1
+            worker.close()
+
+    @contextlib.contextmanager
+    def borrow(self, bot_id):
+        """
+        with pool.borrow(bot_id) as bot: ... - released automatically; an
+        exception inside the block counts as unhealthy. Set bot.healthy = False
+        to drop it without raising.
+        """
+        worker = self.acquire(bot_id)
+        worker.healthy = True
+        try:
+            yield worker
+        except BaseException:
+            worker.healthy = False
+            raise
+        finally:
+            self.release(worker, worker.healthy)
+
+    def close(self):
+        with self.lock:
+            workers = list(self.idle.values())
+            self.idle.clear()
+        for worker in workers:
+            worker.close()
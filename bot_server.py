@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+from fastapi import FastAPI, Request
+from connect4 import Connect4, random_agent, smart_agent
+
+# --- A BOT AS A WEB SERVICE ---
+# What the HTTP league expects a bot to be: POST /move with
+# {"board": [[...6 rows of 7...]], "you_are": 1 or 2}, answer {"column": c}.
+# Handy as a starting point for your own bot, and as a local stand-in when
+# testing the referee (bench_http_referee.py starts a few of these).
+#
+#   python bot_server.py --agent smart --port 9001 --delay 0.02
+
+def make_agent(name):
+    if name == "random":
+        return lambda game, player: random_agent(game)
+    if name == "smart":
+        return smart_agent
+    if name == "neural":
+        from neural_agent import NeuralAgent
+        from numpy_net import NumpyNet
+        return NeuralAgent(NumpyNet("connect4_brain.npz"))
+    raise ValueError(f"Unknown agent {name!r}")
+
+def create_app(agent="smart", delay=0.0, misbehave=None):
+    """
+    delay: seconds to "think" before answering (like a remote bot's latency).
+    misbehave: None, "hang" (never answers), "illegal" (always column 9) or
+    "error" (HTTP 500) - for checking the referee's forfeit rules.
+    """
+    app = FastAPI()
+    play = make_agent(agent)
+
+    @app.post("/move")
+    async def move(request: Request):
+        payload = await request.json()
+        if misbehave == "hang":
+            await asyncio.sleep(3600)
+        if misbehave == "error":
+            raise RuntimeError("bot exploded")
+        if misbehave == "illegal":
+            return {"column": 9}
+        if delay:
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+        game = Connect4.from_board(payload["board"])
+        with contextlib.redirect_stdout(io.StringIO()): # smart_agent likes to print
+            col = play(game, payload["you_are"])
+        return {"column": int(col)}
+
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Serve an agent over the HTTP bot protocol")
+    parser.add_argument("--agent", default="smart", choices=["random", "smart", "neural"])
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--misbehave", choices=["hang", "illegal", "error"], default=None)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.agent, args.delay, args.misbehave), host="127.0.0.1", port=args.port,
+                log_level="warning")
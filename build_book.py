@@ -0,0 +1,63 @@
+import argparse
+import time
+from connect4 import Connect4, TranspositionTable, get_valid_locations, negamax_search
+from opening_book import canonical_key, side_to_move, write_book
+
+# Builds the opening book offline: every position reachable in the first
+# --ply moves gets searched to --depth, and the best move is saved.
+#
+#   python build_book.py --ply 4 --depth 8 --out opening_book.bin
+#
+# negamax_agent and iterative_deepening_agent read opening_book.bin (next to
+# connect4.py) by default. A book built with the command above is committed;
+# rebuild it whenever the search or the evaluation changes.
+
+def opening_positions(max_ply):
+    """
+    Yields (canonical key, move list) for every position with at most 'max_ply'
+    pieces where nobody has won yet. Mirror images are only yielded once.
+    """
+    seen = set()
+    frontier = [[]]
+    for ply in range(max_ply + 1):
+        next_frontier = []
+        for moves in frontier:
+            game = Connect4()
+            for col in moves:
+                game.drop_piece(col, side_to_move(game))
+            key, _ = canonical_key(game)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield key, moves
+            if ply < max_ply:
+                for col in get_valid_locations(game):
+                    if not game.winning_move(col, side_to_move(game)):
+                        next_frontier.append(moves + [col])
+        frontier = next_frontier
+
+def build_book(max_ply, depth):
+    entries = {}
+    table = TranspositionTable(2**20)
+    start = time.perf_counter()
+    for key, moves in opening_positions(max_ply):
+        game = Connect4()
+        for col in moves:
+            game.drop_piece(col, side_to_move(game))
+        col, score, stats = negamax_search(game, side_to_move(game), depth, table)
+        _, mirrored = canonical_key(game)
+        entries[key] = game.cols - 1 - col if mirrored else col
+        if len(entries) % 100 == 0:
+            print(f"{len(entries)} positions | {time.perf_counter() - start:.1f}s")
+    return entries
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a Connect4 opening book")
+    parser.add_argument("--ply", type=int, default=4, help="Book covers positions with up to this many pieces")
+    parser.add_argument("--depth", type=int, default=8, help="Search depth for each position")
+    parser.add_argument("--out", default="opening_book.bin")
+    args = parser.parse_args()
+
+    entries = build_book(args.ply, args.depth)
+    write_book(args.out, entries)
+    print(f"Saved {len(entries)} positions to '{args.out}'")
@@ -1,4 +1,8 @@
+import multiprocessing
+import os
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 def evaluate_window(window, piece):
     score = 0
@@ -25,46 +29,47 @@ def evaluate_window(window, piece):
     return score
 
 def score_position(game, piece):
-    score = 0
-    
+    """
+    Sums evaluate_window over all 69 windows plus the center bonus, but works
+    on the bitboards: shifting a bitboard by 0, 1, 2 and 3 steps lines up the
+    4 cells of every window in one direction at the window's first cell, so
+    AND/OR-ing the shifted copies classifies all windows of that direction at
+    once, and a popcount counts them. Same weights as evaluate_window.
+    """
+    mine = game.bitboards[piece]
+    theirs = game.bitboards[3 - piece]
+    empty = BOARD_MASK & ~(mine | theirs)
+
     # A. CENTER COLUMN PREFERENCE
     # We like pieces in the center column (index 3) because it enables more wins
-    center_array = [row[3] for row in game.board]
-    center_count = center_array.count(piece)
-    score += center_count * 3
+    score = popcount(mine & CENTER_MASK) * 3
 
     # B. SCAN BOARD (Horizontal, Vertical, Diagonal)
-    # This is similar to check_winner, but we sum up scores instead of returning True/False
-    
-    # Horizontal
-    for r in range(game.rows):
-        for c in range(game.cols - 3):
-            window = [game.board[r][c+i] for i in range(4)]
-            score += evaluate_window(window, piece)
-
-    # Vertical
-    for r in range(game.rows - 3):
-        for c in range(game.cols):
-            window = [game.board[r+i][c] for i in range(4)]
-            score += evaluate_window(window, piece)
-
-    # Positive Diagonal
-    for r in range(3, game.rows):
-        for c in range(game.cols - 3):
-            window = [game.board[r-i][c+i] for i in range(4)]
-            score += evaluate_window(window, piece)
-            
-    # Negative Diagonal
-    for r in range(game.rows - 3):
-        for c in range(game.cols - 3):
-            window = [game.board[r+i][c+i] for i in range(4)]
-            score += evaluate_window(window, piece)
+    for shift, starts in WINDOW_STARTS:
+        m1, m2, m3 = mine >> shift, mine >> (2 * shift), mine >> (3 * shift)
+        t1, t2, t3 = theirs >> shift, theirs >> (2 * shift), theirs >> (3 * shift)
+        e1, e2, e3 = empty >> shift, empty >> (2 * shift), empty >> (3 * shift)
+
+        # First and second half of each window: both ours / both empty / one of each
+        m01, m23 = mine & m1, m2 & m3
+        e01, e23 = empty & e1, e2 & e3
+        me01, me23 = (mine & e1) | (empty & m1), (m2 & e3) | (e2 & m3)
+        t01, t23 = theirs & t1, t2 & t3
+        te01, te23 = (theirs & e1) | (empty & t1), (t2 & e3) | (e2 & t3)
+
+        four = m01 & m23 & starts
+        three = ((m01 & me23) | (me01 & m23)) & starts
+        two = ((m01 & e23) | (e01 & m23) | (me01 & me23)) & starts
+        their_three = ((t01 & te23) | (te01 & t23)) & starts
+
+        score += (100 * popcount(four) + 5 * popcount(three)
+                  + 2 * popcount(two) - 4 * popcount(their_three))
 
     return score
 
 # To simplify, we need a valid_locations helper
 def get_valid_locations(game):
-    return [c for c in range(game.cols) if game.board[0][c] == 0]
+    return [c for c in range(game.cols) if game.heights[c] < game.rows]
 
 def minimax(game, depth, maximizingPlayer, player_piece):
     valid_locations = get_valid_locations(game)
@@ -88,18 +93,13 @@ def minimax(game, depth, maximizingPlayer, player_piece):
         column = random.choice(valid_locations)
         for col in valid_locations:
             # Simulate Move
-            row = -1
-            for r in range(game.rows -1, -1, -1):
-                if game.board[r][col] == 0:
-                    row = r
-                    break
-            game.board[row][col] = player_piece # Drop piece
+            game.drop_piece(col, player_piece) # Drop piece
             
             # RECURSE: Call minimax for the opponent (False)
             new_score = minimax(game, depth-1, False, player_piece)[1]
             
             # Undo Move
-            game.board[row][col] = 0 
+            game.undo_move()
             
             if new_score > value:
                 value = new_score
@@ -113,18 +113,13 @@ def minimax(game, depth, maximizingPlayer, player_piece):
         opponent_piece = 3 - player_piece
         for col in valid_locations:
             # Simulate Move
-            row = -1
-            for r in range(game.rows -1, -1, -1):
-                if game.board[r][col] == 0:
-                    row = r
-                    break
-            game.board[row][col] = opponent_piece # Drop Opponent Piece
+            game.drop_piece(col, opponent_piece) # Drop Opponent Piece
             
             # RECURSE: Call minimax for the AI (True)
             new_score = minimax(game, depth-1, True, player_piece)[1]
             
             # Undo Move
-            game.board[row][col] = 0 
+            game.undo_move()
             
             if new_score < value:
                 value = new_score
@@ -137,6 +132,415 @@ def minimax_agent(game, player):
     col, minimax_score = minimax(game, 4, True, player)
     return col
 
+# --- TRANSPOSITION TABLE ---
+# Different move orders often reach the same position (3 then 4 == 4 then 3).
+# The table remembers what we found out about a position so we don't search it twice.
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+class TranspositionTable:
+    """
+    A fixed-size hash table of search results.
+    'size' is the number of slots (rounded down to a power of two), so memory
+    never grows. Each slot holds (key, depth, bound, score, best_move, generation).
+    When two positions want the same slot, the deeper search wins, unless the
+    old entry is left over from an earlier move (an older generation).
+    Keep one table per game and pass it to every search so later moves start warm.
+    """
+    def __init__(self, size=2**18):
+        self.size = 1 << (size.bit_length() - 1)
+        self.index_mask = self.size - 1
+        self.clear()
+
+    def clear(self):
+        """Empties the table and resets every counter."""
+        self.slots = [None] * self.size
+        self.generation = 0
+        self.filled = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0 # A slot was taken over by a different position
+
+    def new_search(self):
+        """Call once per move. Entries from older searches become easy to replace."""
+        self.generation += 1
+
+    def probe(self, key):
+        entry = self.slots[key & self.index_mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, bound, score, move):
+        index = key & self.index_mask
+        old = self.slots[index]
+        if old is None:
+            self.filled += 1
+        elif old[0] != key:
+            if old[5] == self.generation and old[1] > depth:
+                return # Keep the deeper result from this search
+            self.overwrites += 1
+        self.slots[index] = (key, depth, bound, score, move, self.generation)
+        self.stores += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+            "filled": self.filled,
+            "size": self.size,
+        }
+
+# --- NEGAMAX WITH ALPHA-BETA ---
+# Same idea as minimax, but written from the point of view of "the player to move"
+# (my score = -their score), so one function handles both sides.
+# Alpha-beta lets us skip branches that can't change the result, and trying the
+# center columns first makes those cut-offs happen much earlier.
+WIN_SCORE = 10000000
+MOVE_ORDER = [3, 2, 4, 1, 5, 0, 6] # Center first
+
+class SearchTimeout(Exception):
+    """Raised inside negamax when stats["deadline"] has passed."""
+    pass
+
+def negamax(game, depth, alpha, beta, player, stats, table=None, first_move=None):
+    """
+    Returns (column, score) for 'player' to move.
+    Win scores are WIN_SCORE minus the number of pieces on the board when the
+    game ends, so a faster win always scores higher than a slower one
+    (and the same position always gets the same score, which keeps the table honest).
+    'stats' is a dict whose "nodes" counter gets incremented.
+    'table' is an optional TranspositionTable.
+    'first_move' is tried before everything else (iterative deepening passes
+    the best move of the previous iteration here).
+    If stats has a "deadline" (time.perf_counter() value), raises SearchTimeout
+    once it has passed. The board is left mid-search, the caller must undo.
+    """
+    stats["nodes"] += 1
+    if (stats["nodes"] & 255) == 0 and stats.get("deadline") and time.perf_counter() >= stats["deadline"]:
+        raise SearchTimeout()
+    opponent = 3 - player
+    valid_locations = [c for c in MOVE_ORDER if game.heights[c] < game.rows]
+    if not valid_locations:
+        return (None, 0) # Draw
+
+    moves_played = len(game.history)
+
+    # 1. SHORTCUT: If we can win right now, do it.
+    for col in valid_locations:
+        if game.winning_move(col, player):
+            return (col, WIN_SCORE - (moves_played + 1))
+
+    # 2. BASE CASE: Out of depth, use the heuristic
+    if depth == 0:
+        return (None, score_position(game, player))
+
+    # 3. SHORTCUT: If the opponent threatens to win, we must block.
+    # Two threats at once can't both be blocked, so we've lost.
+    threats = [col for col in valid_locations if game.winning_move(col, opponent)]
+    if len(threats) > 1:
+        return (threats[0], -(WIN_SCORE - (moves_played + 2)))
+    if threats:
+        valid_locations = threats
+
+    # 4. TABLE LOOKUP: Have we been here before?
+    key = game.hash ^ SIDE_KEYS[player]
+    alpha_orig = alpha
+    if table is not None:
+        entry = table.probe(key)
+        if entry is not None:
+            tt_move = entry[4]
+            if tt_move in valid_locations:
+                if entry[1] >= depth:
+                    bound, tt_score = entry[2], entry[3]
+                    if bound == EXACT:
+                        return (tt_move, tt_score)
+                    if bound == LOWER_BOUND and tt_score >= beta:
+                        return (tt_move, tt_score)
+                    if bound == UPPER_BOUND and tt_score <= alpha:
+                        return (tt_move, tt_score)
+                # Even if it was too shallow, its best move is a great first guess
+                valid_locations = [tt_move] + [c for c in valid_locations if c != tt_move]
+    if first_move in valid_locations:
+        valid_locations = [first_move] + [c for c in valid_locations if c != first_move]
+
+    column = valid_locations[0]
+    value = -float('inf')
+    for col in valid_locations:
+        game.drop_piece(col, player)
+        score = -negamax(game, depth-1, -beta, -alpha, opponent, stats, table)[1]
+        game.undo_move()
+
+        if score > value:
+            value = score
+            column = col
+        if value > alpha:
+            alpha = value
+        if moves_played == stats.get("root_ply"):
+            stats["root_best"] = (column, value) # Iterative deepening can use this if time runs out
+        if alpha >= beta:
+            break # The opponent would never let us get here. Prune!
+
+    if table is not None:
+        if value <= alpha_orig:
+            bound = UPPER_BOUND # Everything failed low: the real score is at most 'value'
+        elif value >= beta:
+            bound = LOWER_BOUND # We pruned: the real score is at least 'value'
+        else:
+            bound = EXACT
+        table.store(key, depth, bound, value, column)
+    return column, value
+
+def negamax_search(game, player, depth=8, table=None):
+    """
+    Runs negamax from the current position.
+    Returns (column, score, stats) where stats has "nodes", "depth" and "time" (seconds),
+    plus "table" (hit/miss counters) when a TranspositionTable is passed in.
+    """
+    stats = {"nodes": 0, "depth": depth}
+    start = time.perf_counter()
+    if table is not None:
+        table.new_search()
+    col, score = negamax(game, depth, -float('inf'), float('inf'), player, stats, table)
+    stats["time"] = time.perf_counter() - start
+    if table is not None:
+        stats["table"] = table.stats()
+    return col, score, stats
+
+# --- OPENING BOOK ---
+# build_book.py writes this file next to connect4.py. The agents below use it
+# by default; pass book=None to always search.
+DEFAULT_BOOK = "opening_book.bin"
+_loaded_books = {}
+
+def load_book(book):
+    """
+    Accepts an OpeningBook, None, or a path (relative paths are next to this file).
+    Each path is only opened once per process. Returns None if the file is missing.
+    """
+    if not isinstance(book, str):
+        return book
+    if book not in _loaded_books:
+        # opening_book imports connect4, so it can only be imported here
+        from opening_book import OpeningBook
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), book)
+        _loaded_books[book] = OpeningBook(path) if os.path.exists(path) else None
+    return _loaded_books[book]
+
+def lookup_known_move(game, player, book=None, solved=None):
+    """
+    Checks the opening book, then the solved-position cache.
+    Returns (column, score, source) or None.
+    """
+    for source, known in (("book", load_book(book)), ("solved", solved)):
+        hit = known.lookup(game, player) if known is not None else None
+        if hit is not None:
+            return hit[0], hit[1], source
+    return None
+
+def negamax_agent(game, player, depth=8, table=None, book=DEFAULT_BOOK, solved=None):
+    known = lookup_known_move(game, player, book, solved)
+    if known is not None:
+        return known[0]
+    col, score, stats = negamax_search(game, player, depth, table)
+    return col
+
+# --- ITERATIVE DEEPENING ---
+# Instead of guessing a depth, search depth 1, 2, 3... until the clock runs out
+# and play the move from the deepest search that finished. The shallow searches
+# are cheap and fill the table with good move ordering for the deeper ones.
+def iterative_deepening_search(game, player, time_limit=1.5, max_depth=42, table=None,
+                               book=None, solved=None):
+    """
+    Searches for at most 'time_limit' seconds of wall clock.
+    Returns (column, score, stats); stats["depth"] is the deepest completed iteration.
+    Always returns a legal column, even if not a single iteration finished.
+    'book' (an opening_book.OpeningBook or a path, see load_book) and 'solved'
+    (opening_book.SolvedCache) are checked first; stats["source"] says where
+    the move came from. Searches that reach the end of the game are added to 'solved'.
+    """
+    start = time.perf_counter()
+    known = lookup_known_move(game, player, book, solved)
+    if known is not None:
+        col, score, source = known
+        return col, score, {"nodes": 0, "depth": 0, "source": source,
+                            "time": time.perf_counter() - start}
+
+    stats = {"nodes": 0, "depth": 0, "deadline": start + time_limit, "source": "search",
+             "root_ply": len(game.history)}
+    if table is None:
+        table = TranspositionTable()
+    table.new_search()
+
+    valid_locations = [c for c in MOVE_ORDER if game.heights[c] < game.rows]
+    best_col = valid_locations[0] if valid_locations else None
+    best_score = 0
+    moves_played = len(game.history)
+    empty_cells = game.rows * game.cols - moves_played
+    max_depth = min(max_depth, empty_cells)
+
+    last_iteration_time = None
+    for depth in range(1, max_depth + 1):
+        iteration_start = time.perf_counter()
+        stats.pop("root_best", None)
+        try:
+            col, score = negamax(game, depth, -float('inf'), float('inf'), player,
+                                 stats, table, first_move=best_col)
+        except SearchTimeout:
+            # Put back whatever the interrupted search had dropped
+            while len(game.history) > moves_played:
+                game.undo_move()
+            # The previous best move is searched first, so anything that finished
+            # at the new depth and beat it is a better choice than it.
+            if "root_best" in stats:
+                best_col = stats["root_best"][0]
+            break
+
+        best_col, best_score = col, score
+        stats["depth"] = depth
+        if abs(score) > WIN_SCORE - 100:
+            break # Forced win or loss found, searching deeper won't change it
+
+        # Guess what the next iteration costs from how fast the last ones grew
+        # (the effective branching factor). Most of an iteration goes into the
+        # first (previous best) move, so it's worth starting if about half of it fits.
+        now = time.perf_counter()
+        iteration_time = now - iteration_start
+        if last_iteration_time:
+            growth = min(max(iteration_time / last_iteration_time, 1.5), 8.0)
+        else:
+            growth = 4.0
+        last_iteration_time = iteration_time
+        if now + iteration_time * growth / 2 > stats["deadline"]:
+            break
+
+    # Searched all the way to the end (or found a forced result): that's a solved position
+    if solved is not None and best_col is not None and (
+            stats["depth"] == empty_cells or abs(best_score) > WIN_SCORE - 100):
+        solved.store(game, player, best_col, best_score)
+
+    stats["time"] = time.perf_counter() - start
+    stats["table"] = table.stats()
+    for key in ("deadline", "root_ply", "root_best"):
+        stats.pop(key, None)
+    return best_col, best_score, stats
+
+def iterative_deepening_agent(game, player, time_limit=1.5, table=None, book=DEFAULT_BOOK, solved=None):
+    # 1.5s leaves headroom under the league's 2 second per-move timeout
+    col, score, stats = iterative_deepening_search(game, player, time_limit, table=table,
+                                                   book=book, solved=solved)
+    return col
+
+# --- PARALLEL ROOT SEARCH ---
+# Threads don't help because of the GIL, so each legal root move is searched in
+# its own worker process. Workers share one number, the best score found so far
+# at the root (alpha): a move that starts after a good one has finished only
+# needs to prove it's worse, which is much cheaper than finding its exact score.
+_shared_alpha = None
+_worker_table = None
+NO_ALPHA = -2 * WIN_SCORE # "Nothing finished yet"
+
+def _init_search_worker(shared_alpha, table_size):
+    # Runs once in every worker process. The table stays alive between moves.
+    global _shared_alpha, _worker_table
+    _shared_alpha = shared_alpha
+    _worker_table = TranspositionTable(table_size)
+
+def _search_root_move(history, col, player, depth):
+    """Worker job: score one root move. Returns (column, score, nodes)."""
+    game = Connect4()
+    for move_col, move_player in history:
+        game.drop_piece(move_col, move_player)
+    game.drop_piece(col, player)
+
+    # Only scores above alpha matter. Searching with alpha - 1 means a move
+    # that merely ties the best one still gets its exact score.
+    alpha = _shared_alpha.value
+    beta = float('inf') if alpha == NO_ALPHA else -(alpha - 1)
+    stats = {"nodes": 0}
+    _worker_table.new_search()
+    score = -negamax(game, depth - 1, -float('inf'), beta, 3 - player, stats, _worker_table)[1]
+
+    with _shared_alpha.get_lock():
+        if score > _shared_alpha.value:
+            _shared_alpha.value = score
+    return col, score, stats["nodes"]
+
+def _warm_up_worker(_):
+    return os.getpid()
+
+class ParallelSearcher:
+    """
+    A pool of search processes that stays alive between moves (worker start-up
+    and the workers' transposition tables are paid for once per game, not per move).
+    Use one per game and close() it at the end, or use it in a 'with' block.
+    """
+    def __init__(self, workers=None, table_size=2**18):
+        self.workers = workers or os.cpu_count() or 1
+        self.shared_alpha = multiprocessing.Value("q", NO_ALPHA)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                        initializer=_init_search_worker,
+                                        initargs=(self.shared_alpha, table_size))
+        # Start every worker now rather than in the middle of the first move
+        list(self.pool.map(_warm_up_worker, range(self.workers)))
+
+    def search(self, game, player, depth=10):
+        """
+        Same result as negamax_search (column, score, stats), but the root moves
+        are spread over the worker processes. stats["nodes"] adds up all workers.
+        """
+        start = time.perf_counter()
+        stats = {"nodes": 1, "depth": depth, "workers": self.workers}
+        valid_locations = [c for c in MOVE_ORDER if game.heights[c] < game.rows]
+        if not valid_locations:
+            stats["time"] = time.perf_counter() - start
+            return None, 0, stats
+
+        # Wins in one and forced blocks don't need a pool
+        for col in valid_locations:
+            if game.winning_move(col, player):
+                stats["time"] = time.perf_counter() - start
+                return col, WIN_SCORE - (len(game.history) + 1), stats
+        threats = [col for col in valid_locations if game.winning_move(col, 3 - player)]
+        if threats:
+            valid_locations = threats
+
+        self.shared_alpha.value = NO_ALPHA
+        jobs = [self.pool.submit(_search_root_move, list(game.history), col, player, depth)
+                for col in valid_locations]
+        results = {}
+        for job in as_completed(jobs):
+            col, score, nodes = job.result()
+            results[col] = score
+            stats["nodes"] += nodes
+
+        # Highest score wins; on a tie, the more central column
+        best_col = max(valid_locations, key=lambda c: (results[c], -MOVE_ORDER.index(c)))
+        stats["time"] = time.perf_counter() - start
+        return best_col, results[best_col], stats
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def parallel_agent(game, player, searcher, depth=10, book=DEFAULT_BOOK):
+    known = lookup_known_move(game, player, book)
+    if known is not None:
+        return known[0]
+    col, score, stats = searcher.search(game, player, depth)
+    return col
+
 def random_agent(game):
     """
     Input: The game object (so we can see the board)
@@ -159,37 +563,17 @@ def smart_agent(game, player):
     
     # --- STEP 1: ATTACK (Check if WE can win) ---
     for col in valid_cols:
-        # Find the row where the piece lands
-        target_row = -1
-        for row in range(game.rows -1, -1, -1):
-            if game.board[row][col] == 0:
-                target_row = row
-                break
-        
-        # Simulate OUR move
-        game.board[target_row][col] = player
-        if game.check_winner(player):
-            game.board[target_row][col] = 0 # Undo
+        # Simulate OUR move (on the bitboard, nothing is actually dropped)
+        if game.winning_move(col, player):
             return col # TAKE THE WIN!
-        game.board[target_row][col] = 0 # Undo
 
     # --- STEP 2: DEFENSE (Check if THEY can win) ---
     for col in valid_cols:
-        # Find the row where the piece lands
-        target_row = -1
-        for row in range(game.rows -1, -1, -1):
-            if game.board[row][col] == 0:
-                target_row = row
-                break
-                
         # Simulate THE OPPONENT'S move
-        game.board[target_row][col] = opponent
-        if game.check_winner(opponent):
+        if game.winning_move(col, opponent):
             # If they win here, we MUST play here to block them
-            game.board[target_row][col] = 0 # Undo
             print(f"Blocking opponent in column {col}") # Optional: Let us know it blocked
             return col 
-        game.board[target_row][col] = 0 # Undo
 
     # --- STEP 3: RANDOM ---
     return random.choice(valid_cols)
@@ -217,13 +601,118 @@ def human_agent(game):
         except ValueError:
             print("That's not a number! Please enter an integer.")
 
+# --- BITBOARD LAYOUT ---
+# Each player's pieces live in one Python int. Every column gets 7 bits
+# (6 playable cells + 1 always-empty sentinel on top), numbered from the bottom:
+#
+#   .  .  .  .  .  .  .     <- sentinel row (bits 6, 13, 20, ...)
+#   5 12 19 26 33 40 47
+#   4 11 18 25 32 39 46
+#   3 10 17 24 31 38 45
+#   2  9 16 23 30 37 44
+#   1  8 15 22 29 36 43
+#   0  7 14 21 28 35 42
+#
+# The sentinel row stops shifted lines from wrapping into the next column,
+# so "4 in a row" becomes a handful of shifts and ANDs.
+ROWS = 6
+COLS = 7
+H1 = ROWS + 1 # Bits per column (including the sentinel)
+
+BOTTOM_MASK = sum(1 << (c * H1) for c in range(COLS))
+BOARD_MASK = BOTTOM_MASK * ((1 << ROWS) - 1) # Every playable cell
+
+# Every possible line of 4 as a bitmask (69 of them), and for each cell the
+# lines that pass through it. After a move only those lines can have changed.
+WINDOW_MASKS = []
+for _dc, _dr in ((1, 0), (0, 1), (1, 1), (1, -1)): # Horizontal, vertical, both diagonals
+    for _c in range(COLS):
+        for _r in range(ROWS):
+            _cells = [(_c + i * _dc, _r + i * _dr) for i in range(4)]
+            if all(0 <= c < COLS and 0 <= r < ROWS for c, r in _cells):
+                WINDOW_MASKS.append(sum(1 << (c * H1 + r) for c, r in _cells))
+
+CELL_WINDOWS = [[w for w in WINDOW_MASKS if w >> bit & 1] for bit in range(COLS * H1)]
+
+# For score_position: per direction, the bit step between cells of a window and
+# the first cell of every window in that direction.
+WINDOW_STARTS = []
+for _shift in (H1, 1, H1 + 1, H1 - 1): # Horizontal, vertical, both diagonals
+    _starts = 0
+    for _w in WINDOW_MASKS:
+        _first = (_w & -_w).bit_length() - 1
+        if _w == sum(1 << (_first + i * _shift) for i in range(4)):
+            _starts |= 1 << _first
+    WINDOW_STARTS.append((_shift, _starts))
+
+CENTER_MASK = ((1 << ROWS) - 1) << (3 * H1)
+
+# int.bit_count() only exists from Python 3.10 (the Docker image runs 3.9)
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:
+    def popcount(x):
+        return bin(x).count("1")
+
+# Zobrist hashing: a random 64-bit number per (player, cell). XOR-ing in the
+# number of every piece on the board gives a position hash that drop_piece and
+# undo_move can update with a single XOR. The seed is fixed so hashes are the
+# same in every process (and in saved files).
+_zobrist_rng = random.Random(20240601)
+ZOBRIST = [[_zobrist_rng.getrandbits(64) for _ in range(COLS * H1)] for _ in range(3)]
+SIDE_KEYS = [0, _zobrist_rng.getrandbits(64), _zobrist_rng.getrandbits(64)] # Who is to move
+
+def mirror_key(key):
+    """Flips a position key (see Connect4.key) left-to-right, column by column."""
+    mirrored = 0
+    for col in range(COLS):
+        mirrored |= ((key >> (col * H1)) & ((1 << H1) - 1)) << ((COLS - 1 - col) * H1)
+    return mirrored
+
+def has_four(bitboard):
+    """
+    Returns True if the bitboard contains 4 pieces in a row.
+    Shift 1 = vertical, 7 = horizontal, 6 and 8 = the two diagonals.
+    """
+    for shift in (1, H1, H1 - 1, H1 + 1):
+        pairs = bitboard & (bitboard >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
 class Connect4:
     def __init__(self):
-        self.rows = 6
-        self.cols = 7
+        self.rows = ROWS
+        self.cols = COLS
+
+        # The real game state: one bitboard per player (index 1 and 2, slot 0 unused),
+        # how many pieces sit in each column, and the move list (for undo).
+        self.bitboards = [0, 0, 0]
+        self.heights = [0] * self.cols
+        self.history = []
+        self.hash = 0 # Zobrist hash of the pieces on the board
 
+        # A list-of-lists mirror of the bitboards (row 0 is the TOP row).
+        # print_board, board_to_tensor and the referees read this.
+        # Don't write to it directly - use drop_piece / undo_move.
         self.board = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
 
+    @classmethod
+    def from_board(cls, board):
+        """
+        Builds a game from a list-of-lists board (row 0 = top), e.g. what the
+        HTTP referee sends. The real move order isn't known, so history is
+        filled column by column; last_move_wins/undo_move only make sense for
+        moves played after this.
+        """
+        game = cls()
+        for col in range(game.cols):
+            for row in range(game.rows - 1, -1, -1):
+                if board[row][col] == 0:
+                    break
+                game.drop_piece(col, int(board[row][col]))
+        return game
+
     def print_board(self):
         print("\n  0 1 2 3 4 5 6 (column numbers)")
         print(" ---------------")
@@ -231,51 +720,88 @@ class Connect4:
             print("|", *row, "|")
         print(" ---------------")
 
+    def is_valid_location(self, col):
+        return 0 <= col < self.cols and self.heights[col] < self.rows
+
+    def is_full(self):
+        return len(self.history) == self.rows * self.cols
+
     def drop_piece(self, col, player):
         if col < 0 or col >= self.cols:
             print(f"Error: Column {col} does not exist!")
             return False
         
-        for row in range(self.rows -1, -1, -1):
-            if self.board[row][col] == 0:
-                self.board[row][col] = player
+        height = self.heights[col]
+        if height >= self.rows:
+            print(f"Column {col} is full!")
+            return False
+
+        bit = col * H1 + height
+        self.bitboards[player] |= 1 << bit
+        self.hash ^= ZOBRIST[player][bit]
+        self.board[self.rows - 1 - height][col] = player
+        self.heights[col] = height + 1
+        self.history.append((col, player))
+        return True
+
+    def undo_move(self):
+        """
+        Takes back the last piece that was dropped. Returns its column.
+        """
+        col, player = self.history.pop()
+        height = self.heights[col] - 1
+        bit = col * H1 + height
+        self.bitboards[player] ^= 1 << bit
+        self.hash ^= ZOBRIST[player][bit]
+        self.board[self.rows - 1 - height][col] = 0
+        self.heights[col] = height
+        return col
+
+    def winning_move(self, col, player):
+        """
+        Would dropping 'player' into 'col' win the game?
+        Tested on a copy of the bitboard, so the board is not touched.
+        """
+        if not self.is_valid_location(col):
+            return False
+        return has_four(self.bitboards[player] | (1 << (col * H1 + self.heights[col])))
+    
+    def last_move_wins(self):
+        """
+        Did the last piece dropped complete 4 in a row?
+        Only looks at the (at most 16) lines through that one cell, so this is
+        what referees should call after every move instead of check_winner.
+        """
+        if not self.history:
+            return False
+        col, player = self.history[-1]
+        bitboard = self.bitboards[player]
+        for window in CELL_WINDOWS[col * H1 + self.heights[col] - 1]:
+            if (bitboard & window) == window:
                 return True
-            
-        print(f"Column {col} is full!")
         return False
-    
+
+    def key(self):
+        """
+        A unique integer for the position (< 2**49): player 1's pieces plus every
+        occupied cell. Per column this is (2**height - 1) + player 1's bits, which
+        can't collide with another height, so unlike self.hash it's exact.
+        """
+        return self.bitboards[1] + (self.bitboards[1] | self.bitboards[2])
+
+    def to_string(self):
+        """
+        The board as 42 digits, row by row from the top ("000...120").
+        This is the stdin protocol our subprocess bots read.
+        """
+        return "".join(str(cell) for row in self.board for cell in row)
+
     def check_winner(self, player):
         """
         Checks if the given 'player' (1 or 2) has won.
         Returns True if they won, False otherwise.
         """
-
-        # Check horizontal
-        for r in range(self.rows):
-            for c in range(self.cols - 3):
-                if all(self.board[r][c + i] == player for i in range(4)):
-                    return True
-
-        # Check vertical
-        for r in range(self.rows - 3):
-            for c in range(self.cols):
-                if all(self.board[r + i][c] == player for i in range(4)):
-                    return True
-                
-        # Check Positive Diagonal ( / )
-        for r in range(3, self.rows):
-            for c in range(self.cols - 3):
-                if all(self.board[r - i][c + i] == player for i in range(4)):
-                    return True
-                
-        # Check Negative Diagonal ( \ )
-        for r in range(self.rows - 3):
-            for c in range(self.cols - 3):
-                if all (self.board[r + i][c + i] == player for i in range(4)):
-                    print(f"Player {player} wins!")
-                    return True
-                
-        return False
+        return has_four(self.bitboards[player])
     
 if __name__ == "__main__":
     game = Connect4()
@@ -306,7 +832,7 @@ if __name__ == "__main__":
         
         if success:
             # 3. Check for a win
-            if game.check_winner(current_player):
+            if game.last_move_wins():
                 game.print_board()
                 print(f"!!! PLAYER {current_player} WINS !!!")
                 game_over = True
@@ -0,0 +1,273 @@
+import queue
+import time
+from dataclasses import dataclass, replace
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+import torch.nn as nn
+import torch.optim as optim
+from dqn_agent import Connect4Net, save_brain
+from vec_env import VecConnect4
+
+# --- ACTOR / LEARNER TRAINING ---
+# train_dqn does everything in one loop on one core. Here the work is split:
+#   * several ACTOR processes play games (VecConnect4, a random player 2 like
+#     train_dqn) with their own copy of the brain, and write every transition
+#     straight into a replay buffer that lives in shared memory;
+#   * one LEARNER (the process that calls train_distributed) samples from that
+#     buffer, trains, and every few updates publishes its weights, which the
+#     actors pick up.
+# Actors use different epsilons, so some explore a lot and some play well.
+#
+#   python distributed_train.py
+
+@dataclass
+class ActorLearnerConfig:
+    num_actors: int = 4
+    envs_per_actor: int = 32
+    memory_size: int = 100000
+    batch_size: int = 64
+    lr: float = 0.001
+    gamma: float = 0.9
+    target_update: int = 200 # Updates between target network copies (0 = no target network)
+    total_updates: int = 20000 # Learner stops after this many updates...
+    max_seconds: float = 0 # ...or after this long (0 = no time limit)
+    warmup: int = 1000 # Transitions in the buffer before learning starts
+    publish_every: int = 50 # Updates between weight snapshots
+    sync_every: int = 10 # Actor steps between checks for a new snapshot
+    report_every: float = 5.0 # Seconds between throughput reports
+    epsilon_base: float = 0.4 # Actor i explores with epsilon_base ** (1 + 7 * i / (num_actors - 1))
+    arch: str = "mlp" # Which Connect4Net (see dqn_agent.ARCHS)
+
+class SharedReplayBuffer:
+    """
+    The same ring buffer as dqn_agent.ReplayBuffer, but the arrays live in
+    shared memory so every actor can write into it without copying through a pipe.
+    A shared counter hands out slots; writers only hold the lock while reserving.
+    The learner may read a slot that is being overwritten at that moment -
+    that's one slightly wrong sample out of thousands, and much cheaper than locking.
+    """
+    def __init__(self, capacity, ctx, state_size=42):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.raw = {
+            "states": ctx.RawArray("b", capacity * state_size),
+            "next_states": ctx.RawArray("b", capacity * state_size),
+            "actions": ctx.RawArray("q", capacity),
+            "rewards": ctx.RawArray("f", capacity),
+            "dones": ctx.RawArray("f", capacity),
+        }
+        self.written = ctx.Value("q", 0) # Total transitions ever pushed
+        self._arrays = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_arrays"] = None # NumPy views are rebuilt in each process
+        return state
+
+    def arrays(self):
+        if self._arrays is None:
+            dtypes = {"states": np.int8, "next_states": np.int8, "actions": np.int64,
+                      "rewards": np.float32, "dones": np.float32}
+            self._arrays = {name: np.frombuffer(raw, dtype=dtypes[name]) for name, raw in self.raw.items()}
+            for name in ("states", "next_states"):
+                self._arrays[name] = self._arrays[name].reshape(self.capacity, self.state_size)
+        return self._arrays
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        count = len(actions)
+        with self.written.get_lock():
+            start = self.written.value
+            self.written.value = start + count
+        indices = (start + np.arange(count)) % self.capacity
+        arrays = self.arrays()
+        arrays["states"][indices] = states
+        arrays["actions"][indices] = actions
+        arrays["rewards"][indices] = rewards
+        arrays["next_states"][indices] = next_states
+        arrays["dones"][indices] = dones
+
+    def sample(self, batch_size):
+        indices = np.random.randint(0, len(self), size=batch_size)
+        arrays = self.arrays()
+        return (torch.from_numpy(arrays["states"][indices]).float(),
+                torch.from_numpy(arrays["actions"][indices]),
+                torch.from_numpy(arrays["rewards"][indices]),
+                torch.from_numpy(arrays["next_states"][indices]).float(),
+                torch.from_numpy(arrays["dones"][indices]))
+
+    def __len__(self):
+        return min(self.written.value, self.capacity)
+
+def actor_loop(actor_id, config, epsilon, shared_brain, version, weights_lock, replay, stop, metrics):
+    """One actor process: play, push transitions, refresh weights, report."""
+    torch.set_num_threads(1) # Many actors on one box: don't fight over cores
+    brain = Connect4Net(config.arch)
+    brain.eval()
+    local_version = -1
+    env = VecConnect4(config.envs_per_actor, seed=actor_id)
+    num_envs = config.envs_per_actor
+
+    steps = transitions = games = wins = staleness = 0
+    last_report = time.perf_counter()
+    while not stop.is_set():
+        # 1. Pick up the newest published weights every few steps
+        if steps % config.sync_every == 0 and version.value != local_version:
+            with weights_lock:
+                brain.load_state_dict(shared_brain.state_dict())
+                local_version = version.value
+
+        # 2. Act (same as train_dqn: we are player 1, player 2 plays randomly)
+        state_boards = env.flat_boards().copy()
+        legal = env.legal_mask()
+        with torch.no_grad():
+            q_values = brain(torch.from_numpy(state_boards.astype(np.float32)))
+        q_values[~torch.from_numpy(legal)] = -9999
+        actions = torch.argmax(q_values, dim=1).numpy()
+        explore = env.rng.random(num_envs) < epsilon
+        actions = np.where(explore, env.random_actions(legal), actions)
+
+        rewards = np.zeros(num_envs, dtype=np.float32)
+        won, draw, illegal = env.step(actions)
+        rewards[won] = 10
+        rewards[illegal] = -100
+        done = won | draw | illegal
+        p2_won, p2_draw, _ = env.step(env.random_actions(), active=~done)
+        rewards[p2_won] = -10
+        done |= p2_won | p2_draw
+
+        # 3. Straight into shared memory
+        replay.push_batch(state_boards, actions, rewards, env.flat_boards(), done)
+        env.reset(done)
+
+        steps += 1
+        transitions += num_envs
+        games += int(done.sum())
+        wins += int(won.sum())
+        staleness += version.value - local_version # How many snapshots behind we are acting
+
+        now = time.perf_counter()
+        if now - last_report >= 1.0:
+            metrics.put((actor_id, transitions, games, wins, staleness / steps))
+            steps = transitions = games = wins = staleness = 0
+            last_report = now
+
+def train_distributed(config=None, **overrides):
+    """
+    Runs the actors and the learner until config.total_updates (or max_seconds).
+    Returns (brain, report) where report holds the overall throughput numbers.
+    """
+    config = replace(config or ActorLearnerConfig(), **overrides)
+    ctx = mp.get_context("spawn")
+
+    brain = Connect4Net(config.arch)
+    target_brain = Connect4Net(config.arch)
+    target_brain.load_state_dict(brain.state_dict())
+    optimizer = optim.Adam(brain.parameters(), lr=config.lr)
+    loss_fn = nn.MSELoss()
+
+    # The snapshot actors copy from: tensors in shared memory + a version number
+    shared_brain = Connect4Net(config.arch)
+    shared_brain.load_state_dict(brain.state_dict())
+    shared_brain.share_memory()
+    version = ctx.Value("q", 0)
+    weights_lock = ctx.Lock()
+
+    replay = SharedReplayBuffer(config.memory_size, ctx)
+    stop = ctx.Event()
+    metrics = ctx.Queue()
+
+    actors = []
+    for actor_id in range(config.num_actors):
+        exponent = 1 + 7 * actor_id / max(config.num_actors - 1, 1)
+        epsilon = config.epsilon_base ** exponent
+        process = ctx.Process(target=actor_loop, daemon=True,
+                              args=(actor_id, config, epsilon, shared_brain, version,
+                                    weights_lock, replay, stop, metrics))
+        process.start()
+        actors.append(process)
+
+    print(f"Started {config.num_actors} actors x {config.envs_per_actor} games, waiting for {config.warmup} transitions...")
+    try:
+        while len(replay) < config.warmup:
+            # An actor that crashed (bad config, out of memory...) would leave us waiting forever
+            dead = [process.exitcode for process in actors if not process.is_alive()]
+            if dead:
+                raise RuntimeError(f"{len(dead)} actor(s) exited during warmup (exit codes {dead}), "
+                                   f"{len(replay)}/{config.warmup} transitions collected")
+            time.sleep(0.05)
+
+        start = last_report = time.perf_counter()
+        updates = 0
+        window = {"transitions": 0, "games": 0, "wins": 0, "staleness": [], "updates": 0}
+        total_transitions_at_start = replay.written.value
+        while updates < config.total_updates:
+            if config.max_seconds and time.perf_counter() - start > config.max_seconds:
+                break
+
+            # 1. Learn from a batch (targets from the target network)
+            t_states, t_actions, t_rewards, t_next_states, t_dones = replay.sample(config.batch_size)
+            with torch.no_grad():
+                next_max = torch.max(target_brain(t_next_states), dim=1)[0]
+                targets = t_rewards + config.gamma * next_max * (1 - t_dones)
+            current_q = brain(t_states).gather(1, t_actions.unsqueeze(1)).squeeze(1)
+            loss = loss_fn(current_q, targets)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            updates += 1
+            window["updates"] += 1
+
+            if config.target_update and updates % config.target_update == 0:
+                target_brain.load_state_dict(brain.state_dict())
+
+            # 2. Publish a snapshot for the actors
+            if updates % config.publish_every == 0:
+                with weights_lock:
+                    shared_brain.load_state_dict(brain.state_dict())
+                    version.value += 1
+
+            # 3. Collect the actors' numbers and report
+            try:
+                while True:
+                    _, transitions, games, wins, staleness = metrics.get_nowait()
+                    window["transitions"] += transitions
+                    window["games"] += games
+                    window["wins"] += wins
+                    window["staleness"].append(staleness)
+            except queue.Empty:
+                pass
+
+            now = time.perf_counter()
+            if now - last_report >= config.report_every:
+                elapsed = now - last_report
+                staleness = np.mean(window["staleness"]) if window["staleness"] else 0.0
+                win_pct = 100 * window["wins"] / max(window["games"], 1)
+                print(f"updates {updates:6d} | {window['transitions'] / elapsed:8.0f} transitions/s"
+                      f" | {window['updates'] / elapsed:6.1f} updates/s | staleness {staleness:.2f} snapshots"
+                      f" | actor win rate {win_pct:.0f}% | loss {loss.item():.3f}")
+                window = {"transitions": 0, "games": 0, "wins": 0, "staleness": [], "updates": 0}
+                last_report = now
+    finally:
+        stop.set()
+        for process in actors:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "updates": updates,
+        "seconds": elapsed,
+        "updates_per_sec": updates / elapsed,
+        "transitions_per_sec": (replay.written.value - total_transitions_at_start) / elapsed,
+        "snapshots": version.value,
+    }
+    print(f"Training Complete! {report['transitions_per_sec']:.0f} transitions/s, "
+          f"{report['updates_per_sec']:.1f} updates/s")
+    return brain, report
+
+if __name__ == "__main__":
+    trained_brain, _ = train_distributed()
+    save_brain(trained_brain, "connect4_brain.pth")
+    print("Brain saved to 'connect4_brain.pth'")
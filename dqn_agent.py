@@ -3,22 +3,54 @@ import torch.nn as nn
 import torch.nn.functional as F
 import torch.optim as optim
 import random
+import copy
+import contextlib
+import io
 import numpy as np
-from connect4 import Connect4 # Import your game logic
 from collections import deque
+from dataclasses import dataclass, replace
+from connect4 import Connect4 # Import your game logic
+from vec_env import VecConnect4
+from neural_agent import NeuralAgent
 
 # --- 1. THE BRAIN ---
+# Two shapes of brain, picked with Connect4Net(arch):
+#   "mlp"  - the original: 42 numbers -> 128 -> 128 -> 7
+#   "conv" - two 3x3 convolutions over the board planes (see encode_planes), so
+#            it doesn't have to learn "these cells are neighbours" from scratch.
+#            About the same number of weights as the mlp.
+# Both take the same input (the flat 0/1/2 board, 1 = the side to move), so
+# the replay buffers and trainers don't care which one they get.
+ARCHS = ("mlp", "conv")
+
 class Connect4Net(nn.Module):
-    def __init__(self):
+    def __init__(self, arch="mlp", channels=32):
         super(Connect4Net, self).__init__()
-        self.fc1 = nn.Linear(42, 128)
-        self.fc2 = nn.Linear(128, 128)
-        self.fc3 = nn.Linear(128, 7)
+        if arch not in ARCHS:
+            raise ValueError(f"Unknown arch {arch!r} (expected one of {ARCHS})")
+        self.arch = arch
+        self.channels = channels
+        if arch == "mlp":
+            self.fc1 = nn.Linear(42, 128)
+            self.fc2 = nn.Linear(128, 128)
+            self.fc3 = nn.Linear(128, 7)
+        else:
+            self.conv1 = nn.Conv2d(3, channels, kernel_size=3, padding=1)
+            self.conv2 = nn.Conv2d(channels, channels, kernel_size=3, padding=1)
+            self.head = nn.Linear(channels * 42, 7)
 
     def forward(self, x):
-        x = F.relu(self.fc1(x))
-        x = F.relu(self.fc2(x))
-        return self.fc3(x)
+        if self.arch == "mlp":
+            x = F.relu(self.fc1(x))
+            x = F.relu(self.fc2(x))
+            return self.fc3(x)
+        single = x.dim() == 1 # One board in, one row of 7 Q-values out (like the mlp)
+        if x.dim() < 4:
+            x = tensor_planes(x)
+        x = F.relu(self.conv1(x))
+        x = F.relu(self.conv2(x))
+        q_values = self.head(x.flatten(1))
+        return q_values[0] if single else q_values
 
 # --- 2. HELPER: BOARD TO TENSOR ---
 # The neural net needs a flat list of 42 numbers, not a 6x7 grid.
@@ -30,6 +62,57 @@ def board_to_tensor(board):
     # Convert to PyTorch Tensor
     return torch.tensor(flat_board, dtype=torch.float32)
 
+# --- NEW: BOARD PLANES ---
+# Instead of one number per cell, three 6x7 yes/no planes: "my pieces",
+# "their pieces" and "empty", seen by the player to move.
+# Flat cell i (row 0 = top, like Connect4.board) is bit BOARD_BITS[i] of a
+# Connect4 bitboard (7 bits per column, row 0 = bottom).
+BOARD_BITS = np.array([col * 7 + (5 - row) for row in range(6) for col in range(7)], dtype=np.uint64)
+
+def encode_planes(boards, players=1):
+    """
+    boards: one board (list of lists, (6, 7) or (42,)) or a batch ((N, 6, 7) or (N, 42)) of 0/1/2.
+    players: the side to move, one for all boards or one per board.
+    Returns float32 planes of shape (N, 3, 6, 7).
+    """
+    boards = np.asarray(boards, dtype=np.int8).reshape(-1, 42)
+    players = np.broadcast_to(np.asarray(players, dtype=np.int8), (len(boards),))[:, None]
+    planes = np.stack([boards == players, (boards != 0) & (boards != players), boards == 0], axis=1)
+    return planes.reshape(-1, 3, 6, 7).astype(np.float32)
+
+def bitboard_planes(own, opponent):
+    """
+    The same planes straight from bitboards (ints, or arrays of them for a batch),
+    e.g. bitboard_planes(game.bitboards[player], game.bitboards[3 - player]).
+    """
+    own = np.asarray(own, dtype=np.uint64).reshape(-1, 1)
+    opponent = np.asarray(opponent, dtype=np.uint64).reshape(-1, 1)
+    mine = (own >> BOARD_BITS) & np.uint64(1)
+    theirs = (opponent >> BOARD_BITS) & np.uint64(1)
+    planes = np.stack([mine, theirs, 1 - mine - theirs], axis=1)
+    return planes.reshape(-1, 3, 6, 7).astype(np.float32)
+
+def tensor_planes(x):
+    """Planes from a batch of flat boards that are already 1 = me, 2 = them (what the nets get)."""
+    x = x.reshape(-1, 1, 6, 7)
+    return torch.cat([x == 1, x == 2, x == 0], dim=1).float()
+
+# --- NEW: SAVING AND LOADING ---
+# A checkpoint says which arch it is, so whoever loads it builds the right net.
+# Old checkpoints are a bare state_dict of the original mlp.
+def save_brain(brain, path="connect4_brain.pth"):
+    torch.save({"arch": brain.arch, "channels": brain.channels, "state_dict": brain.state_dict()}, path)
+
+def load_brain(path="connect4_brain.pth"):
+    """Builds the right Connect4Net for the checkpoint at 'path' and loads it (in eval mode)."""
+    checkpoint = torch.load(path)
+    if "state_dict" not in checkpoint:
+        checkpoint = {"arch": "mlp", "state_dict": checkpoint}
+    brain = Connect4Net(checkpoint["arch"], checkpoint.get("channels", 32))
+    brain.load_state_dict(checkpoint["state_dict"])
+    brain.eval()
+    return brain
+
 # --- 3. THE SILENT GAME ---
 # We inherit from your original class but disable the printing
 class SilentConnect4(Connect4):
@@ -37,139 +120,373 @@ class SilentConnect4(Connect4):
         pass # Do nothing!
 
 class ReplayBuffer:
-    def __init__(self, capacity):
-        # A deque is a list that automatically pops the oldest item 
-        # when you add a new one if it's full.
-        self.buffer = deque(maxlen=capacity)
+    """
+    A ring buffer of transitions stored in preallocated arrays (boards as int8),
+    so memory is fixed up front and a sample is just fancy indexing - no Python
+    tuple per move, no stacking of 64 little tensors.
+    Once full, the newest transition overwrites the oldest.
+    """
+    def __init__(self, capacity, state_shape=(42,)):
+        self.capacity = capacity
+        self.states = np.zeros((capacity,) + tuple(state_shape), dtype=np.int8)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity,) + tuple(state_shape), dtype=np.int8)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+        self.position = 0 # Where the next transition goes
+        self.size = 0
 
     def push(self, state, action, reward, next_state, done):
-        # Save the experience tuple
-        self.buffer.append((state, action, reward, next_state, done))
+        # Save one experience
+        self.push_batch(np.asarray(state)[None], [action], [reward], np.asarray(next_state)[None], [done])
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        # Save many experiences at once (wrapping around the end of the ring)
+        count = len(actions)
+        indices = (self.position + np.arange(count)) % self.capacity
+        self.states[indices] = states
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.next_states[indices] = next_states
+        self.dones[indices] = dones
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
 
     def sample(self, batch_size):
-        # Pick 'batch_size' random memories
-        # zip(*...) is a cool Python trick to unzip the list of tuples
-        # It turns [(s1, a1, r1...), (s2, a2, r2...)] into ([s1, s2], [a1, a2]...)
-        batch = random.sample(self.buffer, batch_size)
-        state, action, reward, next_state, done = zip(*batch)
-        return state, action, reward, next_state, done
+        # Pick 'batch_size' random memories (with replacement, O(batch_size))
+        # and return them as ready-to-use batch tensors.
+        indices = np.random.randint(0, self.size, size=batch_size)
+        return self._batch(indices)
+
+    def _batch(self, indices):
+        return (torch.from_numpy(self.states[indices]).float(),
+                torch.from_numpy(self.actions[indices]),
+                torch.from_numpy(self.rewards[indices]),
+                torch.from_numpy(self.next_states[indices]).float(),
+                torch.from_numpy(self.dones[indices]))
 
     def __len__(self):
-        return len(self.buffer)
+        return self.size
+
+# --- PRIORITIZED REPLAY ---
+# Most moves give reward 0; the few that win, lose or are illegal are the ones
+# worth learning from. Prioritized replay samples each memory in proportion to
+# how wrong the brain was about it last time (its TD error).
+class SumTree:
+    """
+    A binary tree in one array: leaves hold priorities, every parent holds the
+    sum of its two children, so tree[1] is the total. Picking a leaf in
+    proportion to its priority is a walk from the root, O(log n), done for
+    a whole batch at once.
+    """
+    def __init__(self, capacity):
+        self.leaves = 1 << max(capacity - 1, 1).bit_length() # Round up to a power of two
+        self.depth = self.leaves.bit_length() - 1
+        self.tree = np.zeros(2 * self.leaves, dtype=np.float64)
+
+    def total(self):
+        return self.tree[1]
+
+    def get(self, indices):
+        return self.tree[self.leaves + np.asarray(indices)]
+
+    def update(self, indices, priorities):
+        nodes = self.leaves + np.asarray(indices)
+        self.tree[nodes] = priorities
+        # Recompute the parents one level at a time (np.unique handles siblings)
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values):
+        """For each value in [0, total), the leaf whose running-sum range contains it."""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            go_right = values >= self.tree[left]
+            values -= np.where(go_right, self.tree[left], 0.0)
+            nodes = left + go_right
+        return nodes - self.leaves
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    ReplayBuffer that samples by priority instead of uniformly.
+    alpha: how strongly priorities matter (0 = uniform).
+    sample() also returns the indices (for update_priorities) and the
+    importance-sampling weights that undo the sampling bias in the loss;
+    beta goes from ~0.4 to 1 over training.
+    """
+    def __init__(self, capacity, state_shape=(42,), alpha=0.6, epsilon=1e-3):
+        super().__init__(capacity, state_shape)
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.tree = SumTree(capacity)
+        self.max_priority = 1.0
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        count = len(actions)
+        indices = (self.position + np.arange(count)) % self.capacity
+        super().push_batch(states, actions, rewards, next_states, dones)
+        # New memories get the highest priority so they're seen at least once
+        self.tree.update(indices, np.full(count, self.max_priority ** self.alpha))
+
+    def sample(self, batch_size, beta=0.4):
+        # Split the total into equal segments and pick one point in each,
+        # which spreads the batch out better than independent draws.
+        total = self.tree.total()
+        points = (np.arange(batch_size) + np.random.random(batch_size)) * (total / batch_size)
+        indices = np.minimum(self.tree.find(np.minimum(points, total * (1 - 1e-12))), self.size - 1)
+
+        probs = self.tree.get(indices) / total
+        weights = (self.size * np.maximum(probs, 1e-12)) ** -beta
+        weights /= weights.max()
+        return self._batch(indices) + (indices, torch.from_numpy(weights.astype(np.float32)))
+
+    def update_priorities(self, indices, td_errors):
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
+
+# --- N-STEP RETURNS ---
+# Instead of learning from one reward plus a guess about the next board, add up
+# the next n rewards first (r0 + 0.9*r1 + 0.9^2*r2 ...). Wins and losses then
+# reach the moves that led to them n times faster.
+class NStepCollector:
+    """
+    Holds the last n moves of every game. add() takes one vector step and
+    returns the transitions that are ready to go into the replay buffer
+    (states, actions, n-step rewards, next states, dones) as arrays.
+    When a game ends, all its pending moves are flushed with done=True.
+    """
+    def __init__(self, num_envs, n, gamma):
+        self.n = n
+        self.gamma = gamma
+        self.pending = [deque() for _ in range(num_envs)]
+
+    def _emit(self, queue, next_state, done, out):
+        state, action, _ = queue[0]
+        ret = sum(reward * self.gamma ** k for k, (_, _, reward) in enumerate(queue))
+        out.append((state, action, ret, next_state, done))
+        queue.popleft()
+
+    def add(self, states, actions, rewards, next_states, dones):
+        out = []
+        for i, queue in enumerate(self.pending):
+            queue.append((states[i], actions[i], rewards[i]))
+            if dones[i]:
+                while queue:
+                    self._emit(queue, next_states[i], True, out)
+            elif len(queue) == self.n:
+                self._emit(queue, next_states[i], False, out)
+        if not out:
+            return None
+        s, a, r, ns, d = zip(*out)
+        return np.array(s), np.array(a), np.array(r, dtype=np.float32), np.array(ns), np.array(d)
 
 # --- 4. THE TRAINING LOOP ---
-def train_dqn():
-    brain = Connect4Net()
-    optimizer = optim.Adam(brain.parameters(), lr=0.001)
-    loss_fn = nn.MSELoss()
+@dataclass
+class TrainConfig:
+    """Every knob of train_dqn. The defaults are the original training run."""
+    episodes: int = 2000
+    num_envs: int = 32 # Games played side by side
+    memory_size: int = 10000
+    batch_size: int = 64
+    lr: float = 0.001
+    gamma: float = 0.9
+    epsilon_start: float = 1.0
+    epsilon_decay: float = 0.995 # Per finished game
+    epsilon_min: float = 0.05
+    prioritized: bool = False # Prioritized replay (see PrioritizedReplayBuffer)
+    beta_start: float = 0.4
+    target_update: int = 0 # Copy brain -> target network every N updates (0 = no target network)
+    tau: float = 0.0 # Instead, blend tau of brain into the target after every update (Polyak)
+    double_dqn: bool = False # Pick the next move with the brain, score it with the target
+    n_step: int = 1
+    arch: str = "mlp" # Which Connect4Net (see ARCHS)
+    eval_every: int = 0 # Call the callback every N finished games (0 = never)
+
+# --- NEW: TARGET NETWORK ---
+# A slowly-updated copy of the brain that produces the learning targets,
+# so the brain isn't chasing its own moving guesses.
+def make_target(brain, config):
+    """The target network for this config (the brain itself if there is none)."""
+    if config.target_update > 0 or config.tau > 0:
+        target_brain = copy.deepcopy(brain)
+        target_brain.eval()
+        return target_brain
+    return brain
+
+def update_target(brain, target_brain, config, updates):
+    """Keep the target network a few steps behind the brain (call after every update)."""
+    if config.tau > 0:
+        with torch.no_grad():
+            for target_param, param in zip(target_brain.parameters(), brain.parameters()):
+                target_param.mul_(1 - config.tau).add_(param, alpha=config.tau)
+    elif config.target_update > 0 and updates % config.target_update == 0:
+        target_brain.load_state_dict(brain.state_dict())
+
+def learn_step(brain, target_brain, optimizer, memory, config, beta=0.4):
+    """One gradient step on a batch from memory. Returns the loss."""
+    # 1. Get a random batch (already stacked into tensors, e.g. 64 boards at once)
+    if config.prioritized:
+        (t_states, t_actions, t_rewards, t_next_states, t_dones,
+         indices, t_weights) = memory.sample(config.batch_size, beta)
+    else:
+        t_states, t_actions, t_rewards, t_next_states, t_dones = memory.sample(config.batch_size)
+    
+    # 2. Calculate Targets for the WHOLE BATCH at once
+    with torch.no_grad():
+        if config.double_dqn:
+            # The brain picks the best next move, the target network scores it
+            next_actions = torch.argmax(brain(t_next_states), dim=1, keepdim=True)
+            next_max = target_brain(t_next_states).gather(1, next_actions).squeeze(1)
+        else:
+            # We want the max score for each of the 64 next states
+            next_max = torch.max(target_brain(t_next_states), dim=1)[0]
+        # If game is done, future score is 0. (1 - t_dones) handles this.
+        # With n-step returns the bootstrap is n moves away, so it's discounted n times.
+        targets = t_rewards + (config.gamma ** config.n_step * next_max * (1 - t_dones))
+    
+    # 3. Calculate Predictions
+    # This gathers the Q-value for the specific action we took
+    current_q = brain(t_states).gather(1, t_actions.unsqueeze(1)).squeeze(1)
+    
+    # 4. Update
+    if config.prioritized:
+        # Weighted MSE, and the new errors become the new priorities
+        td_errors = current_q - targets
+        loss = (t_weights * td_errors ** 2).mean()
+        memory.update_priorities(indices, td_errors.detach().numpy())
+    else:
+        loss = F.mse_loss(current_q, targets)
+    optimizer.zero_grad()
+    loss.backward()
+    optimizer.step()
+    return loss.item()
+
+# We play 'num_envs' games side by side (see vec_env.py): one forward pass picks
+# the moves for all of them, and finished games restart on their own.
+def train_dqn(config=None, callback=None, **overrides):
+    """
+    Trains a brain as player 1 against a random player 2.
+    Pass a TrainConfig, or override single fields: train_dqn(episodes=500, double_dqn=True).
+    If config.eval_every is set, callback(finished_games, brain) is called that
+    often; returning True stops training early.
+    """
+    config = replace(config or TrainConfig(), **overrides)
+    brain = Connect4Net(config.arch)
+    optimizer = optim.Adam(brain.parameters(), lr=config.lr)
+    target_brain = make_target(brain, config)
+    updates = 0
     
     # --- NEW: MEMORY ---
-    memory = ReplayBuffer(10000) # Remember the last 10,000 moves
-    batch_size = 64 # Learn from 64 moves at a time
+    if config.prioritized:
+        memory = PrioritizedReplayBuffer(config.memory_size) # Learn more from surprising moves
+    else:
+        memory = ReplayBuffer(config.memory_size) # Remember the last 10,000 moves (by default)
+    batch_size = config.batch_size # Learn from 64 moves at a time
+    num_envs = config.num_envs
+    collector = NStepCollector(num_envs, config.n_step, config.gamma) if config.n_step > 1 else None
     
-    episodes = 2000 # Let's double the practice
-    epsilon = 1.0
-    decay = 0.995
-    min_epsilon = 0.05 # Let it explore a bit less eventually
+    epsilon = config.epsilon_start
     
-    print(f"Training with Replay Buffer for {episodes} games...")
+    print(f"Training with Replay Buffer for {config.episodes} games ({num_envs} at a time)...")
+
+    env = VecConnect4(num_envs)
+    state_boards = env.flat_boards().copy()
+    state = torch.from_numpy(state_boards.astype(np.float32))
+    finished = 0
+
+    while finished < config.episodes:
+        # 1. Action: the brain picks for every game at once, full columns masked out
+        legal = env.legal_mask()
+        with torch.no_grad():
+            q_values = brain(state)
+        q_values[~torch.from_numpy(legal)] = -9999
+        actions = torch.argmax(q_values, dim=1).numpy()
+        explore = np.random.random(num_envs) < epsilon
+        actions = np.where(explore, env.random_actions(legal), actions)
+
+        # 2. Play Move (we are player 1, player 2 plays randomly)
+        rewards = np.zeros(num_envs, dtype=np.float32)
+        won, draw, illegal = env.step(actions)
+        rewards[won] = 10
+        rewards[illegal] = -100
+        done = won | draw | illegal
 
-    for episode in range(episodes):
-        game = SilentConnect4()
-        state = board_to_tensor(game.board)
-        game_over = False
+        p2_won, p2_draw, _ = env.step(env.random_actions(), active=~done)
+        rewards[p2_won] = -10
+        done |= p2_won | p2_draw
+
+        # --- NEW: SAVE TO MEMORY ---
+        # We don't learn yet. We just remember (every game's move in one go).
+        if collector is None:
+            memory.push_batch(state_boards, actions, rewards, env.flat_boards(), done)
+        else:
+            ready = collector.add(state_boards, actions, rewards, env.flat_boards().copy(), done)
+            if ready is not None:
+                memory.push_batch(*ready)
+
+        # Finished games start over (their next state is a fresh board)
+        env.reset(done)
+        state_boards = env.flat_boards().copy()
+        state = torch.from_numpy(state_boards.astype(np.float32))
         
-        while not game_over:
-            # 1. Action (Same as before)
-            valid_cols = [c for c in range(game.cols) if game.board[0][c] == 0]
-            if random.random() < epsilon:
-                action = random.choice(valid_cols)
-            else:
-                with torch.no_grad():
-                    q_values = brain(state)
-                    for c in range(game.cols):
-                        if c not in valid_cols: q_values[c] = -9999
-                    action = torch.argmax(q_values).item()
-
-            # 2. Play Move
-            reward = 0
-            done = False
-            
-            # (Logic to determine reward/game_over remains the same...)
-            if game.drop_piece(action, 1): 
-                if game.check_winner(1):
-                    reward = 10
-                    done = True
-                else:
-                    p2_cols = [c for c in range(game.cols) if game.board[0][c] == 0]
-                    if not p2_cols:
-                        done = True # Draw
-                    else:
-                        p2_action = random.choice(p2_cols)
-                        game.drop_piece(p2_action, 2)
-                        if game.check_winner(2):
-                            reward = -10
-                            done = True
-                        elif not any(0 in row for row in game.board):
-                            done = True
-            else:
-                reward = -100
-                done = True
-            
-            next_state = board_to_tensor(game.board)
-
-            # --- NEW: SAVE TO MEMORY ---
-            # We don't learn yet. We just remember.
-            memory.push(state, action, reward, next_state, done)
-            
-            state = next_state
-            
-            # --- NEW: LEARN FROM MEMORY ---
-            # Only learn if we have enough examples
-            if len(memory) > batch_size:
-                # 1. Get a random batch
-                states, actions, rewards, next_states, dones = memory.sample(batch_size)
-                
-                # Convert lists to Tensors (The brain needs Tensors)
-                # stack() creates a batch (e.g., 64 boards at once)
-                t_states = torch.stack(states)
-                t_next_states = torch.stack(next_states)
-                t_rewards = torch.tensor(rewards, dtype=torch.float32)
-                t_dones = torch.tensor(dones, dtype=torch.float32)
-                t_actions = torch.tensor(actions)
-                
-                # 2. Calculate Targets for the WHOLE BATCH at once
-                with torch.no_grad():
-                    # We want the max score for each of the 64 next states
-                    next_max = torch.max(brain(t_next_states), dim=1)[0]
-                    # If game is done, future score is 0. (1 - t_dones) handles this.
-                    targets = t_rewards + (0.9 * next_max * (1 - t_dones))
-                
-                # 3. Calculate Predictions
-                # This gathers the Q-value for the specific action we took
-                current_q = brain(t_states).gather(1, t_actions.unsqueeze(1)).squeeze(1)
-                
-                # 4. Update
-                loss = loss_fn(current_q, targets)
-                optimizer.zero_grad()
-                loss.backward()
-                optimizer.step()
-
-            if done:
-                game_over = True
-
-        if epsilon > min_epsilon:
-            epsilon *= decay
-            
-        if episode % 100 == 0:
-            print(f"Episode {episode} | Epsilon: {epsilon:.2f}")
+        # --- NEW: LEARN FROM MEMORY ---
+        # Only learn if we have enough examples
+        if len(memory) > batch_size:
+            beta = config.beta_start + (1.0 - config.beta_start) * min(finished / config.episodes, 1.0)
+            learn_step(brain, target_brain, optimizer, memory, config, beta)
+            updates += 1
+            update_target(brain, target_brain, config, updates)
+
+        # Epsilon still decays once per finished game
+        for _ in range(int(done.sum())):
+            if epsilon > config.epsilon_min:
+                epsilon *= config.epsilon_decay
+            if finished % 100 == 0:
+                print(f"Episode {finished} | Epsilon: {epsilon:.2f}")
+            finished += 1
+            if callback is not None and config.eval_every and finished % config.eval_every == 0:
+                if callback(finished, brain):
+                    print("Training Complete! (stopped early)")
+                    return brain
 
     print("Training Complete!")
     return brain
 
+# --- 5. EVALUATION ---
+def brain_agent(brain, tactics=False):
+    """
+    Turns a brain into an agent(game, player) that plays its best legal move
+    (see neural_agent.NeuralAgent; tactics=True adds the one-move win/block check).
+    """
+    return NeuralAgent(brain, tactics)
+
+def win_rate(brain, opponent, games=100, tactics=False):
+    """
+    Plays 'games' games with the brain as player 1 against opponent(game, player)
+    and returns the fraction it wins.
+    """
+    agent = brain_agent(brain, tactics)
+    wins = 0
+    with contextlib.redirect_stdout(io.StringIO()): # smart_agent likes to print
+        for _ in range(games):
+            game = SilentConnect4()
+            player = 1
+            while not game.is_full():
+                move = agent(game, player) if player == 1 else opponent(game, player)
+                game.drop_piece(move, player)
+                if game.last_move_wins():
+                    wins += player == 1
+                    break
+                player = 3 - player
+    return wins / games
+
 if __name__ == "__main__":
     trained_brain = train_dqn()
     
     # Save the brain so we can use it later
-    torch.save(trained_brain.state_dict(), "connect4_brain.pth")
+    save_brain(trained_brain, "connect4_brain.pth")
     print("Brain saved to 'connect4_brain.pth'")
\ No newline at end of file
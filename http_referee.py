@@ -0,0 +1,91 @@
+import asyncio
+import time
+import httpx
+from connect4 import Connect4
+
+# --- ASYNC HTTP REFEREE ---
+# The old referee did one blocking requests.post per move with no session:
+# a new TCP (and TLS) handshake every move, and a whole server thread tied up
+# for the length of the game. Here every game is a coroutine, so one process
+# can referee hundreds at once, and each bot gets its own pooled client whose
+# connections stay open (keep-alive) between moves and between games.
+#
+# Same forfeit rules as before: a bot that errors, times out or sends an
+# illegal move loses. Two clocks per bot, like subprocess_referee.py:
+# move_timeout for one move and game_time for all of its moves together.
+
+MOVE_TIMEOUT = 2.0
+GAME_TIME = 30.0
+
+class BotClients:
+    """
+    One httpx.AsyncClient per bot URL. Each has its own connection pool, so
+    a slow bot can only use up its own connections, not everyone's.
+    """
+    def __init__(self, max_connections=32, keepalive_expiry=30.0):
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_connections,
+                                   keepalive_expiry=keepalive_expiry)
+        self.clients = {}
+
+    def get(self, url):
+        client = self.clients.get(url)
+        if client is None:
+            client = httpx.AsyncClient(base_url=url, limits=self.limits)
+            self.clients[url] = client
+        return client
+
+    async def aclose(self):
+        clients, self.clients = list(self.clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+async def ask_move(client, board, player, timeout):
+    """POST /move and return the bot's "column" (whatever type it sent)."""
+    payload = {"board": board, "you_are": player}
+    response = await asyncio.wait_for(client.post("/move", json=payload, timeout=timeout), timeout)
+    response.raise_for_status()
+    return response.json().get("column")
+
+async def play_match(p1_url, p2_url, clients, move_timeout=MOVE_TIMEOUT, game_time=GAME_TIME):
+    """
+    Returns (winner, moves, forfeit) like subprocess_referee.play_match:
+    winner 1, 2 or 0 for a draw; forfeit None or (player, reason) with reason
+    "error", "timeout", "game clock" or "illegal move".
+    """
+    game = Connect4()
+    moves = []
+    urls = {1: p1_url, 2: p2_url}
+    clocks = {1: game_time, 2: game_time}
+
+    # Game Loop (Max 42 moves)
+    for _ in range(42):
+        player = len(moves) % 2 + 1
+        budget = min(move_timeout, clocks[player])
+
+        # 1. ASK THE BOT FOR A MOVE
+        start = time.monotonic()
+        try:
+            col = await ask_move(clients.get(urls[player]), game.board, player, budget)
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            print(f"Bot {player} timed out")
+            return 3 - player, moves, (player, "game clock" if budget < move_timeout else "timeout")
+        except Exception as e:
+            print(f"Bot {player} crashed: {e}")
+            return 3 - player, moves, (player, "error") # Opponent wins
+        clocks[player] -= time.monotonic() - start
+
+        # 2. VALIDATE MOVE
+        if not isinstance(col, int) or not game.is_valid_location(col):
+            print(f"Bot {player} made illegal move: {col}")
+            return 3 - player, moves, (player, "illegal move") # Opponent wins
+
+        # 3. UPDATE BOARD
+        moves.append(col)
+        game.drop_piece(col, player)
+
+        # 4. CHECK WIN (only the lines through the piece that just landed)
+        if game.last_move_wins():
+            return player, moves, None
+
+    return 0, moves, None # Draw
@@ -1,101 +1,88 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Form, Request
 from fastapi.responses import HTMLResponse
-import sqlite3
-import requests
+from typing import Optional
+import asyncio
+import os
 import uuid
 import random
+import ratings
+import schema
+import storage
+from http_referee import BotClients, play_match
+from scheduler import POLICIES, Scheduler
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await SCHEDULER.stop(wait=False) # Abandon scheduled games in flight (unrecorded)
+    await BOT_CLIENTS.aclose() # Close the bots' pooled connections on shutdown
+    storage.close_all() # Commit queued results, close the database connections
+
+app = FastAPI(lifespan=lifespan)
 
 # --- CONFIGURATION ---
 DB_FILE = "league.db"
-
-# --- ELO MATH ---
-def calculate_elo(winner_elo, loser_elo):
-    k_factor = 32
-    expected_score = 1 / (1 + 10 ** ((loser_elo - winner_elo) / 400))
-    # Winner gains, loser drops
-    change = round(k_factor * (1 - expected_score))
-    return change
+RATING_SYSTEM = os.environ.get("RATING_SYSTEM", "glicko2") # "elo", "glicko2" or "trueskill" (see ratings.py)
 
 # Setup DB (Stores URLs instead of files now)
+# Reads borrow a connection from storage.pool(DB_FILE); writes go through
+# storage.writer(DB_FILE), which commits them in batches (see storage.py).
 def init_db():
-    with sqlite3.connect(DB_FILE) as conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS bots (
-                id TEXT PRIMARY KEY, 
-                name TEXT, 
-                url TEXT,  -- The API Address
-                elo INTEGER DEFAULT 1200, 
-                wins INTEGER DEFAULT 0, 
-                losses INTEGER DEFAULT 0
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS matches (
-                id TEXT PRIMARY KEY, 
-                p1_id TEXT, 
-                p2_id TEXT, 
-                winner_id TEXT, 
-                moves TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+    conn = storage.connect(DB_FILE)
+    schema.migrate(conn) # Tables and indexes, see schema.py
+    conn.close()
+    with storage.pool(DB_FILE).connection() as conn:
+        # First start, or RATING_SYSTEM changed: rate the whole history again
+        if ratings.stored_system(conn) != RATING_SYSTEM:
+            recompute_ratings(conn, RATING_SYSTEM)
+
+def recompute_ratings(conn, system):
+    rows = conn.execute("SELECT p1_id, p2_id, winner_id FROM matches ORDER BY timestamp, rowid").fetchall()
+    return ratings.recompute(conn, system, rows)
+
 init_db()
 
 # --- THE GAME ENGINE (The Referee) ---
-def play_match(p1_url, p2_url):
-    board = [[0]*7 for _ in range(6)] # 6 rows, 7 cols
-    moves = []
-    
-    players = [
-        {"id": 1, "url": p1_url},
-        {"id": 2, "url": p2_url}
-    ]
-    
-    # Game Loop (Max 42 moves)
-    for _ in range(42):
-        current_player = players[len(moves) % 2]
-        
-        # 1. ASK THE BOT FOR A MOVE
-        try:
-            payload = {
-                "board": board,
-                "you_are": current_player["id"] # 1 or 2
-            }
-            # Timeout is critical! Don't let them stall forever.
-            response = requests.post(f"{current_player['url']}/move", json=payload, timeout=2.0)
-            col = response.json().get("column")
-        except Exception as e:
-            print(f"Bot {current_player['id']} crashed or timed out: {e}")
-            return (2 if current_player["id"] == 1 else 1), moves # Opponent wins
-
-        # 2. VALIDATE MOVE
-        if col is None or not (0 <= col < 7) or board[0][col] != 0:
-            print(f"Bot {current_player['id']} made illegal move: {col}")
-            return (2 if current_player["id"] == 1 else 1), moves # Opponent wins
-            
-        # 3. UPDATE BOARD
-        moves.append(col)
-        for r in range(5, -1, -1):
-            if board[r][col] == 0:
-                board[r][col] = current_player["id"]
-                break
-        
-        # 4. CHECK WIN (Simplified vertical check for brevity - add full logic later)
-        # (You should add full connect-4 logic here)
+# Games are played by http_referee.play_match: async, so a game waiting on a
+# slow bot doesn't hold up the server, with keep-alive connections per bot.
+BOT_CLIENTS = BotClients()
+
+def load_bots():
+    with storage.pool(DB_FILE).connection() as conn:
+        return conn.execute("SELECT id, url, name, elo, wins, losses FROM bots").fetchall()
+
+def save_match(conn, p1_id, p2_id, winner_id, moves):
+    # Record Match
+    conn.execute("INSERT INTO matches (id, p1_id, p2_id, winner_id, moves) VALUES (?, ?, ?, ?, ?)",
+                (str(uuid.uuid4()), p1_id, p2_id, winner_id, schema.encode_moves(moves)))
     
-    return 0, moves # Draw
+    # Update Ratings (from the current ones, not the ones p1/p2 were loaded with) and Stats
+    return ratings.record_game(conn, RATING_SYSTEM, p1_id, p2_id, winner_id)
+
+def record_match(p1, p2, winner_local_id, moves):
+    """
+    Queue a finished game between two bots rows for the next batch commit.
+    Returns a Future with p1's rating change.
+    """
+    p1_id, p2_id = p1[0], p2[0]
+    winner_id = p1_id if winner_local_id == 1 else p2_id if winner_local_id == 2 else None # None: draw
+    return storage.writer(DB_FILE).submit(save_match, p1_id, p2_id, winner_id, moves)
+
+# --- THE SCHEDULER (matches in the background, see scheduler.py) ---
+SCHEDULER = Scheduler(load_bots, lambda p1_url, p2_url: play_match(p1_url, p2_url, BOT_CLIENTS), record_match)
 
 # --- WEB ROUTES ---
 
 @app.get("/")
 def home():
-    with sqlite3.connect(DB_FILE) as conn:
-        bots = conn.execute("SELECT id, name, url, elo FROM bots ORDER BY elo DESC").fetchall()
+    with storage.pool(DB_FILE).connection() as conn:
+        bots = conn.execute("""SELECT id, name, url, elo, deviation FROM bots
+                               LEFT JOIN ratings ON ratings.bot_id = bots.id ORDER BY elo DESC""").fetchall()
         matches = conn.execute("SELECT id, winner_id, moves FROM matches ORDER BY timestamp DESC LIMIT 5").fetchall()
     
-    bot_list = "".join([f"<li><b>{b[1]}</b> ({b[3]}) <br><small>{b[2]}</small></li>" for b in bots])
+    bot_list = "".join([f"<li><b>{b[1]}</b> ({b[3]}{f' ± {b[4]:.0f}' if b[4] else ''}) <br><small>{b[2]}</small></li>"
+                        for b in bots])
     
     return HTMLResponse(f"""
     <h1>🏆 The API Arena</h1>
@@ -123,55 +110,67 @@ def home():
 def register(name: str = Form(...), url: str = Form(...)):
     # Remove trailing slash to avoid double //
     url = url.rstrip("/")
-    with sqlite3.connect(DB_FILE) as conn:
-        conn.execute("INSERT INTO bots (id, name, url) VALUES (?, ?, ?)", 
-                    (str(uuid.uuid4()), name, url))
+    storage.writer(DB_FILE).submit(
+        lambda conn: conn.execute("INSERT INTO bots (id, name, url) VALUES (?, ?, ?)", 
+                                  (str(uuid.uuid4()), name, url))).result()
     return HTMLResponse("<script>window.location.href='/'</script>")
 
+@app.get("/bots/{bot_id}/matches")
+def bot_matches(bot_id: str, limit: int = 20):
+    with storage.pool(DB_FILE).connection() as conn:
+        rows = schema.bot_history(conn, bot_id, min(limit, 200))
+    return [{"id": r[0], "p1_id": r[1], "p2_id": r[2], "winner_id": r[3], "moves": r[4], "timestamp": r[5]}
+            for r in rows]
+
 @app.post("/fight")
-def fight():
-    with sqlite3.connect(DB_FILE) as conn:
-        bots = conn.execute("SELECT id, url, name, elo FROM bots").fetchall()
+async def fight():
+    bots = load_bots()
     
     if len(bots) < 2:
         return HTMLResponse("Need at least 2 bots! <a href='/'>Back</a>")
     
     # Pick 2 random fighters
     p1, p2 = random.sample(bots, 2)
-    p1_id, p1_url, p1_name, p1_elo = p1
-    p2_id, p2_url, p2_name, p2_elo = p2
+    p1_name, p2_name = p1[2], p2[2]
     
     # Run the Match
-    winner_local_id, moves = play_match(p1_url, p2_url)
-    
-    # Determine Winner/Loser
-    if winner_local_id == 0:
-        winner_id = None # Draw
-        change = 0
-    elif winner_local_id == 1:
-        winner_id = p1_id
-        change = calculate_elo(p1_elo, p2_elo)
-    else:
-        winner_id = p2_id
-        change = calculate_elo(p2_elo, p1_elo)
-
-    # Save to Database
-    with sqlite3.connect(DB_FILE) as conn:
-        # Record Match
-        conn.execute("INSERT INTO matches (id, p1_id, p2_id, winner_id, moves) VALUES (?, ?, ?, ?, ?)",
-                    (str(uuid.uuid4()), p1_id, p2_id, winner_id, str(moves)))
-        
-        # Update Stats
-        if winner_local_id == 1:
-            conn.execute("UPDATE bots SET elo = elo + ?, wins = wins + 1 WHERE id = ?", (change, p1_id))
-            conn.execute("UPDATE bots SET elo = elo - ?, losses = losses + 1 WHERE id = ?", (change, p2_id))
-        elif winner_local_id == 2:
-            conn.execute("UPDATE bots SET elo = elo + ?, wins = wins + 1 WHERE id = ?", (change, p2_id))
-            conn.execute("UPDATE bots SET elo = elo - ?, losses = losses + 1 WHERE id = ?", (change, p1_id))
+    winner_local_id, moves, forfeit = await play_match(p1[1], p2[1], BOT_CLIENTS)
+    change = await asyncio.wrap_future(record_match(p1, p2, winner_local_id, moves))
             
     return HTMLResponse(f"""
         <h1>Match Over!</h1>
         <p>Winner: {p1_name if winner_local_id == 1 else (p2_name if winner_local_id==2 else 'Draw')}</p>
-        <p>ELO Change: ±{change}</p>
+        <p>Rating Change: {p1_name} {change:+.0f}</p>
         <a href='/'>Back to Leaderboard</a>
-    """)
\ No newline at end of file
+    """)
+
+# Keep matches going in the background, e.g.
+#   curl -X POST "localhost:8000/scheduler/start?policy=swiss&concurrency=16"
+@app.post("/scheduler/start")
+async def scheduler_start(policy: str = "elo", concurrency: int = 8, per_bot: Optional[int] = None):
+    if policy not in POLICIES:
+        return {"error": f"policy must be one of {POLICIES}"}
+    if SCHEDULER.running:
+        await SCHEDULER.stop()
+    SCHEDULER.start(policy, concurrency, per_bot)
+    return SCHEDULER.status()
+
+@app.post("/scheduler/stop")
+async def scheduler_stop():
+    await SCHEDULER.stop() # Lets the games in flight finish and get recorded
+    return SCHEDULER.status()
+
+@app.get("/scheduler/status")
+def scheduler_status():
+    return SCHEDULER.status()
+
+# Switch rating systems, or re-rate after fixing bad results, without replaying games
+@app.post("/ratings/recompute")
+def ratings_recompute(system: Optional[str] = None):
+    global RATING_SYSTEM
+    system = system or RATING_SYSTEM
+    if system not in ratings.SYSTEMS:
+        return {"error": f"system must be one of {ratings.SYSTEMS}"}
+    states = storage.writer(DB_FILE).submit(recompute_ratings, system).result()
+    RATING_SYSTEM = system
+    return {"system": system, "bots": len(states)}
@@ -0,0 +1,279 @@
+import argparse
+import sys
+import time
+import numpy as np
+from connect4 import COLS, ROWS, Connect4
+from neural_agent import NeuralAgent, perspective
+
+# --- MONTE CARLO TREE SEARCH WITH THE BRAIN ---
+# minimax_agent searches but knows nothing; the brain knows something but
+# doesn't search. MCTS does both: it grows a tree of moves, guided by the
+# brain's opinion of each position, and plays the move it explored most.
+#
+# Our brains are Q-networks (no separate policy/value heads), so:
+#   prior of a move       = softmax(Q / temperature) over the legal moves
+#   value of a position   = tanh(max legal Q / value_scale), for the player to move
+#
+# Speed tricks:
+#   * The tree lives in NumPy arrays (one slot per node), not Python objects.
+#   * Leaves are collected in batches and the brain scores a whole batch in
+#     ONE forward pass. "Virtual loss" makes a path look worse while it's
+#     waiting for its evaluation, so the next descent in the batch tries
+#     something else instead of the same leaf.
+#   * After a move, the subtree below it is kept for the next search.
+#
+# As a stdin/stdout bot (like submission.py):
+#   python mcts.py --playouts 800 --brain connect4_brain.npz
+
+UNVISITED = -1
+
+class MCTS:
+    """
+    search(game, player) -> (column, stats). 'brain' is anything NeuralAgent
+    takes (a Connect4Net or a numpy_net.NumpyNet).
+    Stops after 'playouts' playouts or 'time_limit' seconds, whichever comes first
+    (either can be None).
+    """
+    def __init__(self, brain, playouts=800, time_limit=None, batch_size=16, c_puct=1.5,
+                 virtual_loss=1.0, temperature=2.0, value_scale=10.0, capacity=2**18):
+        self.net = NeuralAgent(brain, tactics=False)
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.c_puct = c_puct
+        self.virtual_loss = virtual_loss
+        self.temperature = temperature
+        self.value_scale = value_scale
+        self.capacity = capacity
+        self._allocate(capacity)
+        self.reset()
+
+    # --- THE TREE ---
+    # Node i: its move, its parent, where its children start (they are
+    # allocated together, one per legal column, UNVISITED until expanded),
+    # and visit counts / total value. value_sum is from the point of view of
+    # the player who MADE the move into the node, which is what its parent
+    # wants to maximise.
+    def _allocate(self, capacity):
+        self.children = np.full((capacity, COLS), UNVISITED, dtype=np.int32) # Slot of the child per column
+        self.first_child = np.zeros(capacity, dtype=np.int32) # Children sit in consecutive slots,
+        self.child_count = np.zeros(capacity, dtype=np.int32) # so selection can use cheap slices
+        self.parent = np.full(capacity, UNVISITED, dtype=np.int32)
+        self.move = np.zeros(capacity, dtype=np.int8)
+        self.prior = np.zeros(capacity, dtype=np.float32)
+        self.visits = np.zeros(capacity, dtype=np.float32)
+        self.value_sum = np.zeros(capacity, dtype=np.float32)
+        self.in_flight = np.zeros(capacity, dtype=np.float32) # Virtual visits
+        self.expanded = np.zeros(capacity, dtype=bool)
+        self.terminal = np.full(capacity, np.nan, dtype=np.float32) # Value for the player to move, if the game is over
+
+    def reset(self):
+        """Forget the whole tree."""
+        self._clear(slice(0, getattr(self, "size", self.capacity)))
+        self.size = 1
+        self.root_board = None
+
+    def _clear(self, nodes):
+        self.children[nodes] = UNVISITED
+        self.first_child[nodes] = 0
+        self.child_count[nodes] = 0
+        self.parent[nodes] = UNVISITED
+        self.prior[nodes] = 0
+        self.visits[nodes] = 0
+        self.value_sum[nodes] = 0
+        self.in_flight[nodes] = 0
+        self.expanded[nodes] = False
+        self.terminal[nodes] = np.nan
+
+    def _reroot(self, node):
+        """Keep only the subtree under 'node', packed into the front of the arrays."""
+        order = [int(node)]
+        for index in order: # Breadth-first; the list grows while we walk it
+            first = int(self.first_child[index])
+            order.extend(range(first, first + int(self.child_count[index])))
+        order = np.array(order, dtype=np.int32)
+        remap = np.full(self.size, UNVISITED, dtype=np.int32)
+        remap[order] = np.arange(len(order), dtype=np.int32)
+
+        children = self.children[order]
+        self.children[:len(order)] = np.where(children == UNVISITED, UNVISITED, remap[children])
+        # Breadth-first order keeps every node's children next to each other
+        counts = self.child_count[order]
+        firsts = np.where(counts > 0, self.first_child[order], node)
+        self.first_child[:len(order)] = np.where(counts > 0, remap[firsts], 0)
+        self.child_count[:len(order)] = counts
+        parents = self.parent[order]
+        self.parent[:len(order)] = np.where(parents == UNVISITED, UNVISITED, remap[np.maximum(parents, 0)])
+        self.parent[0] = UNVISITED
+        for array in (self.move, self.prior, self.visits, self.value_sum, self.expanded, self.terminal):
+            array[:len(order)] = array[order]
+        self.in_flight[:len(order)] = 0
+        self._clear(slice(len(order), self.size))
+        self.size = len(order)
+
+    def _advance(self, board, player):
+        """
+        Reuse the tree if 'board' is the last root plus a move or two (ours and
+        the opponent's). Works from the board alone, so it also works for the
+        stdin bot, which never sees the move list.
+        """
+        old = self.root_board
+        if old is None:
+            return self.reset()
+        changed = np.flatnonzero(board != old)
+        if len(changed) > 2 or (old[changed] != 0).any():
+            return self.reset()
+        # Who moved: the player to move at the old root went first
+        old_player = player if len(changed) % 2 == 0 else 3 - player
+        moves = sorted(changed, key=lambda cell: board[cell] != old_player)
+        if [board[cell] for cell in moves] != [old_player, 3 - old_player][:len(moves)]:
+            return self.reset()
+        node = 0
+        for cell in moves:
+            col = cell % COLS
+            if not self.expanded[node] or self.children[node, col] == UNVISITED:
+                return self.reset()
+            node = self.children[node, col]
+        if node != 0:
+            self._reroot(node)
+
+    # --- ONE BATCH OF PLAYOUTS ---
+    def _select_child(self, node):
+        first = self.first_child[node]
+        kids = slice(first, first + self.child_count[node])
+        in_flight = self.in_flight[kids]
+        visits = self.visits[kids] + in_flight
+        # A virtual visit counts as a loss until the real value comes back
+        q = (self.value_sum[kids] - self.virtual_loss * in_flight) / np.maximum(visits, 1)
+        parent_visits = self.visits[node] + self.in_flight[node]
+        u = self.c_puct * self.prior[kids] * np.sqrt(parent_visits + 1) / (1 + visits)
+        return int(first + np.argmax(q + u))
+
+    def _backup(self, path, value):
+        """'value' is for the player to move at the end of 'path'; flip it on the way up."""
+        for node in reversed(path):
+            value = -value
+            self.visits[node] += 1
+            self.value_sum[node] += value
+        self.in_flight[path] -= 1
+
+    def _run_batch(self, game, player, count):
+        leaves = [] # (path, board seen by the mover, legal mask)
+        for _ in range(count):
+            node, mover, path = 0, player, [0]
+            while self.expanded[node] and np.isnan(self.terminal[node]):
+                node = self._select_child(node)
+                game.drop_piece(int(self.move[node]), mover)
+                mover = 3 - mover
+                path.append(node)
+                if game.last_move_wins():
+                    self.terminal[node] = -1.0 # The player to move here has lost
+                elif game.is_full():
+                    self.terminal[node] = 0.0
+            self.in_flight[path] += 1
+
+            if not np.isnan(self.terminal[node]):
+                self._backup(path, float(self.terminal[node]))
+            elif any(leaf[0][-1] == node for leaf in leaves):
+                self.in_flight[path] -= 1 # Same leaf twice in one batch: drop this descent
+            else:
+                board = np.array(game.board, dtype=np.int8).reshape(-1)
+                leaves.append((path, perspective(board, mover), board[:COLS] == 0))
+            for _ in range(len(path) - 1):
+                game.undo_move()
+
+        if not leaves:
+            return 0
+        # ONE forward pass for the whole batch
+        boards = np.stack([leaf[1] for leaf in leaves])
+        q_values = self.net.q_values(boards)
+        for (path, _, legal), q in zip(leaves, q_values):
+            node = path[-1]
+            cols = np.flatnonzero(legal)
+            logits = q[cols] / self.temperature
+            priors = np.exp(logits - logits.max())
+            start = self.size
+            if start + len(cols) > self.capacity:
+                raise MemoryError("MCTS tree is full (raise capacity)")
+            self.children[node, cols] = np.arange(start, start + len(cols))
+            self.first_child[node] = start
+            self.child_count[node] = len(cols)
+            self.parent[start:start + len(cols)] = node
+            self.move[start:start + len(cols)] = cols
+            self.prior[start:start + len(cols)] = priors / priors.sum()
+            self.size += len(cols)
+            self.expanded[node] = True
+            self._backup(path, float(np.tanh(q[cols].max() / self.value_scale)))
+        return len(leaves)
+
+    def search(self, game, player):
+        """Runs the playouts from this position and returns (column, stats)."""
+        start = time.perf_counter()
+        board = np.array(game.board, dtype=np.int8).reshape(-1)
+        self._advance(board, player)
+        self.root_board = board
+        reused = int(self.visits[0])
+        if self.size + COLS * self.batch_size * 2 > self.capacity:
+            self.reset()
+            self.root_board = board
+
+        playouts = batches = evaluated = 0
+        if not self.expanded[0]:
+            # Always expand the root, even with no time or room left: without
+            # its children there are no visits to pick from, and argmax would
+            # say column 0 whether or not it's full
+            evaluated += self._run_batch(game, player, 1)
+            playouts = batches = 1
+        target = self.playouts if self.playouts is not None else float("inf")
+        while playouts < target:
+            if self.time_limit is not None and time.perf_counter() - start >= self.time_limit:
+                break
+            if self.size + COLS * self.batch_size > self.capacity:
+                break # Out of room for this move; play what we have
+            count = int(min(self.batch_size, target - playouts))
+            evaluated += self._run_batch(game, player, count)
+            playouts += count
+            batches += 1
+
+        children = self.children[0]
+        legal = children != UNVISITED
+        visits = np.where(legal, self.visits[np.maximum(children, 0)], -1)
+        col = int(np.argmax(visits))
+        stats = {"playouts": playouts, "reused_visits": reused, "batches": batches,
+                 "evaluated": evaluated, "nodes": self.size, "time": time.perf_counter() - start,
+                 "visits": visits.tolist()}
+        return col, stats
+
+def mcts_agent(searcher):
+    """Turns an MCTS into an agent(game, player), e.g. for win_rate or bench_tactics."""
+    def agent(game, player):
+        return searcher.search(game, player)[0]
+    return agent
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MCTS bot (stdin/stdout protocol)")
+    parser.add_argument("--brain", default="connect4_brain.npz")
+    parser.add_argument("--playouts", type=int, default=800)
+    parser.add_argument("--time", type=float, default=None, help="Seconds per move (instead of / as well as playouts)")
+    parser.add_argument("--batch", type=int, default=16)
+    args = parser.parse_args()
+
+    from numpy_net import NumpyNet # No torch needed to play
+    searcher = MCTS(NumpyNet(args.brain), args.playouts, args.time, args.batch)
+
+    # Standard Input Loop
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break # End of game
+        line = line.strip()
+        if line == "RESET": # New game (see bot_pool.py)
+            searcher.reset()
+            continue
+        if len(line) != ROWS * COLS:
+            continue # Ignore garbage inputs
+        board = np.frombuffer(line.encode(), dtype=np.uint8) - ord("0")
+        game = Connect4.from_board(board.reshape(ROWS, COLS))
+        player = 1 if line.count("1") == line.count("2") else 2
+        print(searcher.search(game, player)[0])
+        sys.stdout.flush()
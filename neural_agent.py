@@ -0,0 +1,89 @@
+import numpy as np
+from connect4 import COLS, H1, ROWS, Connect4
+
+# --- NEURAL AGENT ---
+# One wrapper for playing a brain, instead of a slightly different loop in
+# every script. Before asking the network it:
+#   1. masks full columns (so it can never forfeit with an illegal move), and
+#   2. checks one move ahead with the bitboard engine: take a win if there is
+#      one, otherwise block the opponent's win if there is one.
+# The brain can be a torch Connect4Net or a numpy_net.NumpyNet; both take flat
+# boards seen by the player to move (1 = me, 2 = them).
+
+# Bit of the top cell of every column (a column is full when it's taken)
+TOP_BITS = np.array([col * H1 + ROWS - 1 for col in range(COLS)], dtype=np.uint64)
+
+def parse_board(board_string):
+    """The 42-digit protocol string -> (flat int8 board, player to move)."""
+    board = np.frombuffer(board_string.encode(), dtype=np.uint8).astype(np.int8) - ord("0")
+    # Player 1 always starts, so with equal piece counts it's 1's turn
+    player = 1 if board_string.count("1") == board_string.count("2") else 2
+    return board, player
+
+def legal_mask(boards):
+    """(7,) or (N, 7) bool from flat boards (row 0 = top): a column is legal while its top cell is empty."""
+    boards = np.asarray(boards)
+    return boards[..., :COLS] == 0
+
+def bitboard_legal_mask(own, opponent):
+    """The same from bitboards (ints or arrays of them)."""
+    occupied = np.asarray(own, dtype=np.uint64) | np.asarray(opponent, dtype=np.uint64)
+    return ((occupied[..., None] >> TOP_BITS) & np.uint64(1)) == 0
+
+def perspective(board, player):
+    """Flat board as seen by 'player': their pieces 1, the opponent's 2."""
+    board = np.asarray(board, dtype=np.int8).reshape(-1)
+    return np.where(board == 0, 0, np.where(board == player, 1, 2)).astype(np.int8)
+
+def tactical_move(game, player):
+    """A column that wins now, else one that blocks the opponent's win now, else None."""
+    legal = [col for col in range(game.cols) if game.heights[col] < game.rows]
+    for who in (player, 3 - player):
+        for col in legal:
+            if game.winning_move(col, who):
+                return col
+    return None
+
+class NeuralAgent:
+    """
+    agent = NeuralAgent(brain) plays like any other agent: agent(game, player).
+    agent.move_from_string(line) answers the stdin bot protocol directly.
+    tactics=False skips the one-move check (pure network + legality mask).
+    self.counts records how each move was chosen ("win/block" or "net").
+    """
+    def __init__(self, brain, tactics=True):
+        self.brain = brain
+        self.tactics = tactics
+        self.counts = {"win/block": 0, "net": 0}
+        self._torch = None
+        if hasattr(brain, "parameters"): # A torch module (imported only if we were given one)
+            import torch
+            self._torch = torch
+
+    def q_values(self, boards):
+        """Q-values as a NumPy array for perspective boards (42,) or (N, 42)."""
+        if self._torch is None:
+            return np.asarray(self.brain(boards))
+        with self._torch.no_grad():
+            return self.brain(self._torch.from_numpy(np.asarray(boards, dtype=np.float32))).numpy()
+
+    def choose(self, game, player, board=None):
+        """Best column for 'player' ('board' is game.board already flattened, if we have it)."""
+        if self.tactics:
+            col = tactical_move(game, player)
+            if col is not None:
+                self.counts["win/block"] += 1
+                return col
+        if board is None:
+            board = np.array(game.board, dtype=np.int8).reshape(-1)
+        q_values = np.where(legal_mask(board), self.q_values(perspective(board, player)), -np.inf)
+        self.counts["net"] += 1
+        return int(np.argmax(q_values))
+
+    def __call__(self, game, player):
+        return self.choose(game, player)
+
+    def move_from_string(self, board_string):
+        board, player = parse_board(board_string)
+        game = Connect4.from_board(board.reshape(ROWS, COLS)) if self.tactics else None
+        return self.choose(game, player, board)
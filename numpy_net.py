@@ -0,0 +1,76 @@
+import sys
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# --- TORCH-FREE INFERENCE ---
+# A trained Connect4Net is a handful of small matrices. Importing torch to
+# multiply them costs seconds per bot process and ~50us of framework overhead
+# per move, so for playing we export the weights to a plain .npz and run the
+# forward pass in NumPy (mlp and conv, one board or a whole batch).
+#
+#   python numpy_net.py connect4_brain.pth connect4_brain.npz
+
+def export_npz(brain, path="connect4_brain.npz"):
+    """
+    Writes a Connect4Net (or the path of a .pth checkpoint) as a flat .npz:
+    "arch" plus one float32 array per weight, named like the state_dict.
+    """
+    if isinstance(brain, str):
+        from dqn_agent import load_brain # Only the exporter needs torch
+        brain = load_brain(brain)
+    arrays = {name: tensor.detach().cpu().numpy().astype(np.float32)
+              for name, tensor in brain.state_dict().items()}
+    np.savez(path, arch=np.array(brain.arch), **arrays)
+
+class NumpyNet:
+    """
+    The forward pass of an exported Connect4Net.
+    Input: flat boards (42,) or (N, 42), 0 empty / 1 me / 2 them, like the torch net.
+    Output: Q-values (7,) or (N, 7).
+    """
+    def __init__(self, path="connect4_brain.npz"):
+        with np.load(path) as data:
+            self.arch = str(data["arch"])
+            weights = {name: data[name] for name in data.files if name != "arch"}
+        if self.arch == "mlp":
+            # Stored as (out, in) like nn.Linear; transpose once so forward is x @ W
+            self.layers = [(weights[f"fc{i}.weight"].T.copy(), weights[f"fc{i}.bias"]) for i in (1, 2, 3)]
+        else:
+            # Convolutions become (in * 3 * 3, out) matrices for the im2col matmul
+            self.convs = []
+            for name in ("conv1", "conv2"):
+                weight = weights[f"{name}.weight"] # (out, in, 3, 3)
+                self.convs.append((weight.reshape(len(weight), -1).T.copy(), weights[f"{name}.bias"]))
+            # The torch head reads channels-first (C, 6, 7); we keep boards as
+            # (6, 7, C), so reorder its columns once here
+            head = weights["head.weight"]
+            channels = self.convs[-1][0].shape[1]
+            self.head = head.reshape(7, channels, 6, 7).transpose(0, 2, 3, 1).reshape(7, -1).T.copy()
+            self.head_bias = weights["head.bias"]
+
+    def __call__(self, boards):
+        boards = np.asarray(boards, dtype=np.float32)
+        single = boards.ndim == 1
+        x = boards.reshape(-1, 42)
+        if self.arch == "mlp":
+            for i, (weight, bias) in enumerate(self.layers):
+                x = x @ weight + bias
+                if i < 2:
+                    np.maximum(x, 0, out=x)
+        else:
+            x = x.reshape(-1, 6, 7, 1)
+            x = np.concatenate([x == 1, x == 2, x == 0], axis=3).astype(np.float32)
+            for weight, bias in self.convs:
+                # im2col: every cell's 3x3 neighbourhood (zero-padded) as one row
+                padded = np.pad(x, ((0, 0), (1, 1), (1, 1), (0, 0)))
+                patches = sliding_window_view(padded, (3, 3), axis=(1, 2)) # (N, 6, 7, C, 3, 3)
+                x = patches.reshape(len(x), 6, 7, -1) @ weight + bias
+                np.maximum(x, 0, out=x)
+            x = x.reshape(len(x), -1) @ self.head + self.head_bias
+        return x[0] if single else x
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else "connect4_brain.pth"
+    target = sys.argv[2] if len(sys.argv) > 2 else "connect4_brain.npz"
+    export_npz(source, target)
+    print(f"Exported '{source}' to '{target}'")
@@ -0,0 +1,172 @@
+import mmap
+import os
+import struct
+from collections import OrderedDict
+from connect4 import mirror_key
+
+# --- FILE FORMAT ---
+# A header, then every position key sorted (8 bytes each), then one byte per
+# key with the column to play. Keys are Connect4.key() of the position or of
+# its mirror image, whichever is smaller, so each position is stored once.
+MAGIC = b"C4BK"
+VERSION = 1
+HEADER = struct.Struct("<4sII") # magic, version, number of entries
+
+# SolvedCache files use the same header (different magic), then one record per
+# position: canonical key, column, score.
+SOLVED_MAGIC = b"C4SV"
+SOLVED_RECORD = struct.Struct("<QBq")
+
+def side_to_move(game):
+    """Player 1 always starts, so the piece count says whose turn it is."""
+    return 1 if len(game.history) % 2 == 0 else 2
+
+def canonical_key(game):
+    """Returns (key, mirrored) where 'mirrored' means the key is of the flipped board."""
+    key = game.key()
+    flipped = mirror_key(key)
+    if flipped < key:
+        return flipped, True
+    return key, False
+
+def write_book(path, entries):
+    """
+    entries: dict of canonical key -> column.
+    Writes to a temp file first so a reader never sees half a book.
+    """
+    keys = sorted(entries)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(keys)))
+        f.write(struct.pack(f"<{len(keys)}Q", *keys))
+        f.write(bytes(entries[k] for k in keys))
+    os.replace(tmp_path, path)
+
+class OpeningBook:
+    """
+    A read-only, memory-mapped book built by build_book.py.
+    Loading is instant (the OS pages the file in as it's used) and a lookup is
+    a binary search over the sorted keys.
+    """
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+        self.keys_offset = HEADER.size
+        self.moves_offset = self.keys_offset + 8 * self.count
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self.count
+
+    def find(self, key):
+        """Returns the stored column for a canonical key, or None."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key = struct.unpack_from("<Q", self.data, self.keys_offset + 8 * mid)[0]
+            if mid_key < key:
+                lo = mid + 1
+            elif mid_key > key:
+                hi = mid
+            else:
+                return self.data[self.moves_offset + mid]
+        return None
+
+    def lookup(self, game, player):
+        """
+        Returns (column, score) if the book knows this position, else None.
+        Book moves don't carry a score, so it's always 0.
+        """
+        if player != side_to_move(game):
+            return None
+        key, mirrored = canonical_key(game)
+        col = self.find(key)
+        if col is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if mirrored:
+            col = game.cols - 1 - col
+        return (col, 0)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+class SolvedCache:
+    """
+    Remembers positions near the end of the game that a search solved exactly
+    (searched to the last move, or found a forced win/loss).
+    Only positions with at most 'max_empty' empty cells are kept, and once
+    'max_entries' is reached the least recently used one is dropped.
+    With a 'path', the cache is loaded from that file (if it exists) and
+    save() writes it back, so solved positions survive between processes.
+    """
+    def __init__(self, max_empty=16, max_entries=100000, path=None):
+        self.max_empty = max_empty
+        self.max_entries = max_entries
+        self.path = path
+        self.entries = OrderedDict() # canonical key -> (column, score)
+        self.hits = 0
+        self.misses = 0
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def load(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, count = HEADER.unpack_from(data, 0)
+        if magic != SOLVED_MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} solved-position cache")
+        for key, col, score in SOLVED_RECORD.iter_unpack(data[HEADER.size:HEADER.size + count * SOLVED_RECORD.size]):
+            self.entries[key] = (col, score)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def save(self, path=None):
+        path = path or self.path
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(SOLVED_MAGIC, VERSION, len(self.entries)))
+            for key, (col, score) in self.entries.items():
+                f.write(SOLVED_RECORD.pack(key, col, score))
+        os.replace(tmp_path, path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _empty_cells(self, game):
+        return game.rows * game.cols - len(game.history)
+
+    def lookup(self, game, player):
+        if player != side_to_move(game) or self._empty_cells(game) > self.max_empty:
+            return None
+        key, mirrored = canonical_key(game)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        col, score = entry
+        if mirrored:
+            col = game.cols - 1 - col
+        return (col, score)
+
+    def store(self, game, player, col, score):
+        if player != side_to_move(game) or self._empty_cells(game) > self.max_empty:
+            return
+        key, mirrored = canonical_key(game)
+        if mirrored:
+            col = game.cols - 1 - col
+        self.entries[key] = (col, score)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
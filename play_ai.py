@@ -1,7 +1,7 @@
-import torch
 import random
 from connect4 import Connect4
-from dqn_agent import Connect4Net, board_to_tensor
+from dqn_agent import load_brain
+from neural_agent import NeuralAgent
 
 def human_agent(game):
     """Same human agent from before"""
@@ -21,15 +21,15 @@ def human_agent(game):
 
 def play_game():
     # 1. LOAD THE BRAIN
-    model = Connect4Net()
     try:
-        model.load_state_dict(torch.load("connect4_brain.pth"))
-        print("Brain loaded successfully!")
+        model = load_brain("connect4_brain.pth") # Builds the right arch for the checkpoint
+        print(f"Brain loaded successfully! ({model.arch})")
     except FileNotFoundError:
         print("Error: Could not find 'connect4_brain.pth'. Did you run training?")
         return
 
     model.eval() # Important: Switch to 'Evaluation Mode' (No learning, just predicting)
+    ai = NeuralAgent(model)
 
     # 2. SETUP GAME
     game = Connect4()
@@ -47,18 +47,9 @@ def play_game():
         if current_player == 1:
             # --- AI TURN ---
             print("AI is thinking...")
-            state = board_to_tensor(game.board)
-            with torch.no_grad(): # Don't calculate gradients (saves memory)
-                q_values = model(state)
-                
-                # Filter out invalid moves (same as training)
-                valid_cols = [c for c in range(game.cols) if game.board[0][c] == 0]
-                for c in range(game.cols):
-                    if c not in valid_cols:
-                        q_values[c] = -9999
-                
-                # Pick the column with the highest score
-                col = torch.argmax(q_values).item()
+            # Full columns are masked out, and a win (or a needed block)
+            # one move ahead is played before the network is even asked
+            col = ai(game, current_player)
         else:
             # --- HUMAN TURN ---
             col = human_agent(game)
@@ -66,7 +57,7 @@ def play_game():
         # Drop Piece
         if game.drop_piece(col, current_player):
             # Check Win
-            if game.check_winner(current_player):
+            if game.last_move_wins():
                 game.print_board()
                 winner = "AI" if current_player == 1 else "HUMAN"
                 print(f"!!! {winner} WINS !!!")
@@ -0,0 +1,289 @@
+import math
+from statistics import NormalDist
+import numpy as np
+
+# --- RATINGS ---
+# One rating engine for both leagues (main.py and tasks.py), three systems:
+#
+#   * "elo"       - classic Elo, K=32 (what main.calculate_elo did)
+#   * "glicko2"   - Glicko-2: a rating, a deviation (how unsure we are) and a
+#                   volatility (how erratic the bot is). Every game is its own
+#                   rating period for the two bots in it.
+#   * "trueskill" - two-player TrueSkill: a mean and a deviation, with an
+#                   explicit draw margin.
+#
+# All three live on the same scale as the old Elo (new bots start at 1200)
+# so the leaderboard and the scheduler's Elo pairing don't care which one is
+# on. A bot's state is always (rating, deviation, volatility); Elo leaves the
+# last two at 0 and TrueSkill leaves volatility at 0. Draws count half.
+#
+# Two ways in, same maths (one vectorized implementation per system):
+#   * update()  - one game, for recording matches as they finish.
+#   * replay()  - a whole match history at once. Games are grouped into
+#                 "waves" where no bot appears twice; wave k only has games
+#                 whose bots' previous games are in earlier waves. Updating a
+#                 whole wave with numpy at once then gives exactly what
+#                 playing the games one by one would, with one numpy step per
+#                 wave instead of one Python step per game (bench_ratings.py).
+#
+# The `ratings` table (bot_id, system, rating, deviation, volatility) holds
+# the full state; bots.elo keeps the rounded rating for the leaderboard.
+
+SYSTEMS = ("elo", "glicko2", "trueskill")
+
+START = 1200.0
+
+# Elo
+ELO_K = 32
+
+# Glicko-2 (Glickman's defaults, on the 1200 scale)
+GLICKO_SCALE = 173.7178
+GLICKO_RD = 350.0
+GLICKO_VOLATILITY = 0.06
+GLICKO_TAU = 0.5
+
+# TrueSkill (the usual 25 / 25/3 / 25/6 / 25/300 defaults, times 48)
+TS_SIGMA = 400.0
+TS_BETA = 200.0
+TS_TAU = 4.0
+TS_DRAW_PROBABILITY = 0.05
+TS_DRAW_MARGIN = NormalDist().inv_cdf((TS_DRAW_PROBABILITY + 1) / 2) * math.sqrt(2) * TS_BETA
+
+def new_rating(system):
+    """The (rating, deviation, volatility) of a bot with no games."""
+    if system == "elo":
+        return (START, 0.0, 0.0)
+    if system == "glicko2":
+        return (START, GLICKO_RD, GLICKO_VOLATILITY)
+    if system == "trueskill":
+        return (START, TS_SIGMA, 0.0)
+    raise ValueError(f"Unknown rating system {system!r}, expected one of {SYSTEMS}")
+
+def score_of(a_id, b_id, winner_id):
+    """a's score: 1 for a win, 0 for a loss, 0.5 for a draw (no winner)."""
+    return 1.0 if winner_id == a_id else 0.0 if winner_id == b_id else 0.5
+
+# --- ONE STEP (arrays of games, all bots distinct) ---
+
+def _elo(a, b, s):
+    (ra, _, _), (rb, _, _) = a, b
+    expected = 1 / (1 + 10 ** ((rb - ra) / 400))
+    change = ELO_K * (s - expected)
+    zero = np.zeros_like(ra)
+    return (ra + change, zero, zero), (rb - change, zero, zero)
+
+def _glicko2_side(mu, phi, sigma, mu_j, phi_j, s):
+    """Glickman's steps 3-7 for one player and one game (arrays: any number of them)."""
+    g = 1 / np.sqrt(1 + 3 * phi_j ** 2 / math.pi ** 2)
+    e = 1 / (1 + np.exp(-g * (mu - mu_j)))
+    v = 1 / (g ** 2 * e * (1 - e))
+    delta = v * g * (s - e)
+
+    # New volatility: solve f(x) = 0 with the Illinois method (step 5),
+    # all games at once until every one has converged
+    a = np.log(sigma ** 2)
+    room = delta ** 2 - phi ** 2 - v
+    spread = phi ** 2 + v
+    def f(x):
+        ex = np.exp(x)
+        return ex * (room - ex) / (2 * (spread + ex) ** 2) - (x - a) / GLICKO_TAU ** 2
+    A = a
+    B = np.where(room > 0, np.log(np.maximum(room, 1e-300)), a - GLICKO_TAU)
+    fB = f(B)
+    low = (room <= 0) & (fB < 0)
+    while low.any():
+        B = np.where(low, B - GLICKO_TAU, B)
+        fB = f(B)
+        low &= fB < 0
+    fA = f(A)
+    for _ in range(100):
+        # Games that have converged keep their values (so a game gets the same
+        # answer whatever else is in its batch)
+        todo = np.abs(B - A) > 1e-6
+        if not todo.any():
+            break
+        with np.errstate(divide="ignore", invalid="ignore"):
+            C = A + (A - B) * fA / (fB - fA)
+        fC = f(C)
+        swap = todo & (fC * fB <= 0)
+        A, fA = np.where(swap, B, A), np.where(swap, fB, np.where(todo, fA / 2, fA))
+        B, fB = np.where(todo, C, B), np.where(todo, fC, fB)
+    new_sigma = np.exp(A / 2)
+
+    phi_star = np.sqrt(phi ** 2 + new_sigma ** 2)
+    new_phi = 1 / np.sqrt(1 / phi_star ** 2 + 1 / v)
+    new_mu = mu + new_phi ** 2 * g * (s - e)
+    return new_mu, new_phi, new_sigma
+
+def _glicko2(a, b, s):
+    # Both sides at once (a's games, then b's), each against the other's
+    # rating from before the game
+    (ra, da, va), (rb, db, vb) = a, b
+    mu = (np.concatenate([ra, rb]) - START) / GLICKO_SCALE
+    phi = np.concatenate([da, db]) / GLICKO_SCALE
+    n = len(ra)
+    mu_j = np.concatenate([mu[n:], mu[:n]])
+    phi_j = np.concatenate([phi[n:], phi[:n]])
+    new_mu, new_phi, new_sigma = _glicko2_side(mu, phi, np.concatenate([va, vb]), mu_j, phi_j,
+                                               np.concatenate([s, 1 - s]))
+    rating = START + new_mu * GLICKO_SCALE
+    deviation = np.minimum(new_phi * GLICKO_SCALE, GLICKO_RD)
+    return (rating[:n], deviation[:n], new_sigma[:n]), (rating[n:], deviation[n:], new_sigma[n:])
+
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+def _pdf(x):
+    return np.exp(-x ** 2 / 2) / math.sqrt(2 * math.pi)
+
+def _cdf(x):
+    return 0.5 * _erfc(-x / math.sqrt(2)).astype(float)
+
+def _trueskill(a, b, s):
+    (ra, da, _), (rb, db, _) = a, b
+    var_a, var_b = da ** 2 + TS_TAU ** 2, db ** 2 + TS_TAU ** 2
+    c = np.sqrt(2 * TS_BETA ** 2 + var_a + var_b)
+    # Look at every game from the winner's side (a's side for draws)
+    sign = np.where(s < 0.5, -1.0, 1.0)
+    t = sign * (ra - rb) / c
+    eps = TS_DRAW_MARGIN / c
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # Win: v = pdf/cdf at t - eps (for huge upsets cdf underflows; v -> -x)
+        x = t - eps
+        v_win = np.where(x < -30, -x, _pdf(x) / _cdf(x))
+        w_win = v_win * (v_win + x)
+        # Draw: the truncated-normal between -eps and eps
+        mass = np.maximum(_cdf(eps - t) - _cdf(-eps - t), 1e-300)
+        v_draw = (_pdf(-eps - t) - _pdf(eps - t)) / mass
+        w_draw = v_draw ** 2 + ((eps - t) * _pdf(eps - t) + (eps + t) * _pdf(eps + t)) / mass
+    draw = s == 0.5
+    v = np.where(draw, v_draw, v_win)
+    w = np.clip(np.where(draw, w_draw, w_win), 0, 1 - 1e-9)
+
+    new_ra = ra + sign * var_a / c * v
+    new_rb = rb - sign * var_b / c * v
+    new_da = np.sqrt(var_a * (1 - var_a / c ** 2 * w))
+    new_db = np.sqrt(var_b * (1 - var_b / c ** 2 * w))
+    zero = np.zeros_like(ra)
+    return (new_ra, new_da, zero), (new_rb, new_db, zero)
+
+STEPS = {"elo": _elo, "glicko2": _glicko2, "trueskill": _trueskill}
+
+def _step(system):
+    if system not in STEPS:
+        raise ValueError(f"Unknown rating system {system!r}, expected one of {SYSTEMS}")
+    return STEPS[system]
+
+# --- ONE GAME ---
+
+def update(system, a, b, score):
+    """New (a, b) states after one game; score is a's (1, 0.5 or 0)."""
+    a = tuple(np.array([x], dtype=float) for x in a)
+    b = tuple(np.array([x], dtype=float) for x in b)
+    new_a, new_b = _step(system)(a, b, np.array([float(score)]))
+    return tuple(float(x[0]) for x in new_a), tuple(float(x[0]) for x in new_b)
+
+# --- A WHOLE HISTORY ---
+
+def schedule_waves(a_idx, b_idx, n_bots):
+    """Wave number per game: one more than the latest wave either bot played in."""
+    last = [-1] * n_bots
+    waves = []
+    for a, b in zip(a_idx.tolist(), b_idx.tolist()):
+        wave = max(last[a], last[b]) + 1
+        last[a] = last[b] = wave
+        waves.append(wave)
+    return np.array(waves, dtype=np.int64)
+
+def replay(system, a_idx, b_idx, scores, n_bots):
+    """
+    Ratings after playing games (a_idx[i] vs b_idx[i], a's score scores[i])
+    in order, from scratch. Returns (rating, deviation, volatility) arrays
+    indexed by bot number.
+    """
+    step = _step(system)
+    a_idx = np.asarray(a_idx, dtype=np.int64)
+    b_idx = np.asarray(b_idx, dtype=np.int64)
+    scores = np.asarray(scores, dtype=float)
+    state = np.array([np.full(n_bots, x) for x in new_rating(system)]) # rows: rating, deviation, volatility
+    if len(a_idx) == 0:
+        return tuple(state)
+
+    waves = schedule_waves(a_idx, b_idx, n_bots)
+    order = np.argsort(waves, kind="stable")
+    a_idx, b_idx, scores = a_idx[order], b_idx[order], scores[order] # Wave by wave
+    bounds = np.searchsorted(waves[order], np.arange(waves.max() + 2))
+    for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        ia, ib = a_idx[start:end], b_idx[start:end]
+        new_a, new_b = step(tuple(state[:, ia]), tuple(state[:, ib]), scores[start:end])
+        state[:, ia] = new_a
+        state[:, ib] = new_b
+    return tuple(state)
+
+def replay_matches(system, rows):
+    """rows: (a_id, b_id, winner_id) in the order played. Returns {bot_id: state}."""
+    ids = {}
+    a_idx, b_idx, scores = [], [], []
+    for a, b, winner in rows:
+        a_idx.append(ids.setdefault(a, len(ids)))
+        b_idx.append(ids.setdefault(b, len(ids)))
+        scores.append(score_of(a, b, winner))
+    ratings, deviations, volatilities = replay(system, a_idx, b_idx, scores, len(ids))
+    return {bot: (float(ratings[i]), float(deviations[i]), float(volatilities[i])) for bot, i in ids.items()}
+
+# --- DATABASE (both leagues have bots(id, elo, wins, losses)) ---
+
+def init_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ratings (
+            bot_id TEXT PRIMARY KEY,
+            system TEXT,
+            rating REAL,
+            deviation REAL,
+            volatility REAL
+        )
+    """)
+
+def stored_system(conn):
+    """The system the ratings table was computed with (None if it's empty)."""
+    row = conn.execute("SELECT system FROM ratings LIMIT 1").fetchone()
+    return row[0] if row else None
+
+def _load(conn, system, bot_id):
+    row = conn.execute("SELECT rating, deviation, volatility FROM ratings WHERE bot_id = ? AND system = ?",
+                       (bot_id, system)).fetchone()
+    return tuple(row) if row else new_rating(system)
+
+def _save(conn, system, bot_id, state):
+    conn.execute("INSERT OR REPLACE INTO ratings (bot_id, system, rating, deviation, volatility) VALUES (?, ?, ?, ?, ?)",
+                 (bot_id, system, *state))
+    conn.execute("UPDATE bots SET elo = ? WHERE id = ?", (round(state[0]), bot_id))
+
+def record_game(conn, system, a_id, b_id, winner_id):
+    """
+    Rate one finished game from the bots' current ratings (read in the same
+    transaction, so concurrent games don't overwrite each other's updates)
+    and bump wins/losses. Returns a's rating change.
+    """
+    a, b = _load(conn, system, a_id), _load(conn, system, b_id)
+    new_a, new_b = update(system, a, b, score_of(a_id, b_id, winner_id))
+    _save(conn, system, a_id, new_a)
+    _save(conn, system, b_id, new_b)
+    if winner_id is not None:
+        loser_id = b_id if winner_id == a_id else a_id
+        conn.execute("UPDATE bots SET wins = wins + 1 WHERE id = ?", (winner_id,))
+        conn.execute("UPDATE bots SET losses = losses + 1 WHERE id = ?", (loser_id,))
+    return new_a[0] - a[0]
+
+def recompute(conn, system, rows):
+    """Replace every bot's rating with a replay of rows (a_id, b_id, winner_id), oldest first."""
+    states = replay_matches(system, rows)
+    conn.execute("DELETE FROM ratings")
+    conn.executemany("INSERT INTO ratings (bot_id, system, rating, deviation, volatility) VALUES (?, ?, ?, ?, ?)",
+                     [(bot, system, *state) for bot, state in states.items()])
+    conn.executemany("UPDATE bots SET elo = ? WHERE id = ?", [(round(s[0]), bot) for bot, s in states.items()])
+    # Bots without games go back to the start (and get a row, so the system is remembered)
+    for (bot,) in conn.execute("SELECT id FROM bots").fetchall():
+        if bot not in states:
+            _save(conn, system, bot, new_rating(system))
+    return states
@@ -1,17 +1,10 @@
-import subprocess
-import sys
+from bot_pool import BotProcess
 from connect4 import Connect4
+from subprocess_referee import MOVE_TIMEOUT
 
 def run_match():
-    # 1. Start the Agent Process
-    # We use 'python -u' to ensure unbuffered output
-    agent_process = subprocess.Popen(
-        ['python', '-u', 'submission.py'],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=sys.stderr, # Let agent errors show up in our terminal
-        text=True # Treat input/output as text strings, not bytes
-    )
+    # 1. Start the Agent Process ('python -u', stderr captured - see bot_pool.py)
+    agent_process = BotProcess("submission", "submission.py")
 
     game = Connect4()
     print("--- REFEREE: Starting Match (Human vs Agent) ---")
@@ -36,19 +29,17 @@ def run_match():
             else:
                 # --- AGENT TURN ---
                 # 1. Convert board to string protocol (000102...)
-                board_str = ""
-                for row in game.board:
-                    for cell in row:
-                        board_str += str(cell)
+                board_str = game.to_string()
                 
-                # 2. Send to Agent
-                agent_process.stdin.write(board_str + "\n")
-                agent_process.stdin.flush()
-                
-                # 3. Read Agent's Move
-                move_str = agent_process.stdout.readline().strip()
+                # 2. Send to Agent, 3. Read Agent's Move (it forfeits if it takes too long)
+                try:
+                    move_str = agent_process.ask(board_str, timeout=MOVE_TIMEOUT).strip()
+                except TimeoutError:
+                    print(f"Agent took longer than {MOVE_TIMEOUT}s - Human wins by forfeit!")
+                    break
                 if not move_str:
                     print("Agent crashed or sent nothing!")
+                    print(agent_process.stderr_text()) # Its last words (tracebacks etc.)
                     break
                 col = int(move_str)
                 print(f"Agent chose column: {col}")
@@ -56,7 +47,7 @@ def run_match():
             # Execute Move
             if game.drop_piece(col, current_player):
                 game.print_board()
-                if game.check_winner(current_player):
+                if game.last_move_wins():
                     winner = "Human" if current_player == 1 else "Agent"
                     print(f"!!! {winner} WINS !!!")
                     game_over = True
@@ -69,7 +60,7 @@ def run_match():
         print(f"Match Error: {e}")
     finally:
         # Kill the agent process when game ends
-        agent_process.terminate()
+        agent_process.close()
 
 if __name__ == "__main__":
     run_match()
\ No newline at end of file
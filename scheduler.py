@@ -0,0 +1,247 @@
+import asyncio
+import itertools
+import math
+import random
+import time
+from collections import Counter, deque
+
+# --- BACKGROUND TOURNAMENT SCHEDULER ---
+# Keeps `concurrency` matches in flight at all times instead of one per click
+# on /fight. Each free slot asks the pairing policy for the next match:
+#
+#   * "round-robin" - every pair in turn, then again (fair, slow to sort)
+#   * "swiss"       - bots with similar records play each other, avoiding
+#                     recent rematches
+#   * "elo"         - bots with few games (the uncertain ratings) go first,
+#                     against opponents close to them in Elo
+#
+# Backpressure, so one slow or hanging bot can't fill the pool with games
+# that each take its whole clock:
+#   * a bot can be in at most `per_bot` matches at once - by default its fair
+#     share of the slots, 2 * concurrency / number of bots (each game has two);
+#   * a bot whose last game ended in a timeout or error forfeit is "on
+#     probation": one match at a time until it finishes a game cleanly.
+# If no pair is free, the scheduler waits for a match to finish instead of
+# spinning.
+#
+# The scheduler doesn't know about the database or HTTP: main.py hands it
+#   load_bots()                       -> list of (id, url, name, elo, wins, losses)
+#   play(p1_url, p2_url)              -> awaitable (winner, moves, forfeit)
+#   record(p1, p2, winner, moves)     -> saves the result, updates ratings
+
+POLICIES = ("round-robin", "swiss", "elo")
+
+class RoundRobin:
+    """
+    Every pair once per round, in both colours across rounds. When every
+    pair left in the round involves a busy bot, the others start the next
+    round and the busy bot's pairings carry over (so a slow bot falls behind
+    instead of holding everyone up).
+    """
+    def __init__(self):
+        self.pending = []
+        self.flip = False
+
+    def pick(self, bots, free):
+        ids = {b[0] for b in bots}
+        # Drop pairs whose bots were deleted since the round was made
+        self.pending = [p for p in self.pending if p[0] in ids and p[1] in ids]
+        for attempt in range(2):
+            for i, (a, b) in enumerate(self.pending):
+                if a in free and b in free:
+                    return self.pending.pop(i)
+            if attempt == 0:
+                self._next_round(ids)
+        return None
+
+    def _next_round(self, ids):
+        pairs = list(itertools.combinations(sorted(ids), 2))
+        if self.flip:
+            pairs = [(b, a) for a, b in pairs]
+        self.flip = not self.flip
+        random.shuffle(pairs)
+        carried = {frozenset(p) for p in self.pending}
+        self.pending += [p for p in pairs if frozenset(p) not in carried]
+
+class Swiss:
+    """Pair neighbours by score (wins - losses), not someone played in the last few games."""
+    def __init__(self, memory=4):
+        self.recent = {} # bot id -> deque of recent opponents
+        self.memory = memory
+
+    def pick(self, bots, free):
+        ranked = sorted((b for b in bots if b[0] in free), key=lambda b: (b[4] - b[5], random.random()))
+        for i, a in enumerate(ranked):
+            recent = self.recent.get(a[0], ())
+            for b in ranked[i + 1:]:
+                if b[0] not in recent:
+                    return self._played(a[0], b[0])
+        if len(ranked) >= 2: # Tiny league: everyone has played everyone lately
+            return self._played(ranked[0][0], ranked[1][0])
+        return None
+
+    def _played(self, a, b):
+        for x, y in ((a, b), (b, a)):
+            self.recent.setdefault(x, deque(maxlen=self.memory)).append(y)
+        return (a, b) if random.random() < 0.5 else (b, a)
+
+class EloProximity:
+    """
+    First bot: weighted towards few games played (1/sqrt(1+games)), since
+    those ratings are the least certain. Opponent: weighted by how close the
+    game should be, exp(-|elo difference| / scale), so games carry information.
+    """
+    def __init__(self, scale=200):
+        self.scale = scale
+
+    def pick(self, bots, free):
+        candidates = [b for b in bots if b[0] in free]
+        if len(candidates) < 2:
+            return None
+        uncertainty = [1 / math.sqrt(1 + b[4] + b[5]) for b in candidates]
+        a = random.choices(candidates, weights=uncertainty)[0]
+        others = [b for b in candidates if b is not a]
+        closeness = [math.exp(-abs(b[3] - a[3]) / self.scale) for b in others]
+        b = random.choices(others, weights=closeness)[0]
+        return (a[0], b[0]) if random.random() < 0.5 else (b[0], a[0])
+
+def make_policy(name):
+    if name == "round-robin":
+        return RoundRobin()
+    if name == "swiss":
+        return Swiss()
+    if name == "elo":
+        return EloProximity()
+    raise ValueError(f"Unknown policy {name!r}, expected one of {POLICIES}")
+
+class Scheduler:
+    def __init__(self, load_bots, play, record):
+        self.load_bots = load_bots
+        self.play = play
+        self.record = record
+        self.task = None
+        self.games = set()       # asyncio tasks of the matches in flight
+        self.busy = Counter()    # bot id -> matches in flight
+        self.probation = set()   # bots whose last game was a timeout/error forfeit
+        self.finished = None     # asyncio.Event, set whenever a match ends (made in start(), on the running loop)
+        self.policy_name = None
+        self.concurrency = 0
+        self.per_bot = None
+        self.backpressure = True
+        self.played = 0
+        self.forfeits = Counter()
+        self.errors = 0
+        self.started_at = None
+        self.last = deque(maxlen=10)
+
+    @property
+    def running(self):
+        return self.task is not None and not self.task.done()
+
+    def start(self, policy="elo", concurrency=8, per_bot=None, backpressure=True):
+        """
+        Start the background loop. per_bot=None means each bot's fair share;
+        backpressure=False turns off both limits (for comparison).
+        """
+        if self.running:
+            raise RuntimeError("Scheduler is already running")
+        self.policy = make_policy(policy)
+        self.policy_name = policy
+        self.concurrency = max(1, concurrency)
+        self.per_bot = per_bot and max(1, per_bot)
+        self.backpressure = backpressure
+        self.probation.clear()
+        self.played = 0
+        self.forfeits.clear()
+        self.errors = 0
+        self.started_at = time.monotonic()
+        # Made here, not in __init__: on 3.9 an Event binds to the loop that's
+        # current when it's created, and SCHEDULER is made at import time
+        self.finished = asyncio.Event()
+        self.task = asyncio.create_task(self._loop())
+
+    async def stop(self, wait=True):
+        """Stop pairing new matches; wait for (or cancel) the ones in flight."""
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        games = list(self.games)
+        if not wait:
+            for game in games:
+                game.cancel()
+        await asyncio.gather(*games, return_exceptions=True)
+
+    def status(self):
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0
+        return {
+            "running": self.running,
+            "policy": self.policy_name,
+            "concurrency": self.concurrency,
+            "per_bot": self.per_bot,
+            "in_flight": len(self.games),
+            "busy_bots": dict(self.busy),
+            "probation": sorted(self.probation),
+            "played": self.played,
+            "games_per_minute": round(60 * self.played / elapsed, 1) if elapsed else 0.0,
+            "forfeits": dict(self.forfeits),
+            "errors": self.errors,
+            "last": list(self.last),
+        }
+
+    async def _loop(self):
+        while True:
+            pair = None
+            if len(self.games) < self.concurrency:
+                bots = self.load_bots()
+                free = {b[0] for b in bots if self.busy[b[0]] < self._limit(b[0], len(bots))}
+                pair = self.policy.pick(bots, free)
+            if pair is None:
+                # Pool full, or every possible pair involves a busy bot:
+                # wait for a match to end (or a second, for new bots to register)
+                self.finished.clear()
+                try:
+                    await asyncio.wait_for(self.finished.wait(), 1.0)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            by_id = {b[0]: b for b in bots}
+            p1, p2 = by_id[pair[0]], by_id[pair[1]]
+            self.busy[p1[0]] += 1
+            self.busy[p2[0]] += 1
+            game = asyncio.create_task(self._game(p1, p2))
+            self.games.add(game)
+
+    def _limit(self, bot_id, n_bots):
+        if not self.backpressure:
+            return self.concurrency
+        if bot_id in self.probation:
+            return 1
+        return self.per_bot or max(1, math.ceil(2 * self.concurrency / max(n_bots, 1)))
+
+    async def _game(self, p1, p2):
+        try:
+            winner, moves, forfeit = await self.play(p1[1], p2[1])
+            self.record(p1, p2, winner, moves)
+            self.played += 1
+            for player, bot in ((1, p1), (2, p2)):
+                if forfeit and forfeit[0] == player and forfeit[1] != "illegal move":
+                    self.probation.add(bot[0])
+                else:
+                    self.probation.discard(bot[0])
+            if forfeit:
+                self.forfeits[forfeit[1]] += 1
+            self.last.append({"p1": p1[2], "p2": p2[2], "winner": winner, "moves": len(moves),
+                              "forfeit": forfeit and forfeit[1]})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.errors += 1
+            print(f"Scheduled match {p1[2]} vs {p2[2]} failed: {e}")
+        finally:
+            for bot in (p1, p2):
+                self.busy[bot[0]] -= 1
+                if not self.busy[bot[0]]:
+                    del self.busy[bot[0]]
+            self.games.discard(asyncio.current_task())
+            self.finished.set()
@@ -0,0 +1,116 @@
+import json
+import ratings
+from storage import transaction
+
+# --- SCHEMA ---
+# One schema for both leagues, league.db (main.py, HTTP bots) and
+# leaderboard.db (tasks.py, uploaded bots), versioned with SQLite's
+# PRAGMA user_version and brought up to date by migrate() on startup.
+#
+#   bots     (id, name, url, elo, wins, losses)     - url is NULL for uploaded bots
+#   matches  (id, p1_id, p2_id, winner_id, moves, timestamp)
+#   ratings  (bot_id, system, rating, deviation, volatility) - see ratings.py
+#
+# Indexes, so the pages that get hit all the time don't scan or sort:
+#   bots(elo)                  - the leaderboard, ORDER BY elo DESC
+#   matches(timestamp)         - recent matches, and replays in order
+#   matches(p1_id, timestamp),
+#   matches(p2_id, timestamp)  - one bot's history
+#
+# Moves are stored as a BLOB with one nibble per move (columns 0-6, two
+# moves per byte, a 0xF nibble pads an odd count): 21 bytes for a full
+# 42-move game instead of ~126 for "[3, 3, 4, ...]".
+#
+# Migrations are append-only: to change the schema, add a function to
+# MIGRATIONS. Each runs once, in its own transaction with the version bump.
+
+def encode_moves(moves):
+    """[3, 3, 4] -> b'\\x33\\x4f' (high nibble first)."""
+    nibbles = list(moves) + [0xF] * (len(moves) % 2)
+    return bytes(hi << 4 | lo for hi, lo in zip(nibbles[::2], nibbles[1::2]))
+
+def decode_moves(blob):
+    moves = []
+    for byte in blob or b"":
+        moves.append(byte >> 4)
+        if byte & 0xF != 0xF:
+            moves.append(byte & 0xF)
+    return moves
+
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+def _v1_unify(conn):
+    """Create the tables, or bring either old layout (p1_id / bot1_id, moves as text) to them."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS bots (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            url TEXT,
+            elo INTEGER DEFAULT 1200,
+            wins INTEGER DEFAULT 0,
+            losses INTEGER DEFAULT 0
+        )
+    """)
+    if "url" not in _columns(conn, "bots"): # leaderboard.db had no url
+        conn.execute("ALTER TABLE bots ADD COLUMN url TEXT")
+
+    old = _columns(conn, "matches")
+    if old:
+        conn.execute("ALTER TABLE matches RENAME TO matches_old")
+    conn.execute("""
+        CREATE TABLE matches (
+            id TEXT PRIMARY KEY,
+            p1_id TEXT,
+            p2_id TEXT,
+            winner_id TEXT,
+            moves BLOB,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    if old:
+        p1, p2 = ("bot1_id", "bot2_id") if "bot1_id" in old else ("p1_id", "p2_id")
+        # Old moves are str(list) in league.db and JSON in leaderboard.db: both parse as JSON
+        conn.create_function("encode_moves", 1, lambda text: encode_moves(json.loads(text or "[]")),
+                             deterministic=True)
+        conn.execute(f"""
+            INSERT INTO matches (id, p1_id, p2_id, winner_id, moves, timestamp)
+            SELECT id, {p1}, {p2}, winner_id, encode_moves(moves), timestamp FROM matches_old ORDER BY rowid
+        """)
+        conn.execute("DROP TABLE matches_old")
+    ratings.init_table(conn)
+
+def _v2_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS bots_elo ON bots (elo)")
+    conn.execute("CREATE INDEX IF NOT EXISTS matches_timestamp ON matches (timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS matches_p1 ON matches (p1_id, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS matches_p2 ON matches (p2_id, timestamp)")
+
+MIGRATIONS = [_v1_unify, _v2_indexes]
+VERSION = len(MIGRATIONS)
+
+def migrate(conn):
+    """
+    Run the migrations this database hasn't had yet. conn must be outside a
+    transaction (isolation_level=None, like storage.connect). Returns the
+    version it was at.
+    """
+    start = conn.execute("PRAGMA user_version").fetchone()[0]
+    for version in range(start, VERSION):
+        with transaction(conn, immediate=True):
+            MIGRATIONS[version](conn)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+    return start
+
+def bot_history(conn, bot_id, limit=20):
+    """A bot's latest matches, newest first, as (id, p1_id, p2_id, winner_id, moves, timestamp)."""
+    # Two index range scans (as p1, as p2) merged, instead of an OR that scans the table
+    rows = conn.execute("""
+        SELECT * FROM (SELECT id, p1_id, p2_id, winner_id, moves, timestamp FROM matches
+                       WHERE p1_id = ? ORDER BY timestamp DESC LIMIT ?)
+        UNION ALL
+        SELECT * FROM (SELECT id, p1_id, p2_id, winner_id, moves, timestamp FROM matches
+                       WHERE p2_id = ? ORDER BY timestamp DESC LIMIT ?)
+        ORDER BY timestamp DESC LIMIT ?
+    """, (bot_id, limit, bot_id, limit, limit)).fetchall()
+    return [(*row[:4], decode_moves(row[4]), row[5]) for row in rows]
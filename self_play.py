@@ -0,0 +1,228 @@
+import contextlib
+import copy
+import io
+import time
+from dataclasses import dataclass, replace
+import numpy as np
+import torch
+import torch.optim as optim
+from connect4 import Connect4, minimax_agent, smart_agent
+from dqn_agent import (Connect4Net, PrioritizedReplayBuffer, ReplayBuffer, TrainConfig,
+                       learn_step, load_brain, make_target, save_brain, update_target)
+from vec_env import VecConnect4
+
+# --- SELF-PLAY AGAINST A LEAGUE OF OPPONENTS ---
+# train_dqn only ever meets a random player 2, so it learns to beat random play
+# and nothing else. Here the learner plays a pool of opponents: frozen copies of
+# itself from earlier in the run, itself (the live brain), smart_agent and
+# minimax_agent. Opponents it keeps losing to get picked more often.
+#
+# Boards are always shown to a network from the point of view of the player
+# to move (1 = my pieces, 2 = theirs), so one brain can play either side and
+# old checkpoints trained as player 1 (connect4_brain.pth) still make sense.
+
+@dataclass
+class SelfPlayConfig(TrainConfig):
+    snapshot_every: int = 500 # Finished games between new checkpoints in the pool
+    max_checkpoints: int = 10 # Oldest checkpoint is dropped after this many
+    pfsp_power: float = 2.0 # Opponent weight = (1 - learner win rate) ** power
+    scripted_opponents: tuple = ("smart_agent", "minimax_agent")
+    include_self: bool = True # The live brain as an opponent too
+
+SCRIPTED_AGENTS = {"smart_agent": smart_agent, "minimax_agent": minimax_agent}
+
+def perspective(boards, players):
+    """(N, 42) boards seen by 'players' (N,): their pieces become 1, the other side's 2."""
+    players = players[:, None]
+    return np.where(boards == 0, 0, np.where(boards == players, 1, 2)).astype(np.int8)
+
+class OpponentPool:
+    """
+    The opponents and how the learner does against each of them.
+    Each entry is a dict: name, kind ("self", "net" or "agent"), brain or agent,
+    games and learner_wins (draws count as half a win).
+    """
+    def __init__(self, max_checkpoints=10, pfsp_power=2.0):
+        self.max_checkpoints = max_checkpoints
+        self.pfsp_power = pfsp_power
+        self.entries = []
+        self.checkpoints_added = 0
+
+    def add_self(self, brain):
+        self.entries.append({"name": "self", "kind": "self", "brain": brain, "games": 0, "learner_wins": 0.0})
+
+    def add_agent(self, name, agent):
+        self.entries.append({"name": name, "kind": "agent", "agent": agent, "games": 0, "learner_wins": 0.0})
+
+    def add_checkpoint(self, brain):
+        """Freezes a copy of 'brain' into the pool (dropping the oldest if full)."""
+        frozen = copy.deepcopy(brain)
+        frozen.eval()
+        self.checkpoints_added += 1
+        self.entries.append({"name": f"checkpoint-{self.checkpoints_added}", "kind": "net", "brain": frozen,
+                             "games": 0, "learner_wins": 0.0})
+        checkpoints = [e for e in self.entries if e["kind"] == "net"]
+        if len(checkpoints) > self.max_checkpoints:
+            self.entries.remove(checkpoints[0])
+
+    def win_rates(self):
+        # (wins + 1) / (games + 2): an opponent we haven't met yet counts as 50/50
+        return np.array([(e["learner_wins"] + 1) / (e["games"] + 2) for e in self.entries])
+
+    def sample(self, count, rng):
+        """Picks 'count' opponents (as entry dicts), favouring the ones we lose to."""
+        weights = (1.0 - self.win_rates()) ** self.pfsp_power + 1e-3
+        picks = rng.choice(len(self.entries), size=count, p=weights / weights.sum())
+        return [self.entries[i] for i in picks]
+
+    def record(self, entry, result):
+        """result: 1 learner won, 0.5 draw, 0 learner lost."""
+        entry["games"] += 1
+        entry["learner_wins"] += result
+
+    def summary(self):
+        return ", ".join(f"{e['name']} {100 * rate:.0f}%" for e, rate in zip(self.entries, self.win_rates()))
+
+def greedy_moves(brain, boards, legal):
+    """One forward pass for a batch of (already perspective-flipped) boards."""
+    with torch.no_grad():
+        q_values = brain(torch.from_numpy(boards.astype(np.float32)))
+    q_values[~torch.from_numpy(legal)] = -9999
+    return torch.argmax(q_values, dim=1).numpy()
+
+def train_self_play(config=None, brain=None, callback=None, **overrides):
+    """
+    Trains 'brain' (a fresh Connect4Net if None, or e.g. a loaded checkpoint to
+    keep improving it) against the opponent pool. Returns (brain, pool).
+    callback(finished_games, brain, pool) works like in train_dqn.
+    """
+    config = replace(config or SelfPlayConfig(), **overrides)
+    if config.n_step != 1:
+        # The transitions below are 1-step; learn_step would still discount
+        # them by gamma ** n_step
+        raise ValueError(f"train_self_play only supports n_step=1 (got {config.n_step})")
+    brain = brain or Connect4Net(config.arch)
+    optimizer = optim.Adam(brain.parameters(), lr=config.lr)
+    target_brain = make_target(brain, config)
+    memory = PrioritizedReplayBuffer(config.memory_size) if config.prioritized else ReplayBuffer(config.memory_size)
+    rng = np.random.default_rng()
+
+    pool = OpponentPool(config.max_checkpoints, config.pfsp_power)
+    if config.include_self:
+        pool.add_self(brain)
+    for name in config.scripted_opponents:
+        pool.add_agent(name, SCRIPTED_AGENTS[name])
+    pool.add_checkpoint(brain)
+
+    num_envs = config.num_envs
+    env = VecConnect4(num_envs)
+    opponents = pool.sample(num_envs, rng)
+    learner_sides = rng.integers(1, 3, size=num_envs) # Learner plays 1 or 2 at random
+    # The learner's last move in each game, waiting for its outcome
+    pending_state = np.zeros((num_envs, 42), dtype=np.int8)
+    pending_action = np.zeros(num_envs, dtype=np.int64)
+    has_pending = np.zeros(num_envs, dtype=bool)
+
+    epsilon = config.epsilon_start
+    finished = updates = 0
+    start = time.perf_counter()
+    print(f"Self-play training for {config.episodes} games ({num_envs} at a time)...")
+
+    while finished < config.episodes:
+        movers = env.players.astype(np.int64)
+        boards = perspective(env.flat_boards(), movers)
+        legal = env.legal_mask()
+        learner_turn = movers == learner_sides
+
+        # 1. The learner's previous move led here without the game ending: reward 0
+        ready = learner_turn & has_pending
+        if ready.any():
+            memory.push_batch(pending_state[ready], pending_action[ready], np.zeros(ready.sum()),
+                              boards[ready], np.zeros(ready.sum()))
+            has_pending[ready] = False
+
+        # 2. Moves. Everything the live brain plays (the learner's moves AND the
+        # "self" opponent's moves) goes through ONE forward pass, each frozen
+        # checkpoint gets one pass for its games, scripted agents go one by one.
+        actions = np.zeros(num_envs, dtype=np.int64)
+        kinds = np.array([o["kind"] for o in opponents])
+        live = learner_turn | (kinds == "self")
+        if live.any():
+            actions[live] = greedy_moves(brain, boards[live], legal[live])
+        explore = learner_turn & (rng.random(num_envs) < epsilon)
+        actions[explore] = env.random_actions(legal)[explore]
+
+        opponent_turn = ~learner_turn
+        for entry in {id(o): o for o in opponents}.values():
+            games = np.array([o is entry for o in opponents]) & opponent_turn
+            if not games.any() or entry["kind"] == "self":
+                continue
+            if entry["kind"] == "net":
+                actions[games] = greedy_moves(entry["brain"], boards[games], legal[games])
+            else:
+                with contextlib.redirect_stdout(io.StringIO()): # smart_agent likes to print
+                    for i in np.nonzero(games)[0]:
+                        game = Connect4.from_board(env.boards[i].tolist())
+                        actions[i] = entry["agent"](game, int(movers[i]))
+
+        pending_state[learner_turn] = boards[learner_turn]
+        pending_action[learner_turn] = actions[learner_turn]
+        has_pending |= learner_turn
+
+        # 3. Play every game's move at once
+        won, draw, illegal = env.step(actions)
+        done = won | draw | illegal
+
+        # 4. Finished games: the learner's last move gets the final reward
+        if done.any():
+            learner_won = (won & learner_turn) | (illegal & ~learner_turn)
+            learner_lost = (won & ~learner_turn) | (illegal & learner_turn)
+            rewards = np.where(learner_won, 10.0, 0.0) - np.where(learner_lost, 10.0, 0.0)
+            rewards = np.where(illegal & learner_turn, -100.0, rewards)
+            flush = done & has_pending
+            memory.push_batch(pending_state[flush], pending_action[flush], rewards[flush],
+                              np.zeros((flush.sum(), 42)), np.ones(flush.sum()))
+            has_pending[done] = False
+
+            for i in np.nonzero(done)[0]:
+                pool.record(opponents[i], 1.0 if learner_won[i] else 0.0 if learner_lost[i] else 0.5)
+                finished += 1
+                if epsilon > config.epsilon_min:
+                    epsilon *= config.epsilon_decay
+                if finished % config.snapshot_every == 0:
+                    pool.add_checkpoint(brain)
+                if finished % 100 == 0:
+                    print(f"Episode {finished} | Epsilon: {epsilon:.2f} | {time.perf_counter() - start:.0f}s"
+                          f" | win rate vs {pool.summary()}")
+                if callback is not None and config.eval_every and finished % config.eval_every == 0:
+                    if callback(finished, brain, pool):
+                        return brain, pool
+
+            env.reset(done)
+            new_opponents = pool.sample(int(done.sum()), rng)
+            for i, entry in zip(np.nonzero(done)[0], new_opponents):
+                opponents[i] = entry
+            learner_sides[done] = rng.integers(1, 3, size=int(done.sum()))
+
+        # 5. Learn
+        if len(memory) > config.batch_size:
+            beta = config.beta_start + (1.0 - config.beta_start) * min(finished / config.episodes, 1.0)
+            learn_step(brain, target_brain, optimizer, memory, config, beta)
+            updates += 1
+            update_target(brain, target_brain, config, updates)
+
+    print("Training Complete!")
+    return brain, pool
+
+if __name__ == "__main__":
+    # Carry on from the current brain if there is one, instead of starting cold
+    brain = None
+    try:
+        brain = load_brain("connect4_brain.pth")
+        brain.train()
+        print(f"Continuing from 'connect4_brain.pth' ({brain.arch})")
+    except FileNotFoundError:
+        pass
+    trained_brain, pool = train_self_play(brain=brain, target_update=500)
+    save_brain(trained_brain, "connect4_brain.pth")
+    print("Brain saved to 'connect4_brain.pth'")
@@ -0,0 +1,211 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+# --- STORAGE ---
+# How main.py and tasks.py talk to SQLite. Before this, every request and
+# every match did its own sqlite3.connect, an INSERT and two UPDATEs and a
+# commit, in the default rollback-journal mode: readers block writers, every
+# commit is an fsync, and a few Celery workers plus the web app were enough
+# for "database is locked".
+#
+#   * connect()     - WAL mode (readers never block the writer, the writer
+#                     never blocks readers) plus pragmas that suit a small
+#                     server: synchronous=NORMAL (fsync at checkpoints, not
+#                     every commit; a power cut can lose the last few
+#                     commits but never corrupts), a busy timeout instead of
+#                     instant "database is locked", a bigger page cache.
+#   * pool(path)    - per-process pool of those connections (a forked
+#                     Celery worker gets its own, never its parent's).
+#   * writer(path)  - per-process BatchWriter: a thread that takes write
+#                     jobs from a queue and commits all of the queued ones
+#                     in ONE transaction (group commit): whatever arrived
+#                     while the last commit ran, plus whatever arrives
+#                     within `flush_interval`. One lock grab and one commit
+#                     for many match results.
+#
+# A write job is fn(conn, *args); submit() returns a Future with its result.
+
+BUSY_TIMEOUT_MS = 10_000
+# Extra seconds to wait for more writes before committing. 0 is best when
+# callers wait for their commit (bench_storage.py); raise it for bigger
+# batches when they don't.
+FLUSH_INTERVAL = 0.0
+MAX_BATCH = 1000
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-32000", # 32 MB
+)
+
+def connect(path):
+    """A connection with WAL and the pragmas above. Transactions are ours (isolation_level=None)."""
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+@contextmanager
+def transaction(conn, immediate=False):
+    """BEGIN ... COMMIT (ROLLBACK on error). immediate takes the write lock up front."""
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+class ConnectionPool:
+    def __init__(self, path, size=8):
+        self.path = path
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.opened = 0
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, inside a transaction: committed on success, rolled back on error."""
+        conn = self._get()
+        try:
+            with transaction(conn):
+                yield conn
+        finally:
+            self.idle.put(conn)
+
+    def _get(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if self.opened < self.size:
+                self.opened += 1
+                return connect(self.path)
+        return self.idle.get() # All out: wait for one to come back
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+class BatchWriter:
+    def __init__(self, path, flush_interval=None, max_batch=MAX_BATCH):
+        self.path = path
+        self.flush_interval = FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.max_batch = max_batch
+        self.jobs = queue.Queue()
+        self.batches = 0
+        self.written = 0
+        self.thread = threading.Thread(target=self._run, name=f"BatchWriter({path})", daemon=True)
+        self.thread.start()
+
+    def submit(self, fn, *args):
+        """Queue fn(conn, *args) for the next batch. Returns a Future with its result."""
+        future = Future()
+        self.jobs.put((fn, args, future))
+        return future
+
+    def flush(self):
+        """Wait until everything submitted so far is committed."""
+        self.submit(lambda conn: None).result()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.jobs.put(None)
+            self.thread.join()
+
+    def _run(self):
+        conn = connect(self.path)
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            # Group commit: take everything already queued, then whatever
+            # else arrives within flush_interval (or until the batch is full)
+            batch = [job]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    job = self.jobs.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                batch.append(job)
+            self._commit(conn, batch)
+            if stop:
+                break
+        conn.close()
+
+    def _commit(self, conn, batch):
+        results = []
+        try:
+            with transaction(conn, immediate=True):
+                for fn, args, future in batch:
+                    # A savepoint per job: one bad job fails alone, not the batch
+                    conn.execute("SAVEPOINT job")
+                    try:
+                        results.append((future, fn(conn, *args), None))
+                        conn.execute("RELEASE job")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO job")
+                        conn.execute("RELEASE job")
+                        print(f"Write failed: {e!r}")
+                        results.append((future, None, e))
+        except Exception as e: # The commit itself failed: nothing in the batch was written
+            print(f"Batch of {len(batch)} writes failed: {e!r}")
+            for fn, args, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.written += len(batch)
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+# --- PER-PROCESS SINGLETONS ---
+
+_pools = {}
+_writers = {}
+_lock = threading.Lock()
+
+def pool(path):
+    with _lock:
+        key = (os.getpid(), path)
+        if key not in _pools:
+            _pools[key] = ConnectionPool(path)
+        return _pools[key]
+
+def writer(path):
+    with _lock:
+        key = (os.getpid(), path)
+        if key not in _writers:
+            _writers[key] = BatchWriter(path)
+        return _writers[key]
+
+@atexit.register
+def close_all():
+    """Flush pending writes and close this process's connections."""
+    with _lock:
+        writers = [_writers.pop(key) for key in list(_writers) if key[0] == os.getpid()]
+        pools = [_pools.pop(key) for key in list(_pools) if key[0] == os.getpid()]
+    for w in writers:
+        w.close()
+    for p in pools:
+        p.close()
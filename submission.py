@@ -1,48 +1,98 @@
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import sys
 
+# No torch here: the brain is exported to 'connect4_brain.npz' (see numpy_net.py:
+# python numpy_net.py connect4_brain.pth connect4_brain.npz) and we run it in
+# plain NumPy. Starting up takes a fraction of a second instead of seconds.
+
 # --- 1. DEFINE THE BRAIN (Must be identical to training) ---
-class Connect4Net(nn.Module):
-    def __init__(self):
-        super(Connect4Net, self).__init__()
-        self.fc1 = nn.Linear(42, 128)
-        self.fc2 = nn.Linear(128, 128)
-        self.fc3 = nn.Linear(128, 7)
+# Same maths as numpy_net.NumpyNet, copied so this file works on its own
+class NumpyNet:
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.arch = str(data["arch"])
+            weights = {name: data[name] for name in data.files if name != "arch"}
+        if self.arch == "mlp":
+            self.layers = [(weights[f"fc{i}.weight"].T.copy(), weights[f"fc{i}.bias"]) for i in (1, 2, 3)]
+        else:
+            self.convs = []
+            for name in ("conv1", "conv2"):
+                weight = weights[f"{name}.weight"]
+                self.convs.append((weight.reshape(len(weight), -1).T.copy(), weights[f"{name}.bias"]))
+            channels = self.convs[-1][0].shape[1]
+            head = weights["head.weight"].reshape(7, channels, 6, 7).transpose(0, 2, 3, 1)
+            self.head = head.reshape(7, -1).T.copy()
+            self.head_bias = weights["head.bias"]
 
-    def forward(self, x):
-        x = F.relu(self.fc1(x))
-        x = F.relu(self.fc2(x))
-        return self.fc3(x)
+    def __call__(self, board):
+        x = np.asarray(board, dtype=np.float32).reshape(1, 42)
+        if self.arch == "mlp":
+            for i, (weight, bias) in enumerate(self.layers):
+                x = x @ weight + bias
+                if i < 2:
+                    np.maximum(x, 0, out=x)
+        else:
+            x = x.reshape(1, 6, 7, 1)
+            x = np.concatenate([x == 1, x == 2, x == 0], axis=3).astype(np.float32)
+            for weight, bias in self.convs:
+                padded = np.pad(x, ((0, 0), (1, 1), (1, 1), (0, 0)))
+                patches = sliding_window_view(padded, (3, 3), axis=(1, 2))
+                x = patches.reshape(1, 6, 7, -1) @ weight + bias
+                np.maximum(x, 0, out=x)
+            x = x.reshape(1, -1) @ self.head + self.head_bias
+        return x[0]
 
 # --- 2. LOAD THE BRAIN ---
-model = Connect4Net()
 try:
     # We assume the model file is in the same folder
-    model.load_state_dict(torch.load("connect4_brain.pth"))
-    model.eval()
+    model = NumpyNet("connect4_brain.npz")
 except Exception as e:
     # Write errors to stderr so they don't break the game protocol
     sys.stderr.write(f"Error loading model: {e}\n")
     sys.exit(1)
 
-# --- 3. THE COMPETITION LOOP ---
+# --- 3. ONE MOVE AHEAD ---
+# Same idea as neural_agent.NeuralAgent (copied so this file works on its own):
+# if we can win right now, do it; if they could win right now, block it.
+# Each side's pieces go into one int, 7 bits per column from the bottom.
+CELL_BITS = np.array([col * 7 + (5 - row) for row in range(6) for col in range(7)], dtype=np.int64)
+
+def has_four(bitboard):
+    for shift in (1, 7, 6, 8): # vertical, horizontal, both diagonals
+        pairs = bitboard & (bitboard >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+def tactical_move(board, legal):
+    """board is already 1 = me, 2 = them."""
+    heights = (board.reshape(6, 7) != 0).sum(axis=0)
+    for who in (1, 2): # First our wins, then their wins (to block)
+        pieces = int(np.bitwise_or.reduce(np.left_shift(1, CELL_BITS[board == who]), initial=0))
+        for col in np.flatnonzero(legal):
+            if has_four(pieces | (1 << int(col * 7 + heights[col]))):
+                return int(col)
+    return None
+
+# --- 4. THE COMPETITION LOOP ---
 def get_move(board_string):
-    # Convert string "00120..." to Tensor
-    board_list = [float(char) for char in board_string]
-    state = torch.tensor(board_list, dtype=torch.float32)
+    # Convert string "00120..." to an array of 42 numbers
+    board = np.frombuffer(board_string.encode(), dtype=np.uint8) - ord("0")
+    # The nets see the board as 1 = me, 2 = them. Player 1 moves when both
+    # sides have the same number of pieces; if that's not us, swap 1 and 2.
+    if board_string.count("1") > board_string.count("2"):
+        board = np.where(board == 0, 0, 3 - board)
+
+    # A column is playable while its top cell (the first 7 digits) is empty
+    legal = board[:7] == 0
+    move = tactical_move(board, legal)
+    if move is not None:
+        return move
     
-    # Predict
-    with torch.no_grad():
-        q_values = model(state)
-        
-        # Mask full columns (Very crude check based on input string)
-        # In a real comp, we might not know column heights easily without parsing
-        # For now, let's trust the raw network or do a quick check:
-        # Columns start at indices 0, 1, 2... and stride by 7? No, usually row by row.
-        # Let's just trust the max Q-value for simplicity in this MVP.
-        move = torch.argmax(q_values).item()
+    # Predict, never picking a full column
+    q_values = np.where(legal, model(board), -np.inf)
+    move = int(np.argmax(q_values))
         
     return move
 
@@ -0,0 +1,68 @@
+import time
+from connect4 import Connect4
+
+# --- SUBPROCESS REFEREE ---
+# Plays one game between two BotProcesses (bot_pool.py) over the stdin/stdout
+# protocol, with the same forfeit rules as the HTTP referee (main.play_match):
+# a bot that crashes, runs out of time or sends an illegal move loses.
+#
+# Two clocks per bot:
+#   * move_timeout - seconds for one move (like the HTTP referee's 2s), and
+#   * game_time    - seconds of thinking for the whole game, so a bot can't
+#                    take (almost) move_timeout on all of its 21 moves.
+# A freshly started bot gets startup_timeout for its first answer instead
+# (imports and model loading), not charged to its game clock.
+# Reading uses select() with a deadline, so a hung bot costs at most its
+# clock and can never stall the worker.
+
+MOVE_TIMEOUT = 2.0
+GAME_TIME = 20.0
+STARTUP_TIMEOUT = 15.0
+
+def play_match(p1, p2, move_timeout=MOVE_TIMEOUT, game_time=GAME_TIME, startup_timeout=STARTUP_TIMEOUT):
+    """
+    Returns (winner, moves, forfeit): winner is 1, 2 or 0 for a draw,
+    forfeit is None or (player, reason) with reason "crash", "timeout",
+    "game clock" or "illegal move".
+    """
+    game = Connect4()
+    moves = []
+    bots = {1: p1, 2: p2}
+    clocks = {1: game_time, 2: game_time}
+
+    for _ in range(42):
+        player = len(moves) % 2 + 1
+        starting = bots[player].answers == 0
+        budget = startup_timeout if starting else min(move_timeout, clocks[player])
+
+        # 1. ASK THE BOT FOR A MOVE (within its time)
+        start = time.monotonic()
+        try:
+            answer = bots[player].ask(game.to_string(), timeout=budget)
+        except TimeoutError:
+            reason = "game clock" if budget < move_timeout else "timeout"
+            return 3 - player, moves, (player, reason)
+        except OSError: # Broken pipe: it already exited
+            return 3 - player, moves, (player, "crash")
+        if not starting:
+            clocks[player] -= time.monotonic() - start
+        if not answer:
+            return 3 - player, moves, (player, "crash")
+
+        # 2. VALIDATE MOVE
+        try:
+            col = int(answer.strip())
+        except ValueError:
+            return 3 - player, moves, (player, "illegal move")
+        if not game.is_valid_location(col):
+            return 3 - player, moves, (player, "illegal move")
+
+        # 3. UPDATE BOARD
+        moves.append(col)
+        game.drop_piece(col, player)
+
+        # 4. CHECK WIN (only the lines through the piece that just landed)
+        if game.last_move_wins():
+            return player, moves, None
+
+    return 0, moves, None # Draw
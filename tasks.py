@@ -1,9 +1,12 @@
 from celery import Celery
-import sqlite3
-import subprocess
+import atexit
 import os
-import json
 import uuid
+import ratings
+import schema
+import storage
+from bot_pool import BotPool
+from subprocess_referee import play_match
 
 # SETUP CELERY
 # We point to the Docker Redis container we just started
@@ -11,108 +14,68 @@ celery_app = Celery('tasks', broker='redis://localhost:6379/0', backend='redis:/
 
 BOTS_DIR = "bots"
 DB_FILE = "leaderboard.db"
+RATING_SYSTEM = os.environ.get("RATING_SYSTEM", "glicko2") # Same engine as main.py (see ratings.py)
 
-@celery_app.task
-def run_match_task(bot1_id, bot2_id):
-    bot1_path = os.path.abspath(os.path.join(BOTS_DIR, f"{bot1_id}.py"))
-    bot2_path = os.path.abspath(os.path.join(BOTS_DIR, f"{bot2_id}.py"))
+def recompute_ratings(conn, system):
+    rows = conn.execute("SELECT p1_id, p2_id, winner_id FROM matches ORDER BY timestamp, rowid").fetchall()
+    return ratings.recompute(conn, system, rows)
 
-    def start_bot(path):
-        return subprocess.Popen(
-            ["python", "-u", path],
-            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
-            cwd=os.path.dirname(path) # Run from the bot's folder
-        )
+_conn = storage.connect(DB_FILE)
+schema.migrate(_conn) # Same tables and indexes as league.db, see schema.py
+with storage.transaction(_conn, immediate=True): # (one worker at a time)
+    # First start, or RATING_SYSTEM changed: rate the whole history again,
+    # or the next result would start both bots over from new_rating()
+    if ratings.stored_system(_conn) != RATING_SYSTEM:
+        recompute_ratings(_conn, RATING_SYSTEM)
+_conn.close()
 
-    print(f"--- STARTING MATCH: {bot1_id} vs {bot2_id} ---")
+def save_result(conn, match_id, bot1_id, bot2_id, winner_id, moves):
+    conn.execute("INSERT INTO matches (id, p1_id, p2_id, winner_id, moves) VALUES (?,?,?,?,?)",
+                 (match_id, bot1_id, bot2_id, winner_id, schema.encode_moves(moves)))
     
-    p1 = start_bot(bot1_path)
-    p2 = start_bot(bot2_path)
+    # Rating (draws count half, no winner_id is a draw - as in a replay)
+    ratings.record_game(conn, RATING_SYSTEM, bot1_id, bot2_id, winner_id)
+
+# Each worker process keeps its bots warm between matches (see bot_pool.py)
+BOT_POOL = BotPool(BOTS_DIR)
+atexit.register(BOT_POOL.close)
+
+@celery_app.task
+def run_match_task(bot1_id, bot2_id):
+    print(f"--- STARTING MATCH: {bot1_id} vs {bot2_id} ---")
     
-    board = [0] * 42
-    turn = 1 
     winner = 0
     moves = []
     
     try:
-        for _ in range(42): 
-            if 0 not in board: break
-
-            current_proc = p1 if turn == 1 else p2
-            
-            # Send Board
-            board_str = "".join(map(str, board))
-            current_proc.stdin.write(board_str + "\n")
-            current_proc.stdin.flush()
-            
-            # Get Move
-            move_str = current_proc.stdout.readline()
-            if not move_str: break
-            
-            try:
-                col = int(move_str.strip())
-            except ValueError: break
-
-            # Apply Move
-            row_to_fill = -1
-            for r in range(5, -1, -1):
-                idx = r * 7 + col
-                if board[idx] == 0:
-                    row_to_fill = idx
-                    break
-            
-            if row_to_fill == -1: break 
-            
-            board[row_to_fill] = turn
-            moves.append(col)
-            
-            # Check Win (Simplified)
-            def check_win(p):
-                # Horizontal
-                for r in range(6):
-                    for c in range(4):
-                        if all(board[r*7 + c + i] == p for i in range(4)): return True
-                # Vertical
-                for r in range(3):
-                    for c in range(7):
-                        if all(board[(r+i)*7 + c] == p for i in range(4)): return True
-                # Diag 1
-                for r in range(3):
-                    for c in range(4):
-                        if all(board[(r+i)*7 + c + i] == p for i in range(4)): return True
-                # Diag 2
-                for r in range(3):
-                    for c in range(3, 7):
-                        if all(board[(r+i)*7 + c - i] == p for i in range(4)): return True
-                return False
-
-            if check_win(turn):
-                winner = turn
-                break
-                
-            turn = 3 - turn 
+        with BOT_POOL.borrow(bot1_id) as p1, BOT_POOL.borrow(bot2_id) as p2:
+            # Timeouts, crashes and illegal moves lose the game (same rules as main.play_match)
+            winner, moves, forfeit = play_match(p1, p2)
+            if forfeit:
+                player, reason = forfeit
+                loser = p1 if player == 1 else p2
+                print(f"Bot {loser.bot_id} forfeits: {reason}")
+                if reason != "illegal move":
+                    # Hung or dead: don't give this process to the next match
+                    loser.healthy = False
+                    print(f"stderr of {loser.bot_id}:\n{loser.stderr_text()[-2000:]}")
 
     except Exception as e:
         print(f"Match Error: {e}")
-    finally:
-        p1.terminate()
-        p2.terminate()
         
     # SAVE RESULT
     match_id = str(uuid.uuid4())
     winner_id = bot1_id if winner == 1 else bot2_id if winner == 2 else None
-    moves_json = json.dumps(moves)
     
-    with sqlite3.connect(DB_FILE) as conn:
-        conn.execute("INSERT INTO matches (id, bot1_id, bot2_id, winner_id, moves) VALUES (?,?,?,?,?)",
-                     (match_id, bot1_id, bot2_id, winner_id, moves_json))
-        
-        if winner == 1:
-            conn.execute("UPDATE bots SET elo=elo+10, wins=wins+1 WHERE id=?", (bot1_id,))
-            conn.execute("UPDATE bots SET elo=elo-10, losses=losses+1 WHERE id=?", (bot2_id,))
-        elif winner == 2:
-            conn.execute("UPDATE bots SET elo=elo-10, losses=losses+1 WHERE id=?", (bot1_id,))
-            conn.execute("UPDATE bots SET elo=elo+10, wins=wins+1 WHERE id=?", (bot2_id,))
+    # Through this process's batch writer (storage.py): with a threads/gevent
+    # pool, results finishing together share one commit. Wait for ours, so a
+    # finished task means a saved result (prefork children exit without atexit).
+    storage.writer(DB_FILE).submit(save_result, match_id, bot1_id, bot2_id, winner_id, moves).result()
             
     print(f"--- MATCH FINISHED. Winner: {winner} ---")
-    return match_id
\ No newline at end of file
+    return match_id
+
+@celery_app.task
+def recompute_ratings_task(system=RATING_SYSTEM):
+    """Re-rate every bot from the match history (e.g. after changing RATING_SYSTEM or deleting bad results)."""
+    return len(storage.writer(DB_FILE).submit(recompute_ratings, system).result())
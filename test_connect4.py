@@ -0,0 +1,73 @@
+import random
+import pytest
+from connect4 import Connect4
+
+# Win detection: last_move_wins (what the referees call after every move),
+# winning_move and check_winner, against a plain scan of the board.
+#
+#   python -m pytest -q test_connect4.py
+
+def four_in_a_row(board, player):
+    """The slow, obvious way: every cell, every direction."""
+    for row in range(6):
+        for col in range(7):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                cells = [(row + i * dr, col + i * dc) for i in range(4)]
+                if all(0 <= r < 6 and 0 <= c < 7 and board[r][c] == player for r, c in cells):
+                    return True
+    return False
+
+def play(moves):
+    game = Connect4()
+    for i, col in enumerate(moves):
+        game.drop_piece(col, i % 2 + 1)
+    return game
+
+LINES = {
+    "horizontal": [0, 0, 1, 1, 2, 2, 3],
+    "vertical": [6, 5, 6, 5, 6, 5, 6],
+    "diagonal /": [0, 1, 1, 2, 2, 3, 2, 3, 3, 5, 3],
+    "diagonal \\": [6, 5, 5, 4, 4, 3, 4, 3, 3, 1, 3],
+}
+
+@pytest.mark.parametrize("name", LINES)
+def test_fourth_piece_wins(name):
+    moves = LINES[name]
+    game = play(moves[:-1])
+    assert not game.last_move_wins() and not game.check_winner(1)
+    assert game.winning_move(moves[-1], 1)
+    game.drop_piece(moves[-1], 1)
+    assert game.last_move_wins() and game.check_winner(1)
+    game.undo_move()
+    assert not game.check_winner(1)
+
+def test_no_wrap_around_between_columns():
+    # Player 2's three at the top of column 0 and one at the bottom of
+    # column 1 would be a vertical four if columns weren't kept apart
+    game = Connect4()
+    for player in (1, 1, 1, 2, 2, 2):
+        game.drop_piece(0, player)
+    assert not game.winning_move(1, 2)
+    game.drop_piece(1, 2)
+    assert not game.last_move_wins() and not game.check_winner(2)
+
+def test_random_games_match_a_board_scan():
+    rng = random.Random(7)
+    for _ in range(200):
+        game = Connect4()
+        player = 1
+        while not game.is_full():
+            col = rng.choice([c for c in range(7) if game.is_valid_location(c)])
+            assert game.winning_move(col, player) == four_in_a_row(play_after(game, col, player), player)
+            game.drop_piece(col, player)
+            won = four_in_a_row(game.board, player)
+            assert game.last_move_wins() == won == game.check_winner(player)
+            if won:
+                break
+            player = 3 - player
+
+def play_after(game, col, player):
+    game.drop_piece(col, player)
+    board = [row[:] for row in game.board]
+    game.undo_move()
+    return board
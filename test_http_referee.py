@@ -0,0 +1,67 @@
+import asyncio
+import httpx
+from bot_server import create_app
+from connect4 import Connect4
+from http_referee import play_match
+
+# The referee's forfeit rules, against bot_server.py stand-ins. The apps are
+# served in-process (httpx.ASGITransport), so no ports and no subprocesses.
+#
+#   python -m pytest -q test_http_referee.py
+
+class StandIns:
+    """Looks like http_referee.BotClients, but each "url" is a bot_server app."""
+    def __init__(self, apps):
+        self.clients = {url: httpx.AsyncClient(transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+                                               base_url="http://bot")
+                        for url, app in apps.items()}
+
+    def get(self, url):
+        return self.clients[url]
+
+    async def aclose(self):
+        for client in self.clients.values():
+            await client.aclose()
+
+def referee(p1_app, p2_app, **kwargs):
+    async def run():
+        clients = StandIns({"p1": p1_app, "p2": p2_app})
+        try:
+            return await play_match("p1", "p2", clients, **kwargs)
+        finally:
+            await clients.aclose()
+    return asyncio.run(run())
+
+def test_normal_game_has_no_forfeit():
+    winner, moves, forfeit = referee(create_app("smart"), create_app("random"))
+    assert forfeit is None
+    game = Connect4()
+    for i, col in enumerate(moves):
+        assert game.is_valid_location(col)
+        game.drop_piece(col, i % 2 + 1)
+    if winner:
+        assert game.last_move_wins() and len(moves) % 2 == winner % 2
+    else:
+        assert game.is_full()
+
+def test_hang_is_a_timeout():
+    winner, moves, forfeit = referee(create_app("random"), create_app(misbehave="hang"), move_timeout=0.2)
+    assert (winner, forfeit) == (1, (2, "timeout"))
+    assert len(moves) == 1
+
+def test_illegal_move_loses():
+    winner, moves, forfeit = referee(create_app(misbehave="illegal"), create_app("random"))
+    assert (winner, moves, forfeit) == (2, [], (1, "illegal move"))
+
+def test_http_error_loses():
+    winner, moves, forfeit = referee(create_app("random"), create_app(misbehave="error"))
+    assert (winner, forfeit) == (1, (2, "error"))
+    assert len(moves) == 1
+
+def test_game_clock():
+    # Every move takes 50-150ms: fine for move_timeout, but 0.15s for the
+    # whole game runs out by player 1's 4th move, before it can have won
+    winner, moves, forfeit = referee(create_app("random", delay=0.1), create_app("random"),
+                                     move_timeout=2.0, game_time=0.15)
+    assert (winner, forfeit) == (2, (1, "game clock"))
+    assert len(moves) < 7
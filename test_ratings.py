@@ -0,0 +1,67 @@
+import random
+import sqlite3
+import numpy as np
+import pytest
+import ratings
+
+# replay() (wave by wave, vectorized) must give exactly what update() gives
+# playing the same games one by one, and record_game what recompute gives.
+#
+#   python -m pytest -q test_ratings.py
+
+def random_history(n_games, n_bots, seed):
+    rng = random.Random(seed)
+    games = []
+    for _ in range(n_games):
+        a, b = rng.sample(range(n_bots), 2)
+        games.append((a, b, rng.choice([1.0, 0.0, 0.5])))
+    return games
+
+def one_by_one(system, games, n_bots):
+    state = [ratings.new_rating(system)] * n_bots
+    for a, b, score in games:
+        state[a], state[b] = ratings.update(system, state[a], state[b], score)
+    return np.array(state).T
+
+@pytest.mark.parametrize("system", ratings.SYSTEMS)
+def test_replay_matches_update(system):
+    n_bots = 30
+    games = random_history(3000, n_bots, seed=1)
+    a_idx, b_idx, scores = zip(*games)
+    replayed = np.array(ratings.replay(system, a_idx, b_idx, scores, n_bots))
+    np.testing.assert_allclose(replayed, one_by_one(system, games, n_bots), rtol=0, atol=1e-9)
+
+@pytest.mark.parametrize("system", ratings.SYSTEMS)
+def test_replay_of_nothing_is_new_ratings(system):
+    rating, deviation, volatility = ratings.replay(system, [], [], [], 3)
+    assert [tuple(x) for x in zip(rating, deviation, volatility)] == [ratings.new_rating(system)] * 3
+
+@pytest.mark.parametrize("system", ratings.SYSTEMS)
+def test_winner_gains_and_draw_between_equals_is_even(system):
+    start = ratings.new_rating(system)
+    winner, loser = ratings.update(system, start, start, 1.0)
+    assert winner[0] > start[0] > loser[0]
+    assert winner[0] - start[0] == pytest.approx(start[0] - loser[0])
+    a, b = ratings.update(system, start, start, 0.5)
+    assert a[0] == pytest.approx(start[0]) and b[0] == pytest.approx(start[0])
+
+@pytest.mark.parametrize("system", ratings.SYSTEMS)
+def test_record_game_matches_recompute(system):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE bots (id TEXT PRIMARY KEY, elo INTEGER DEFAULT 1200, "
+                 "wins INTEGER DEFAULT 0, losses INTEGER DEFAULT 0)")
+    ratings.init_table(conn)
+    bots = [f"bot-{i}" for i in range(6)]
+    conn.executemany("INSERT INTO bots (id) VALUES (?)", [(b,) for b in bots])
+    rows = [(bots[a], bots[b], bots[a] if s == 1 else bots[b] if s == 0 else None)
+            for a, b, s in random_history(200, len(bots), seed=2)]
+
+    for row in rows:
+        ratings.record_game(conn, system, *row)
+    recorded = conn.execute("SELECT bot_id, rating, deviation, volatility FROM ratings ORDER BY bot_id").fetchall()
+    ratings.recompute(conn, system, rows)
+    recomputed = conn.execute("SELECT bot_id, rating, deviation, volatility FROM ratings ORDER BY bot_id").fetchall()
+    assert ratings.stored_system(conn) == system
+    for (bot, *a), (other, *b) in zip(recorded, recomputed):
+        assert bot == other
+        np.testing.assert_allclose(a, b, rtol=0, atol=1e-9)
@@ -0,0 +1,51 @@
+import random
+import sqlite3
+import pytest
+import schema
+import storage
+
+# Moves packed one nibble each, and the migration from the old layouts.
+#
+#   python -m pytest -q test_schema.py
+
+@pytest.mark.parametrize("moves", [[], [3], [3, 3, 4], [0, 6] * 21, [6] * 41])
+def test_encode_decode_round_trip(moves):
+    blob = schema.encode_moves(moves)
+    assert len(blob) == (len(moves) + 1) // 2
+    assert schema.decode_moves(blob) == moves
+
+def test_random_games_round_trip():
+    rng = random.Random(3)
+    for _ in range(1000):
+        moves = [rng.randrange(7) for _ in range(rng.randint(0, 42))]
+        assert schema.decode_moves(schema.encode_moves(moves)) == moves
+
+def test_high_nibble_first():
+    assert schema.encode_moves([3, 3, 4]) == b"\x33\x4f"
+    assert schema.decode_moves(None) == []
+
+def test_migrate_old_league_db(tmp_path):
+    path = str(tmp_path / "league.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE bots (id TEXT PRIMARY KEY, name TEXT, elo INTEGER DEFAULT 1200,
+                           wins INTEGER DEFAULT 0, losses INTEGER DEFAULT 0);
+        CREATE TABLE matches (id TEXT PRIMARY KEY, bot1_id TEXT, bot2_id TEXT, winner_id TEXT, moves TEXT,
+                              timestamp DATETIME DEFAULT CURRENT_TIMESTAMP);
+        INSERT INTO bots (id, name) VALUES ('a', 'A'), ('b', 'B');
+        INSERT INTO matches (id, bot1_id, bot2_id, winner_id, moves, timestamp)
+            VALUES ('m1', 'a', 'b', 'a', '[3, 3, 4, 4, 5, 5, 6]', '2026-01-01 00:00:00'),
+                   ('m2', 'b', 'a', NULL, '[]', '2026-01-02 00:00:00');
+    """)
+    conn.commit()
+    conn.close()
+
+    conn = storage.connect(path)
+    assert schema.migrate(conn) == 0
+    assert schema.migrate(conn) == schema.VERSION # Nothing left to do
+    assert [row[1] for row in conn.execute("PRAGMA table_info(bots)")] == ["id", "name", "elo", "wins", "losses", "url"]
+    assert schema.bot_history(conn, "a") == [
+        ("m2", "b", "a", None, [], "2026-01-02 00:00:00"),
+        ("m1", "a", "b", "a", [3, 3, 4, 4, 5, 5, 6], "2026-01-01 00:00:00"),
+    ]
+    conn.close()
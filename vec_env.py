@@ -0,0 +1,127 @@
+import numpy as np
+from batch_eval import WINDOW_INDEX
+
+# --- VECTORIZED CONNECT 4 ---
+# N games stored in NumPy arrays and stepped all at once, so the training loop
+# pays the Python overhead once per step instead of once per game.
+ROWS = 6
+COLS = 7
+
+# For every cell (flat index, row 0 = top), the windows that pass through it,
+# padded with a dummy window (index 69, never a win) so it's a square table.
+_cell_windows = [[w for w in range(len(WINDOW_INDEX)) if cell in WINDOW_INDEX[w]]
+                 for cell in range(ROWS * COLS)]
+_max_windows = max(len(ws) for ws in _cell_windows)
+CELL_WINDOWS = np.full((ROWS * COLS, _max_windows), len(WINDOW_INDEX), dtype=np.intp)
+for _cell, _ws in enumerate(_cell_windows):
+    CELL_WINDOWS[_cell, :len(_ws)] = _ws
+# The dummy window points at 4 copies of one "cell" that is always 0
+PADDED_WINDOW_INDEX = np.vstack([WINDOW_INDEX, np.full((1, 4), ROWS * COLS)])
+
+class VecConnect4:
+    """
+    'num_envs' independent games.
+    boards:  (N, 6, 7) int8, same layout as Connect4.board (0 empty, 1, 2; row 0 = top)
+    heights: (N, 7) pieces per column
+    players: (N,) whose turn it is in each game (1 always starts)
+    """
+    def __init__(self, num_envs, seed=None):
+        self.num_envs = num_envs
+        self.rng = np.random.default_rng(seed)
+        self.boards = np.zeros((num_envs, ROWS, COLS), dtype=np.int8)
+        self.heights = np.zeros((num_envs, COLS), dtype=np.int8)
+        self.players = np.ones(num_envs, dtype=np.int8)
+        self.move_counts = np.zeros(num_envs, dtype=np.int16)
+        self._env_index = np.arange(num_envs)
+
+    def reset(self, done=None):
+        """Resets every game, or only those where 'done' is True (auto-reset)."""
+        if done is None:
+            done = np.ones(self.num_envs, dtype=bool)
+        self.boards[done] = 0
+        self.heights[done] = 0
+        self.players[done] = 1
+        self.move_counts[done] = 0
+
+    def legal_mask(self):
+        """(N, 7) bool: which columns still have room."""
+        return self.heights < ROWS
+
+    def flat_boards(self):
+        """(N, 42) view of the boards, the same order as board_to_tensor."""
+        return self.boards.reshape(self.num_envs, ROWS * COLS)
+
+    def random_actions(self, legal=None):
+        """A uniformly random legal column for every game (0 where there is none)."""
+        if legal is None:
+            legal = self.legal_mask()
+        noise = self.rng.random((self.num_envs, COLS))
+        return np.argmax(np.where(legal, noise, -1.0), axis=1)
+
+    def step(self, actions, active=None):
+        """
+        The player to move drops into actions[i] in every game where active[i]
+        (all games by default). Returns three (N,) bool arrays:
+        won (the mover connected four), draw (board now full) and illegal
+        (the column was full or out of range - nothing was dropped).
+        The turn only passes in games where a legal move was made.
+        """
+        if active is None:
+            active = np.ones(self.num_envs, dtype=bool)
+        actions = np.asarray(actions)
+        in_range = (actions >= 0) & (actions < COLS)
+        cols = np.where(in_range, actions, 0)
+        heights = self.heights[self._env_index, cols]
+        illegal = active & (~in_range | (heights >= ROWS))
+        moved = active & ~illegal
+
+        envs = self._env_index[moved]
+        cols = cols[moved]
+        rows = ROWS - 1 - heights[moved]
+        movers = self.players[moved]
+        self.boards[envs, rows, cols] = movers
+        self.heights[envs, cols] += 1
+        self.move_counts[envs] += 1
+
+        # Last-move win check: only the windows through the new piece
+        cells = rows * COLS + cols
+        flat = np.concatenate([self.flat_boards()[envs], np.zeros((len(envs), 1), np.int8)], axis=1)
+        windows = PADDED_WINDOW_INDEX[CELL_WINDOWS[cells]] # (M, 16, 4)
+        values = np.take_along_axis(flat, windows.reshape(len(envs), -1), axis=1).reshape(windows.shape)
+        won_moved = (values == movers[:, None, None]).all(axis=2).any(axis=1)
+
+        won = np.zeros(self.num_envs, dtype=bool)
+        won[envs] = won_moved
+        draw = moved & ~won & (self.move_counts == ROWS * COLS)
+        self.players[moved] = 3 - self.players[moved]
+        return won, draw, illegal
+
+if __name__ == "__main__":
+    # Random-vs-random throughput: one SilentConnect4 at a time vs N at once
+    import random
+    import time
+    from connect4 import Connect4, get_valid_locations
+
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < 2:
+        game = Connect4()
+        player = 1
+        while True:
+            col = random.choice(get_valid_locations(game))
+            game.drop_piece(col, player)
+            steps += 1
+            if game.last_move_wins() or game.is_full():
+                break
+            player = 3 - player
+    print(f"Connect4 loop     : {steps / (time.perf_counter() - start):10.0f} steps/s")
+
+    for num_envs in (64, 1024, 8192):
+        env = VecConnect4(num_envs, seed=0)
+        steps = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < 2:
+            won, draw, illegal = env.step(env.random_actions())
+            env.reset(won | draw)
+            steps += num_envs
+        print(f"VecConnect4 x{num_envs:<5}: {steps / (time.perf_counter() - start):10.0f} steps/s")